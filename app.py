@@ -33,6 +33,14 @@ from processor.sumisho import SumishoProcessor as sumisho
 from processor.psb_auto_curing import PSBAutoCuringProcessor as psb_auto_curing
 
 from utils.init import DBConnection as db_connect
+from utils.workbook_cache import get_workbook_cache
+from utils.dataset_diff import DatasetDiff
+from utils.bulk_upsert import bulk_upsert
+from utils.chunked_lookup import ChunkedLookup
+from utils.dataset_snapshot import get_table_snapshot, row_hashes, utc_now
+from utils.lookup_cache import get_lookup_cache
+from utils.account_index import get_account_index
+from utils.supabase_client import SUPABASE_BACKEND, get_client_factory
 
 warnings.filterwarnings('ignore', category=UserWarning, 
                         message="Cell .* is marked as a date but the serial value .* is outside the limits for dates.*")
@@ -91,11 +99,22 @@ CAMPAIGN_CONFIG = {
 class App():
     def main_app(self):
         supabase = db_connect.init_supabase()
+        workbook_cache = get_workbook_cache()
         user_data = st.session_state.get('user_data')
         supabase.rpc("set_user_id", {"user_id": user_data.get('user_id')})
 
         if st.sidebar.button("Sign Out", type="secondary"):
             self.logout()
+
+        with st.sidebar.expander("Database connection", expanded=False):
+            metrics = get_client_factory().metrics()
+            if SUPABASE_BACKEND == "local":
+                st.caption(f"{metrics['local_requests']} requests to the local database since the app started.")
+            else:
+                st.caption(
+                    f"{metrics['requests']} requests since the app started, over "
+                    f"{metrics['connections_opened']} opened connections ({metrics['connections_reused']} reused)."
+                )
         
         st.markdown("""
             <style>
@@ -173,9 +192,9 @@ class App():
                 TABLE_NAME = 'rob_bike_field_result'
                 
                 try:
-                    xls = pd.ExcelFile(upload_field_result)
+                    upload_content = upload_field_result.getvalue()
 
-                    sheet_options = xls.sheet_names
+                    sheet_options = workbook_cache.sheet_names(upload_content)
                     if len(sheet_options) > 1: 
                         selected_sheet = st.selectbox(
                             "Select a sheet from the Excel file:",
@@ -187,7 +206,7 @@ class App():
                         selected_sheet = sheet_options[0]
                         
                     if selected_sheet:
-                        df = pd.read_excel(xls, sheet_name=selected_sheet)
+                        df = workbook_cache.read_sheet(upload_content, selected_sheet)
                         df_clean = df.replace({np.nan: 0})
                     
                     if 'chcode' in df_clean.columns and 'status' in df_clean.columns and 'SUB STATUS' in df_clean.columns and 'DATE' in df_clean.columns and 'TIME' in df_clean.columns:
@@ -236,33 +255,23 @@ class App():
                                     check_status = st.empty()
                                     check_status.text(f"Checking 0 of {total_combinations} records...")
                                     
-                                    batch_size = 100
-                                    for i in range(0, total_combinations, batch_size):
-                                        batch = unique_combinations.iloc[i:i+batch_size]
-                                        
-                                        for _, row in batch.iterrows():
-                                            chcode = row['chcode']
-                                            status = row['status']
-                                            inserted_date = row['inserted_date']
-                                            
-                                            query = supabase.table(TABLE_NAME).select("*").eq('chcode', chcode).eq('status', status)
-                                            
-                                            if inserted_date is not None and inserted_date != 'NaT':
-                                                query = query.eq('inserted_date', inserted_date)
-                                                
-                                            try:
-                                                response = query.execute()
-                                                if hasattr(response, 'data') and response.data:
-                                                    existing_records.extend(response.data)
-                                            except Exception as e:
-                                                st.warning(f"Error checking record: {str(e)}. Continuing...")
-                                        
-                                        progress_value = min(1.0, (i + batch_size) / total_combinations)
-                                        check_progress.progress(progress_value)
-                                        check_status.text(f"Checking {min(i + batch_size, total_combinations)} of {total_combinations} records...")
+                                    def show_check_progress(done, total):
+                                        check_progress.progress(min(1.0, done / max(1, total)))
+                                        check_status.text(f"Checking chcodes {done} of {total}...")
+                                    
+                                    lookup = ChunkedLookup(supabase, TABLE_NAME, columns="chcode, status, inserted_date")
+                                    existing_records = lookup.fetch(
+                                        'chcode',
+                                        unique_combinations['chcode'].astype(str).tolist(),
+                                        in_filters={'status': unique_combinations['status'].astype(str).unique().tolist()},
+                                        on_chunk=show_check_progress
+                                    )
+                                    for _, error in lookup.errors:
+                                        st.warning(f"Error checking records: {str(error)}. Continuing...")
                                     
                                     check_progress.empty()
                                     check_status.empty()
+                                    st.caption(f"Checked {total_combinations} records against the database with {lookup.requests} requests in {lookup.elapsed:.2f}s.")
                                 
                                 existing_df = pd.DataFrame(existing_records) if existing_records else pd.DataFrame()
                                 
@@ -275,10 +284,9 @@ class App():
                                     
                                     df_extracted['unique_key'] = df_extracted['chcode'] + '_' + df_extracted['status'] + '_' + df_extracted['inserted_date'].astype(str)
                                     
-                                    existing_keys = []
-                                    for _, row in existing_df.iterrows():
-                                        key = str(row['chcode']) + '_' + str(row['status']) + '_' + str(row['inserted_date'])
-                                        existing_keys.append(key)
+                                    existing_keys = set(
+                                        existing_df['chcode'] + '_' + existing_df['status'] + '_' + existing_df['inserted_date'].astype(str)
+                                    )
                                     
                                     df_new_records = df_extracted[~df_extracted['unique_key'].isin(existing_keys)].copy()
                                     df_new_records.drop('unique_key', axis=1, inplace=True)
@@ -346,9 +354,9 @@ class App():
             if upload_dataset:
                 TABLE_NAME = 'rob_bike_dataset'
                 try:
-                    xls = pd.ExcelFile(upload_dataset)
+                    upload_content = upload_dataset.getvalue()
                     
-                    sheet_options = xls.sheet_names
+                    sheet_options = workbook_cache.sheet_names(upload_content)
                     if len(sheet_options) > 1:
                         selected_sheet = st.selectbox(
                             "Select a sheet from the Excel file:",
@@ -360,7 +368,7 @@ class App():
                         selected_sheet = sheet_options[0]
                         
                     if selected_sheet:     
-                        df = pd.read_excel(xls, sheet_name=selected_sheet)
+                        df = workbook_cache.read_sheet(upload_content, selected_sheet)
                         df_clean = df.replace({np.nan: 0})
                         df_filtered = df_clean.copy()
                     
@@ -409,7 +417,6 @@ class App():
                             
                             try:
                                 unique_id_col = 'account_number'
-                                unique_ids = df_selected[unique_id_col].astype(str).str.strip().unique().tolist()
                                 
                                 for col in df_selected.columns:
                                     if pd.api.types.is_datetime64_any_dtype(df_selected[col]):
@@ -418,88 +425,35 @@ class App():
                                 df_selected = df_selected.astype(object).where(pd.notnull(df_selected), None)
                                 df_selected[unique_id_col] = df_selected[unique_id_col].astype(str).str.strip() 
                                 
-                                new_records = df_selected.to_dict(orient="records")
-                                
-                                existing_records = []
-                                batch_size_for_query = 1000
-                                
                                 progress_bar = st.progress(0)
                                 status_text = status_placeholder.empty()
-                                status_text.text("Fetching all existing records from database...")
-                                
-                                try:
-                                    count_response = supabase.table(TABLE_NAME).select("*", count="exact").execute()
-                                    total_records_in_db = count_response.count if hasattr(count_response, 'count') else 0
-                                except:
-                                    total_records_in_db = 0
-                                
-                                offset = 0
-                                while True:
-                                    try:
-                                        batch_response = supabase.table(TABLE_NAME).select("*").range(offset, offset + batch_size_for_query - 1).execute()
-                                        if hasattr(batch_response, 'data') and batch_response.data:
-                                            existing_records.extend(batch_response.data)
-                                            if len(batch_response.data) < batch_size_for_query:
-                                                break
-                                            offset += batch_size_for_query
-                                        else:
-                                            break
-                                        
-                                        if total_records_in_db > 0:
-                                            progress_value = min(1.0, offset / total_records_in_db)
-                                            progress_bar.progress(progress_value)
-                                    except Exception as e:
-                                        st.warning(f"Error fetching records at offset {offset}: {str(e)}. Continuing...")
-                                        break
+                                status_text.text("Fetching changed records from database...")
                                 
-                                existing_df = pd.DataFrame(existing_records) if existing_records else pd.DataFrame()
+                                snapshot = get_table_snapshot(TABLE_NAME)
+                                existing_df = snapshot.refresh(supabase, on_progress=progress_bar.progress)
                                 if not existing_df.empty:
                                     existing_df[unique_id_col] = existing_df[unique_id_col].astype(str).str.strip()
+                                st.caption(f"Fetched {snapshot.rows_fetched} records with {snapshot.requests} requests.")
                                 
-                                records_to_insert = []
-                                records_to_update = []
-                                records_to_delete = []
-                                
-                                total_records = len(new_records)
-                                processed_count = 0
+                                if snapshot.supports_delta:
+                                    df_selected['content_hash'] = row_hashes(df_selected, target_columns)
                                 
                                 status_text.text("Identifying records to insert, update, or delete...")
                                 progress_bar.progress(0)
                                 
-                                def records_differ(new_record, existing_record):
-                                    for key, value in new_record.items():
-                                        if key in existing_record and str(value).strip() != str(existing_record[key]).strip():
-                                            return True
-                                    return False
-                                
-                                for new_record in new_records:
-                                    processed_count += 1
-                                    account_number = str(new_record[unique_id_col]).strip()
-                                    
-                                    if not existing_df.empty:
-                                        matching_records = existing_df[existing_df[unique_id_col] == account_number]
-                                        
-                                        if not matching_records.empty:
-                                            existing_record = matching_records.iloc[0].to_dict()
-                                            if records_differ(new_record, existing_record):
-                                                new_record['id'] = existing_record['id']
-                                                records_to_update.append(new_record)
-                                        else:
-                                            records_to_insert.append(new_record)
-                                    else:
-                                        records_to_insert.append(new_record)
-                                    
-                                    progress_value = min(1.0, processed_count / total_records)
-                                    progress_bar.progress(progress_value)
+                                dataset_diff = DatasetDiff(
+                                    df_selected, existing_df, key=unique_id_col, find_deletes=True,
+                                    hash_col='content_hash' if snapshot.supports_delta else None
+                                )
+                                records_to_insert = dataset_diff.records_to_insert
+                                records_to_update = dataset_diff.records_to_update
+                                records_to_delete = dataset_diff.ids_to_delete
                                 
-                                if not existing_df.empty:
-                                    uploaded_account_numbers = set(str(acc).strip() for acc in unique_ids)
-                                    existing_account_numbers = set(existing_df[unique_id_col].tolist())
-                                    
-                                    accounts_to_delete = existing_account_numbers - uploaded_account_numbers
-                                    
-                                    if accounts_to_delete:
-                                        records_to_delete = existing_df[existing_df[unique_id_col].isin(accounts_to_delete)]['id'].tolist()
+                                if snapshot.supports_delta:
+                                    synced_at = utc_now()
+                                    for record in records_to_insert + records_to_update:
+                                        record['updated_at'] = synced_at
+                                progress_bar.progress(1.0)
                                 
                                 status_placeholder.info(f"Found {len(records_to_insert)} records to insert, {len(records_to_update)} records to update, and {len(records_to_delete)} records to delete.")
                                 
@@ -531,19 +485,15 @@ class App():
                                     status_text.text("Updating existing records...")
                                     progress_bar.progress(0)
                                     
-                                    for i, record in enumerate(records_to_update):
-                                        record_id = record.pop('id')
-                                        
-                                        try:
-                                            response = supabase.table(TABLE_NAME).update(record).eq('id', record_id).execute()
-                                            if hasattr(response, 'data') and response.data:
-                                                update_count += 1
-                                        except Exception as e:
-                                            st.error(f"Error updating record {record_id}: {str(e)}")
-                                        
-                                        progress_value = min(1.0, (i + 1) / len(records_to_update))
-                                        progress_bar.progress(progress_value)
-                                        status_text.text(f"Updated {update_count} of {len(records_to_update)} existing records...")
+                                    def show_update_progress(done, total):
+                                        progress_bar.progress(min(1.0, done / max(1, total)))
+                                        status_text.text(f"Updated {done} of {total} existing records...")
+                                    
+                                    update_count, failed_batches = bulk_upsert(
+                                        supabase, TABLE_NAME, records_to_update, on_conflict='id', on_batch=show_update_progress
+                                    )
+                                    for _, error in failed_batches:
+                                        st.error(f"Error updating records batch: {str(error)}")
                                 
                                 if records_to_delete:
                                     status_text.text("Removing records not in uploaded dataset...")
@@ -564,6 +514,8 @@ class App():
                                         progress_bar.progress(progress_value)
                                         status_text.text(f"Deleted {delete_count} of {len(records_to_delete)} obsolete records...")
                                 
+                                get_account_index(TABLE_NAME).invalidate()
+                                
                                 total_processed = success_count + update_count + delete_count
                                 if total_processed > 0:
                                     st.toast(f"Dataset Synchronized! {success_count} records inserted, {update_count} records updated, and {delete_count} records removed.")
@@ -587,9 +539,9 @@ class App():
             if upload_disposition:
                 TABLE_NAME = 'rob_bike_disposition'
                 try:
-                    xls = pd.ExcelFile(upload_disposition)
+                    upload_content = upload_disposition.getvalue()
                     
-                    sheet_options = xls.sheet_names
+                    sheet_options = workbook_cache.sheet_names(upload_content)
                     if len(sheet_options) > 1:
                         selected_sheet = st.selectbox(
                             "Select a sheet from the Excel file:",
@@ -601,7 +553,7 @@ class App():
                         selected_sheet = sheet_options[0]    
                         
                     if selected_sheet:
-                        df = pd.read_excel(xls, sheet_name=selected_sheet)
+                        df = workbook_cache.read_sheet(upload_content, selected_sheet)
                         df_clean = df.replace({np.nan: ''})
                         df_filtered = df_clean.copy()
 
@@ -617,11 +569,7 @@ class App():
                             if 'CMS Disposition' in df_filtered.columns:
                                 unique_dispositions = df_filtered['CMS Disposition'].drop_duplicates().tolist()
 
-                                existing_response = supabase.table(TABLE_NAME).select("disposition").execute()
-                                if existing_response.data is None:
-                                    existing_dispositions = []
-                                else:
-                                    existing_dispositions = [record['disposition'] for record in existing_response.data]
+                                existing_dispositions = get_lookup_cache().column_values(supabase, TABLE_NAME, "disposition")
 
                                 records_to_insert = [
                                     {"disposition": d} for d in unique_dispositions if d not in existing_dispositions
@@ -629,6 +577,7 @@ class App():
 
                                 if records_to_insert:
                                     insert_response = supabase.table(TABLE_NAME).insert(records_to_insert).execute()
+                                    get_lookup_cache().invalidate(TABLE_NAME)
                                     toast_placeholder = st.empty()
                                     toast_placeholder.success("Upload successful!")
                                     time.sleep(3)
@@ -664,8 +613,8 @@ class App():
 
                 for idx, upload_file in enumerate(upload_datasets):
                     try:
-                        xls = pd.ExcelFile(upload_file)
-                        sheet_options = xls.sheet_names
+                        upload_content = upload_file.getvalue()
+                        sheet_options = workbook_cache.sheet_names(upload_content)
                         if len(sheet_options) > 1:
                             selected_sheet = st.selectbox(
                                 f"Select a sheet for file {upload_file.name}:",
@@ -677,7 +626,7 @@ class App():
                             selected_sheet = sheet_options[0]
 
                         if selected_sheet:
-                            df = pd.read_excel(xls, sheet_name=selected_sheet)
+                            df = workbook_cache.read_sheet(upload_content, selected_sheet)
                             df_clean = df.replace({np.nan: ""})
 
                             st.subheader(f"Uploaded File: {upload_file.name}")
@@ -764,37 +713,23 @@ class App():
                         if not existing_df.empty:
                             existing_df[unique_id_col] = existing_df[unique_id_col].astype(str).str.strip()
                         
-                        total_records = 0
                         for file_name, df_selected in file_dataframes:
-                            df_selected = df_selected.astype(object).where(pd.notnull(df_selected), None)
-                            df_selected[unique_id_col] = df_selected[unique_id_col].astype(str).str.strip()
-                            new_records = df_selected.to_dict(orient="records")
-                            total_records += len(new_records)
-                            
-                            def records_differ(new_record, existing_record):
-                                for key, value in new_record.items():
-                                    if key in existing_record and str(value).strip() != str(existing_record[key]).strip():
-                                        return True
-                                return False
-                            
-                            for new_record in new_records:
-                                account_number = str(new_record[unique_id_col]).strip()
-                                
-                                if not existing_df.empty:
-                                    matching_records = existing_df[existing_df[unique_id_col] == account_number]
-                                    
-                                    if not matching_records.empty:
-                                        existing_record = matching_records.iloc[0].to_dict()
-                                        if records_differ(new_record, existing_record):
-                                            new_record['id'] = existing_record['id']
-                                            all_records_to_update.append(new_record)
-                                    else:
-                                        all_records_to_insert.append(new_record)
-                                else:
-                                    all_records_to_insert.append(new_record)
-                            
-                            progress_value = min(1.0, len(all_records_to_insert) + len(all_records_to_update) / max(1, total_records))
-                            progress_bar.progress(progress_value)
+                            dataset_diff = DatasetDiff(df_selected, existing_df, key=unique_id_col)
+                            all_records_to_insert.extend(dataset_diff.records_to_insert)
+                            all_records_to_update.extend(dataset_diff.records_to_update)
+                        
+                        # The dataset snapshot only re-reads rows stamped with updated_at. These records
+                        # carry only some columns and cannot be hashed, so their stored hash is cleared
+                        # and the next dataset upload compares them column by column.
+                        sample_df = existing_df if not existing_df.empty else pd.DataFrame(
+                            supabase.table(TABLE_NAME).select("*").limit(1).execute().data or []
+                        )
+                        if {'updated_at', 'content_hash'} <= set(sample_df.columns):
+                            synced_at = utc_now()
+                            for record in all_records_to_insert + all_records_to_update:
+                                record['updated_at'] = synced_at
+                                record['content_hash'] = None
+                        progress_bar.progress(1.0)
                         
                         status_placeholder.info(f"Found {len(all_records_to_insert)} records to insert and {len(all_records_to_update)} records to update across all files.")
                         
@@ -825,19 +760,17 @@ class App():
                             status_text.text("Updating existing records...")
                             progress_bar.progress(0)
                             
-                            for i, record in enumerate(all_records_to_update):
-                                record_id = record.pop('id')
-                                
-                                try:
-                                    response = supabase.table(TABLE_NAME).update(record).eq('id', record_id).execute()
-                                    if hasattr(response, 'data') and response.data:
-                                        update_count += 1
-                                except Exception as e:
-                                    st.error(f"Error updating record {record_id}: {str(e)}")
-                                
-                                progress_value = min(1.0, (i + 1) / len(all_records_to_update))
-                                progress_bar.progress(progress_value)
-                                status_text.text(f"Updated {update_count} of {len(all_records_to_update)} existing records...")
+                            def show_update_progress(done, total):
+                                progress_bar.progress(min(1.0, done / max(1, total)))
+                                status_text.text(f"Updated {done} of {total} existing records...")
+                            
+                            update_count, failed_batches = bulk_upsert(
+                                supabase, TABLE_NAME, all_records_to_update, on_conflict='id', on_batch=show_update_progress
+                            )
+                            for _, error in failed_batches:
+                                st.error(f"Error updating records batch: {str(error)}")
+                        
+                        get_account_index(TABLE_NAME).invalidate()
                         
                         total_processed = success_count + update_count
                         if total_processed > 0:
@@ -984,8 +917,8 @@ class App():
 
                 for idx, upload_file in enumerate(upload_datasets):
                     try:
-                        xls = pd.ExcelFile(upload_file)
-                        sheet_options = xls.sheet_names
+                        upload_content = upload_file.getvalue()
+                        sheet_options = workbook_cache.sheet_names(upload_content)
                         if len(sheet_options) > 1:
                             selected_sheet = st.selectbox(
                                 f"Select a sheet for file {upload_file.name}:",
@@ -997,7 +930,7 @@ class App():
                             selected_sheet = sheet_options[0]
 
                         if selected_sheet:
-                            df = pd.read_excel(xls, sheet_name=selected_sheet)
+                            df = workbook_cache.read_sheet(upload_content, selected_sheet)
                             df_clean = df.replace({np.nan: ""})
 
                             st.subheader(f"Uploaded File: {upload_file.name}")
@@ -1051,37 +984,11 @@ class App():
                         if not existing_df.empty:
                             existing_df[unique_id_col] = existing_df[unique_id_col].astype(str).str.strip()
                         
-                        total_records = 0
                         for file_name, df_selected in file_dataframes:
-                            df_selected = df_selected.astype(object).where(pd.notnull(df_selected), None)
-                            df_selected[unique_id_col] = df_selected[unique_id_col].astype(str).str.strip()
-                            new_records = df_selected.to_dict(orient="records")
-                            total_records += len(new_records)
-                            
-                            def records_differ(new_record, existing_record):
-                                for key, value in new_record.items():
-                                    if key in existing_record and str(value).strip() != str(existing_record[key]).strip():
-                                        return True
-                                return False
-                            
-                            for new_record in new_records:
-                                account_number = str(new_record[unique_id_col]).strip()
-                                
-                                if not existing_df.empty:
-                                    matching_records = existing_df[existing_df[unique_id_col] == account_number]
-                                    
-                                    if not matching_records.empty:
-                                        existing_record = matching_records.iloc[0].to_dict()
-                                        if records_differ(new_record, existing_record):
-                                            new_record['id'] = existing_record['id']
-                                            all_records_to_update.append(new_record)
-                                    else:
-                                        all_records_to_insert.append(new_record)
-                                else:
-                                    all_records_to_insert.append(new_record)
-                            
-                            progress_value = min(1.0, len(all_records_to_insert) + len(all_records_to_update) / max(1, total_records))
-                            progress_bar.progress(progress_value)
+                            dataset_diff = DatasetDiff(df_selected, existing_df, key=unique_id_col)
+                            all_records_to_insert.extend(dataset_diff.records_to_insert)
+                            all_records_to_update.extend(dataset_diff.records_to_update)
+                        progress_bar.progress(1.0)
                         
                         status_placeholder.info(f"Found {len(all_records_to_insert)} records to insert and {len(all_records_to_update)} records to update across all files.")
                         
@@ -1112,19 +1019,15 @@ class App():
                             status_text.text("Updating existing records...")
                             progress_bar.progress(0)
                             
-                            for i, record in enumerate(all_records_to_update):
-                                record_id = record.pop('id')
-                                
-                                try:
-                                    response = supabase.table(TABLE_NAME).update(record).eq('id', record_id).execute()
-                                    if hasattr(response, 'data') and response.data:
-                                        update_count += 1
-                                except Exception as e:
-                                    st.error(f"Error updating record {record_id}: {str(e)}")
-                                
-                                progress_value = min(1.0, (i + 1) / len(all_records_to_update))
-                                progress_bar.progress(progress_value)
-                                status_text.text(f"Updated {update_count} of {len(all_records_to_update)} existing records...")
+                            def show_update_progress(done, total):
+                                progress_bar.progress(min(1.0, done / max(1, total)))
+                                status_text.text(f"Updated {done} of {total} existing records...")
+                            
+                            update_count, failed_batches = bulk_upsert(
+                                supabase, TABLE_NAME, all_records_to_update, on_conflict='id', on_batch=show_update_progress
+                            )
+                            for _, error in failed_batches:
+                                st.error(f"Error updating records batch: {str(error)}")
                         
                         total_processed = success_count + update_count
                         if total_processed > 0:
@@ -1150,14 +1053,11 @@ class App():
             if upload_madrid_daily is not None:
                 sp_madrid_daily = upload_madrid_daily.getvalue()
 
-                template_stream = io.BytesIO(sp_madrid_daily)
-                template_xls = pd.ExcelFile(template_stream)
-                template_sheets = template_xls.sheet_names
+                template_sheets = workbook_cache.sheet_names(sp_madrid_daily)
 
                 selected_template_sheet = st.sidebar.selectbox("Select a sheet from the SP Madrid Daily Template", template_sheets)
 
-                template_stream.seek(0)
-                template_df_preview = pd.read_excel(template_stream, sheet_name=selected_template_sheet, header=1)
+                template_df_preview = workbook_cache.read_sheet(sp_madrid_daily, selected_template_sheet, header=1)
                 available_columns = list(template_df_preview.columns)
 
                 selected_date_column = st.sidebar.selectbox("Select the column to insert 'Date + Remark'", available_columns)
@@ -1204,9 +1104,7 @@ class App():
             file_buffer = io.BytesIO(file_content)
                     
             try:
-                file_buffer.seek(0) 
-                xlsx = pd.ExcelFile(file_buffer)
-                sheet_names = xlsx.sheet_names
+                sheet_names = workbook_cache.sheet_names(file_content)
                 is_encrypted = False
                 decrypted_file = file_buffer
 
@@ -1233,8 +1131,7 @@ class App():
                         office_file.decrypt(decrypted_file)
                         decrypted_file.seek(0)
 
-                        xlsx = pd.ExcelFile(decrypted_file)
-                        sheet_names = xlsx.sheet_names
+                        sheet_names = workbook_cache.sheet_names(decrypted_file)
                         
                     except Exception as decrypt_error:
                         st.sidebar.error(f"Decryption failed: {str(decrypt_error)}")
@@ -1255,10 +1152,9 @@ class App():
             
             try:
                 if is_encrypted:
-                    decrypted_file.seek(0)
-                    df = pd.read_excel(decrypted_file, sheet_name=selected_sheet)
+                    df = workbook_cache.read_sheet(decrypted_file, selected_sheet)
                 else:
-                    df = pd.read_excel(xlsx, sheet_name=selected_sheet)
+                    df = workbook_cache.read_sheet(file_content, selected_sheet)
                     
                 if selected_sheet and preview:
                     st.subheader(f"Preview of {selected_sheet}")
@@ -1272,6 +1168,7 @@ class App():
 
         if uploaded_file is not None:
             file_content = uploaded_file.getvalue() if hasattr(uploaded_file, 'getvalue') else uploaded_file.read()
+            source_df = None
             
             try:
                 if "renamed_df" in st.session_state:
@@ -1484,9 +1381,7 @@ class App():
                         st.success("Value changes applied!")
                         
                 if enable_add_column or enable_column_removal or enable_column_renaming or enable_row_filtering or enable_add_row or enable_row_removal or enable_edit_values:
-                    buffer = io.BytesIO()
-                    df.to_excel(buffer, index=False, engine='openpyxl')
-                    file_content = buffer.getvalue()
+                    source_df = df
                     st.subheader("Modified Data Preview")
                     st.dataframe(df, use_container_width=True)
 
@@ -1494,16 +1389,16 @@ class App():
                 st.error(f"Error loading or manipulating file: {str(e)}")
 
             if "renamed_df" in st.session_state:
-                df = st.session_state["renamed_df"]
-                buffer = io.BytesIO()
-                df.to_excel(buffer, index=False, engine='openpyxl')
-                buffer.seek(0)
-                file_content = buffer.getvalue()
+                source_df = st.session_state["renamed_df"]
 
             if process_button and selected_sheet:
                 try:
                     with st.spinner("Processing file..."):
-                        file_to_process = decrypted_file if is_encrypted else file_content
+                        # Manipulated data goes to the processor as the DataFrame itself
+                        if source_df is not None:
+                            file_to_process = source_df
+                        else:
+                            file_to_process = decrypted_file if is_encrypted else file_content
                         if campaign == "BPI Auto Curing" and automation_type == "Cured List":
                             result = processor.process_cured_list(
                                 file_to_process, 
@@ -1606,8 +1501,7 @@ class App():
                                 st.session_state['output_binary'] = output_binary
                                 st.session_state['output_filename'] = output_filename
                                 
-                                excel_file = pd.ExcelFile(io.BytesIO(output_binary))
-                                result_sheet_names = excel_file.sheet_names
+                                result_sheet_names = workbook_cache.sheet_names(output_binary)
                                 st.session_state['result_sheet_names'] = result_sheet_names
                             
                             else:
@@ -2047,7 +1941,6 @@ class App():
                                 )
 
             elif 'output_binary' in st.session_state and 'result_sheet_names' in st.session_state:
-                excel_file = pd.ExcelFile(io.BytesIO(st.session_state['output_binary']))
                 result_sheet_names = st.session_state['result_sheet_names']
                 
                 if len(result_sheet_names) > 1:
@@ -2060,7 +1953,7 @@ class App():
                 else: 
                     result_sheet = result_sheet_names[0]
                 
-                selected_df = pd.read_excel(io.BytesIO(st.session_state['output_binary']), sheet_name=result_sheet)
+                selected_df = workbook_cache.read_sheet(st.session_state['output_binary'], result_sheet)
 
                 st.subheader("Processed Preview")
                 st.dataframe(selected_df, use_container_width=True)
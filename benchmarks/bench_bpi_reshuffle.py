@@ -0,0 +1,74 @@
+"""
+BPI cured list Reshuffle sheet: the nested openpyxl scan that looked up each row's
+LAN from the top of the sheet against BPIAutoCuringProcessor.build_reshuffle. Both
+sides fill a new worksheet. The nested scan is O(n^2) in cell reads, so it is
+skipped above OLD_SCAN_MAX_ROWS.
+
+    python benchmarks/bench_bpi_reshuffle.py [rows] [--memory]
+"""
+import numpy as np
+import openpyxl
+import pandas as pd
+
+from harness import check_same, measure, parse_args
+from processor.bpi_auto_curing import BPIAutoCuringProcessor
+
+OLD_SCAN_MAX_ROWS = 8000
+
+
+def old_reshuffle(ws, last_row):
+    others_wb = openpyxl.Workbook()
+    others_ws = others_wb.active
+
+    others_ws.cell(row=1, column=1).value = ws.cell(row=1, column=1).value
+    others_ws.cell(row=1, column=2).value = "REMARK BY"
+
+    for row in range(2, last_row + 1):
+        others_ws.cell(row=row, column=1).value = ws.cell(row=row, column=1).value
+        reference_value = ws.cell(row=row, column=1).value
+        for cured_row in range(2, last_row + 1):
+            if ws.cell(row=cured_row, column=1).value == reference_value:
+                others_ws.cell(row=row, column=2).value = ws.cell(row=cured_row, column=2).value
+                break
+    return others_ws
+
+
+def new_reshuffle(processor, source, lan_header):
+    others_df = processor.build_reshuffle(source, lan_header)
+    others_wb = openpyxl.Workbook()
+    others_ws = others_wb.active
+    others_ws.append(list(others_df.columns))
+    for values in others_df.itertuples(index=False, name=None):
+        others_ws.append(values)
+    return others_ws
+
+
+def cured_list(rows, seed=0):
+    """LAN and collector columns of a cured list, with duplicate, blank and numeric LANs."""
+    rng = np.random.default_rng(seed)
+    lans = rng.integers(0, max(1, rows // 2), rows)
+    ws = openpyxl.Workbook().active
+    ws.append(["LAN", "COLLECTOR"])
+    for lan, collector in zip(lans, rng.integers(0, 40, rows)):
+        value = None if lan % 97 == 0 else int(lan) if lan % 5 == 0 else f"LAN{lan:08d}"
+        ws.append([value, f"AGENT{collector:02d}"])
+    source = pd.DataFrame(list(ws.iter_rows(min_row=2, max_col=2, values_only=True)), columns=[1, 2], dtype=object)
+    return ws, source
+
+
+def sheet_values(ws):
+    return list(ws.iter_rows(values_only=True))
+
+
+if __name__ == "__main__":
+    rows, memory = parse_args(4000)
+    ws, source = cured_list(rows)
+    processor = BPIAutoCuringProcessor.__new__(BPIAutoCuringProcessor)
+    print(f"{rows} cured list rows, {source[1].nunique(dropna=False)} distinct LANs")
+
+    new = measure("build_reshuffle", lambda: new_reshuffle(processor, source, "LAN"), memory)
+    if rows > OLD_SCAN_MAX_ROWS:
+        print(f"nested scan skipped above {OLD_SCAN_MAX_ROWS} rows")
+    else:
+        old = measure("nested scan", lambda: old_reshuffle(ws, ws.max_row), memory)
+        check_same("Reshuffle sheet", sheet_values(old), sheet_values(new))
@@ -0,0 +1,91 @@
+"""
+Dataset sync diff: the per-record filter + records_differ loop the app.py uploads used
+against DatasetDiff, with an upload as large as the existing table. The old loop is
+O(n*m), so it is skipped above OLD_LOOP_MAX_ROWS.
+
+    python benchmarks/bench_dataset_diff.py [rows] [--memory]
+"""
+import random
+
+import numpy as np
+import pandas as pd
+
+from harness import check_same, measure, parse_args
+from utils.dataset_diff import DatasetDiff
+
+OLD_LOOP_MAX_ROWS = 20000
+
+
+def old_diff(df_selected, existing_df, unique_id_col="account_number"):
+    unique_ids = df_selected[unique_id_col].astype(str).str.strip().unique().tolist()
+    df_selected = df_selected.astype(object).where(pd.notnull(df_selected), None)
+    df_selected[unique_id_col] = df_selected[unique_id_col].astype(str).str.strip()
+    new_records = df_selected.to_dict(orient="records")
+
+    records_to_insert = []
+    records_to_update = []
+    records_to_delete = []
+
+    def records_differ(new_record, existing_record):
+        for key, value in new_record.items():
+            if key in existing_record and str(value).strip() != str(existing_record[key]).strip():
+                return True
+        return False
+
+    for new_record in new_records:
+        account_number = str(new_record[unique_id_col]).strip()
+        matching_records = existing_df[existing_df[unique_id_col] == account_number]
+        if not matching_records.empty:
+            existing_record = matching_records.iloc[0].to_dict()
+            if records_differ(new_record, existing_record):
+                new_record['id'] = existing_record['id']
+                records_to_update.append(new_record)
+        else:
+            records_to_insert.append(new_record)
+
+    uploaded_account_numbers = set(str(acc).strip() for acc in unique_ids)
+    accounts_to_delete = set(existing_df[unique_id_col].tolist()) - uploaded_account_numbers
+    if accounts_to_delete:
+        records_to_delete = existing_df[existing_df[unique_id_col].isin(accounts_to_delete)]['id'].tolist()
+
+    return records_to_insert, records_to_update, records_to_delete
+
+
+def upload_and_table(rows, seed=0):
+    """An upload with padded, repeated keys and None/NaN cells, and a table of the same size."""
+    rng = random.Random(seed)
+    upload = pd.DataFrame({
+        "account_number": [f" {rng.randint(0, rows)} " for _ in range(rows)],
+        "chcode": [rng.choice(["A1", "B2", " A1", None, 3]) for _ in range(rows)],
+        "endo_dpd": [rng.choice([1.0, 2.5, np.nan]) for _ in range(rows)],
+        "stores": [rng.choice(["S1", "S2"]) for _ in range(rows)],
+    })
+    table = pd.DataFrame({
+        "id": range(rows),
+        "account_number": [str(rng.randint(0, rows)) for _ in range(rows)],
+        "chcode": [rng.choice(["A1", "B2", None]) for _ in range(rows)],
+        "endo_dpd": [rng.choice([1.0, 2.5, None]) for _ in range(rows)],
+        "stores": [rng.choice(["S1", "S2"]) for _ in range(rows)],
+        "created_at": "2026-10-01T00:00:00",
+    })
+    return upload, table
+
+
+def comparable(records):
+    return [{key: None if pd.isna(value) else value for key, value in record.items()} for record in records]
+
+
+if __name__ == "__main__":
+    rows, memory = parse_args(10000)
+    upload, table = upload_and_table(rows)
+    print(f"{rows} uploaded rows against {len(table)} existing rows")
+
+    diff = measure("DatasetDiff", lambda: DatasetDiff(upload.copy(), table, find_deletes=True), memory)
+    if rows > OLD_LOOP_MAX_ROWS:
+        print(f"per-record loop skipped above {OLD_LOOP_MAX_ROWS} rows")
+    else:
+        inserts, updates, deletes = measure("per-record loop", lambda: old_diff(upload.copy(), table), memory)
+        check_same("inserts", comparable(inserts), comparable(diff.records_to_insert))
+        check_same("updates", comparable(updates), comparable(diff.records_to_update))
+        check_same("deletes", deletes, diff.ids_to_delete)
+    print(f"{len(diff.records_to_insert)} inserts, {len(diff.records_to_update)} updates, {len(diff.ids_to_delete)} deletes")
@@ -0,0 +1,68 @@
+"""
+Latest field status per chcode for the ROB Bike daily remark: the groupby loop that
+sorted each chcode's history separately against ROBBikeProcessor.latest_field_status.
+
+    python benchmarks/bench_field_status.py [rows] [--memory]
+
+rows is the number of field results; they are spread over rows / 20 chcodes.
+"""
+import numpy as np
+import pandas as pd
+
+from harness import check_same, measure, parse_args
+from processor.rob_bike import ROBBikeProcessor
+
+
+def old_field_status(field_results_df, account_info):
+    latest_status_map = {}
+    for chcode, group in field_results_df.groupby('chcode'):
+        latest_row = group.sort_values('inserted_date', ascending=False).iloc[0]
+
+        status = latest_row.get('status', '')
+        substatus = latest_row.get('substatus', '')
+
+        if status in ('0', '') or substatus in ('0', ''):
+            status, substatus = '', ''
+
+        latest_status_map[chcode] = {
+            'Field_Status': status if status not in ('0', '') else '',
+            'Field_Substatus': substatus if substatus not in ('0', '') else '',
+        }
+
+    result = account_info.copy()
+    for field in ('Field_Status', 'Field_Substatus'):
+        result[field] = result['chcode'].map(
+            {chcode: data[field] for chcode, data in latest_status_map.items()}
+        ).fillna('')
+    return result
+
+
+def new_field_status(field_results_df, account_info):
+    latest = ROBBikeProcessor.latest_field_status(field_results_df)
+    result = account_info.copy()
+    result['Field_Status'] = result['chcode'].map(latest['status']).fillna('')
+    result['Field_Substatus'] = result['chcode'].map(latest['substatus']).fillna('')
+    return result
+
+
+def field_results(rows, seed=0):
+    """Field visit history; inserted_date is unique per chcode so "latest" is well defined."""
+    rng = np.random.default_rng(seed)
+    chcodes = max(1, rows // 20)
+    return pd.DataFrame({
+        'chcode': [f"CH{code:06d}" for code in rng.integers(0, chcodes, rows)],
+        'status': rng.choice(['VISITED', 'NOT FOUND', 'PTP', '0', ''], rows),
+        'substatus': rng.choice(['HOME', 'OFFICE', 'MOVED', '0', ''], rows),
+        'inserted_date': pd.Timestamp('2026-01-01') + pd.to_timedelta(rng.permutation(rows), unit='min'),
+    }), chcodes
+
+
+if __name__ == "__main__":
+    rows, memory = parse_args(1000000)
+    history, chcodes = field_results(rows)
+    account_info = pd.DataFrame({'chcode': [f"CH{code:06d}" for code in range(chcodes + chcodes // 10)]})
+    print(f"{rows} field results over {chcodes} chcodes, {len(account_info)} accounts")
+
+    old = measure("groupby loop", lambda: old_field_status(history, account_info), memory)
+    new = measure("latest_field_status", lambda: new_field_status(history, account_info), memory)
+    check_same("field status", old.values.tolist(), new.values.tolist())
@@ -0,0 +1,46 @@
+"""
+Mobile number normalization: the per-row process_mobile_number / clean_phone_number
+through Series.apply against the columnar process_mobile_numbers / clean_phone_numbers.
+
+    python benchmarks/bench_mobile_numbers.py [rows] [--memory]
+"""
+import numpy as np
+import pandas as pd
+
+from harness import check_same, measure, parse_args
+from processor.rob_bike import ROBBikeProcessor
+
+
+def mobile_numbers(rows, seed=0):
+    """Contact numbers as they arrive in endorsement files: mixed formats, floats, blanks."""
+    rng = np.random.default_rng(seed)
+    local = rng.integers(9 * 10**9, 10**10, rows)
+    formats = [
+        lambda n: f"0{n}",
+        lambda n: f"+63{n}",
+        lambda n: f"63 {str(n)[:3]} {str(n)[3:6]} {str(n)[6:]}",
+        lambda n: f"0{str(n)[:3]}-{str(n)[3:]}",
+        lambda n: f"0{n} / 0{n - 1}",
+        lambda n: float(n),
+        lambda n: str(n)[:7],
+        lambda n: None,
+        lambda n: "  ",
+        lambda n: "nan",
+    ]
+    picks = rng.integers(0, len(formats), rows)
+    return pd.Series([formats[pick](number) for pick, number in zip(picks, local)], dtype=object)
+
+
+if __name__ == "__main__":
+    rows, memory = parse_args(200000)
+    numbers = mobile_numbers(rows)
+    processor = ROBBikeProcessor.__new__(ROBBikeProcessor)
+    print(f"{rows} numbers")
+
+    old = measure("process_mobile_number, apply", lambda: numbers.apply(processor.process_mobile_number), memory)
+    new = measure("process_mobile_numbers", lambda: processor.process_mobile_numbers(numbers), memory)
+    check_same("process_mobile_number", old.tolist(), new.tolist())
+
+    old = measure("clean_phone_number, apply", lambda: numbers.apply(processor.clean_phone_number), memory)
+    new = measure("clean_phone_numbers", lambda: processor.clean_phone_numbers(numbers), memory)
+    check_same("clean_phone_number", old.tolist(), new.tolist())
@@ -0,0 +1,67 @@
+"""
+RFD code extraction for the BDO agency daily report: the per-remark regex function
+it used through Series.apply against BDOAutoProcessor.extract_rfd_codes. Runs once on
+remarks drawn from a pool of 5,000 distinct ones (as in a real day) and once with
+every remark unique.
+
+    python benchmarks/bench_rfd_codes.py [rows] [--memory]
+"""
+import os
+import random
+import re
+
+import numpy as np
+import pandas as pd
+
+from harness import check_same, measure, parse_args
+from processor.bdo_auto import BDOAutoProcessor
+
+REFERENCE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "database", "bdo_auto")
+
+
+def old_extract_and_validate_rfd(remark, rfd_valid_codes):
+    remark = str(remark).strip().rstrip("\\")
+    rfd_match = re.search(r"RFD:\s*(\S+)$", remark)
+    if rfd_match:
+        rfd = rfd_match.group(1).upper()
+    else:
+        last_word = re.findall(r"\\\s*(\S+)", remark)
+        if last_word:
+            rfd = last_word[-1].upper()
+        else:
+            last_word = remark.split()[-1] if remark else np.nan
+            rfd = last_word.upper() if last_word else np.nan
+    return rfd if rfd in rfd_valid_codes else np.nan
+
+
+def remark(number, codes, rng):
+    code = rng.choice(codes)
+    if number % 3:
+        return f"Called client {number} \\ PTP on {number % 28 + 1}/10 \\ {code}"
+    if number % 2:
+        return f"Follow up RFD: {code}"
+    return f"No answer {code.lower()}"
+
+
+def as_list(series):
+    return series.where(series.notna(), None).tolist()
+
+
+if __name__ == "__main__":
+    rows, memory = parse_args(500000)
+    processor = BDOAutoProcessor.__new__(BDOAutoProcessor)
+    rfd_valid_codes = processor.load_reference_data(REFERENCE_DIR)["rfd_codes"]
+    codes = sorted(rfd_valid_codes) + ["NOTACODE"]
+    rng = random.Random(0)
+
+    pool = [remark(number, codes, rng) for number in range(5000)]
+    samples = {
+        "5,000 distinct": pd.Series([rng.choice(pool) for _ in range(rows)]),
+        "all unique": pd.Series([remark(number, codes, rng) for number in range(rows)]),
+    }
+    print(f"{rows} remarks, {len(rfd_valid_codes)} valid RFD codes")
+
+    for label, remarks in samples.items():
+        old = measure(f"{label}: apply", lambda: remarks.apply(old_extract_and_validate_rfd, args=(rfd_valid_codes,)), memory)
+        new = measure(f"{label}: extract_rfd_codes", lambda: processor.extract_rfd_codes(remarks, rfd_valid_codes), memory)
+        check_same(label, as_list(old), as_list(new))
@@ -0,0 +1,128 @@
+"""
+ROB create_excel_file and the clean_only export: the to_excel + restyle path they
+used before utils/xlsx_writer against write_xlsx.
+
+    python benchmarks/bench_xlsx_writer.py [rows] [--memory]
+"""
+import io
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+from openpyxl.styles import Border, Side
+from openpyxl.utils import get_column_letter
+
+from harness import check_same, measure, parse_args
+from processor.base import BaseProcessor
+from processor.rob_bike import ROBBikeProcessor
+from utils.xlsx_writer import ColumnSpec, column_widths, write_xlsx
+
+
+def old_create_excel_file(processor, df):
+    output = io.BytesIO()
+    df, converted_dates = processor.format_date_columns(df, ['Maturity date', 'ENDO DATE'])
+
+    with pd.ExcelWriter(output, engine='openpyxl') as writer:
+        df.to_excel(writer, index=False, sheet_name='Sheet1')
+        worksheet = writer.sheets['Sheet1']
+        thin_border = Border(left=Side(style='thin'), right=Side(style='thin'),
+                             top=Side(style='thin'), bottom=Side(style='thin'))
+
+        account_col_idx = None
+        endo_date_col_idx = None
+        for i, col in enumerate(df.columns):
+            col_letter = get_column_letter(i + 1)
+            if col == 'Account Number':
+                account_col_idx = i + 1
+            elif col == 'ENDO DATE':
+                endo_date_col_idx = i + 1
+
+            if col in ['Account Number', 'ACCT NAME', 'Endrosement DPD', 'ENDO DATE', 'Endrosement OB',
+                       'MONTHLY AMORT', 'Maturity date', 'Contact No.', 'DESCRIP']:
+                max_length = max(len(str(cell.value)) if cell.value is not None else 0
+                                 for cell in worksheet[col_letter])
+                worksheet.column_dimensions[col_letter].width = max_length + 2
+
+            if col == 'Contact No.':
+                for row in range(2, len(df) + 2):
+                    cell = worksheet.cell(row=row, column=i + 1)
+                    cell.number_format = '@'
+                    if cell.value is not None:
+                        cell.value = str(cell.value)
+
+        for row in range(2, len(df) + 2):
+            if account_col_idx:
+                cell = worksheet.cell(row=row, column=account_col_idx)
+                cell.number_format = '@'
+                if cell.value is not None:
+                    cell.value = str(cell.value)
+            if endo_date_col_idx and converted_dates['ENDO DATE'][row - 2]:
+                worksheet.cell(row=row, column=endo_date_col_idx).number_format = '@'
+            for col_idx in range(1, len(df.columns) + 1):
+                worksheet.cell(row=row, column=col_idx).border = thin_border
+
+    output.seek(0)
+    return output.getvalue()
+
+
+def old_clean_export(df, temp_dir):
+    output_path = os.path.join(temp_dir, "CLEANED_DATA.xlsx")
+    with pd.ExcelWriter(output_path, engine='openpyxl') as writer:
+        df.to_excel(writer, index=False, sheet_name='Sheet1')
+        worksheet = writer.sheets['Sheet1']
+        for i, col in enumerate(df.columns):
+            try:
+                max_length = max(df[col].astype(str).map(len).max(), len(str(col))) + 2
+            except:
+                max_length = 15
+            worksheet.column_dimensions[get_column_letter(i + 1)].width = max_length
+    with open(output_path, 'rb') as f:
+        return f.read()
+
+
+def new_clean_export(df):
+    columns = {col: ColumnSpec(width=width) for col, width in zip(df.columns, column_widths(df))}
+    return write_xlsx(df, columns)
+
+
+def endorsement_frame(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    dates = pd.Series(pd.date_range('2020-01-01', periods=rows, freq='h'))
+    return pd.DataFrame({
+        'Account Number': rng.integers(10**9, 10**10, rows),
+        'ACCT NAME': np.where(rng.random(rows) < .1, None, 'NAME ' + pd.Series(rng.integers(0, 10**6, rows)).astype(str)),
+        'Endrosement DPD': rng.integers(0, 200, rows),
+        'ENDO DATE': np.where(rng.random(rows) < .2, 'garbage', dates.dt.strftime('%Y-%m-%d')),
+        'Endrosement OB': np.where(rng.random(rows) < .1, np.nan, rng.random(rows) * 1e5),
+        'MONTHLY AMORT': rng.random(rows) * 1000,
+        'Maturity date': dates.where(rng.random(rows) > .1),
+        'Contact No.': np.where(rng.random(rows) < .1, np.nan, rng.integers(9 * 10**9, 10**10, rows).astype(float)),
+        'DESCRIP': ['x' * (i % 17) for i in range(rows)],
+        'Due Date': dates,
+        'Last Payment': np.where(rng.random(rows) < .3, None, '01/02/2023'),
+        'DATE REFERRED': np.where(rng.random(rows) < .2, '', '2023-05-06'),
+        'PAST DUE': rng.random(rows) * 100,
+        'FLAG': rng.random(rows) < .5,
+    })
+
+
+def cell_values(data):
+    return pd.read_excel(io.BytesIO(data), dtype=str).fillna("").values.tolist()
+
+
+if __name__ == "__main__":
+    rows, memory = parse_args(20000)
+    df = endorsement_frame(rows)
+    processor = ROBBikeProcessor.__new__(ROBBikeProcessor)
+    print(f"{rows} rows, {len(df.columns)} columns")
+
+    old = measure("ROB create_excel_file, to_excel", lambda: old_create_excel_file(processor, df), memory)
+    new = measure("ROB create_excel_file, write_xlsx", lambda: processor.create_excel_file(df), memory)
+    check_same("ROB create_excel_file", cell_values(old), cell_values(new))
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        cleaned = BaseProcessor.__new__(BaseProcessor).clean_data(df)
+        old = measure("clean_only export, to_excel", lambda: old_clean_export(cleaned, temp_dir), memory)
+        new = measure("clean_only export, write_xlsx", lambda: new_clean_export(cleaned), memory)
+        check_same("clean_only export", cell_values(old), cell_values(new))
@@ -0,0 +1,46 @@
+"""
+Shared helpers for the scripts in this directory. Each script compares the code a
+change replaced with what the app runs now, on synthetic data, and prints one line
+per implementation. Run them from the repository root, e.g.
+
+    python benchmarks/bench_xlsx_writer.py 20000 --memory
+
+The first argument is the row count. --memory also records the tracemalloc peak,
+in a separate run so the tracing overhead does not affect the timings.
+"""
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def parse_args(default_rows):
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    rows = int(args[0]) if args else default_rows
+    return rows, "--memory" in sys.argv[1:]
+
+
+def measure(label, fn, memory=False):
+    """Time one call of `fn` and print it, with its tracemalloc peak when `memory` is set."""
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+
+    line = f"{label:<40} {elapsed:9.3f} s"
+    if memory:
+        tracemalloc.start()
+        try:
+            fn()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        line += f"   peak {peak / 2**20:8.1f} MiB"
+    print(line, flush=True)
+    return result
+
+
+def check_same(label, old, new):
+    if old != new:
+        raise SystemExit(f"{label}: the old and new implementations disagree")
@@ -1,25 +1,34 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 import os
 from openpyxl.utils import get_column_letter
 from datetime import datetime, date
 import io
 import tempfile
 import shutil
-import re 
+import re
 
 #Supabase
-from supabase import create_client
+from utils.supabase_client import get_supabase_client
 from dotenv import load_dotenv
 load_dotenv()
 
+from utils.workbook_cache import get_workbook_cache
+from utils.xlsx_writer import ColumnSpec, column_widths, write_xlsx
+
+DATE_FORMATS = (
+    "%m/%d/%Y",
+    "%Y-%m-%d",
+    "%Y-%m-%d %H:%M:%S",
+    "%m/%d/%Y %I:%M:%S %p",
+    "%m/%d/%Y %H:%M:%S",
+)
+
 class BaseProcessor:
     def __init__(self):
         self.temp_dir = tempfile.mkdtemp()
-
-        SUPABASE_URL = os.getenv("SUPABASE_URL")
-        SUPABASE_ANON_KEY = os.getenv("SUPABASE_ANON_KEY")
-        self.supabase = create_client(SUPABASE_URL, SUPABASE_ANON_KEY)
+        self.supabase = get_supabase_client()
         
     def __del__(self):
         try:
@@ -57,6 +66,42 @@ class BaseProcessor:
 
         return mobile_num
 
+    @staticmethod
+    def _as_text(values):
+        """str() of every value with missing ones as "", on Arrow-backed strings when pyarrow is present."""
+        text = values.astype(str).where(values.notna(), "")
+        try:
+            return text.astype("string[pyarrow]")
+        except ImportError:
+            return text.astype("string")
+
+    @staticmethod
+    def _local_mobile(digits):
+        last_10 = digits.str[-10:]
+        to_local = digits.str.len().ge(10) & last_10.str[:1].eq('9')
+        return digits.where(~to_local, '0' + last_10)
+
+    def process_mobile_numbers(self, mobile_nums):
+        """Columnar process_mobile_number: same result per row, computed on the whole Series."""
+        mobile_nums = pd.Series(mobile_nums)
+        raw = self._as_text(mobile_nums)
+        blank = mobile_nums.isna().to_numpy() | raw.str.strip().eq("").to_numpy(dtype=bool)
+
+        digits = raw.str.replace(r'\D', '', regex=True)
+        result = self._local_mobile(digits)
+        return result.where(~blank, "").astype(object)
+
+    def clean_phone_numbers(self, phones):
+        """Columnar clean_phone_number: same result per row, computed on the whole Series."""
+        phones = pd.Series(phones)
+        raw = self._as_text(phones)
+        blank = phones.isna().to_numpy() | raw.str.lower().eq('nan').to_numpy(dtype=bool)
+
+        # Drop everything from the first '/' on, plus any non-digit before it.
+        digits = raw.str.replace(r'/[\s\S]*|\D', '', regex=True)
+        result = self._local_mobile(digits)
+        return result.where(~blank, '').astype(object)
+
     def format_date(self, date_value):
         if pd.isna(date_value) or date_value is None:
             return ""
@@ -69,6 +114,139 @@ class BaseProcessor:
             return date_obj.strftime("%m/%d/%Y")
         except:
             return str(date_value)
+
+    @staticmethod
+    def _parse_date_value(value, formats, infer):
+        if isinstance(value, (datetime, date)):
+            return value
+        if isinstance(value, np.datetime64):
+            return pd.Timestamp(value)
+
+        text = str(value).strip()
+        for date_format in formats:
+            try:
+                return datetime.strptime(text, date_format)
+            except ValueError:
+                continue
+
+        if infer:
+            try:
+                return pd.to_datetime(value)
+            except Exception:
+                return None
+        return None
+
+    def _parse_unique_dates(self, values, formats, infer):
+        values = pd.Series(values)
+        codes, uniques = pd.factorize(values)
+        parsed = [self._parse_date_value(value, formats, infer) for value in uniques]
+        missing = [value is not None and pd.isna(value) for value in parsed]
+        failed = [value is None for value in parsed]
+        return values, codes, uniques, parsed, missing, failed
+
+    def parse_dates(self, values, formats=DATE_FORMATS, errors="raise", infer=True):
+        """
+        Parse a column of mixed date values to datetime64, trying `formats` in order and
+        falling back to pd.to_datetime when `infer` is set. Each distinct value is parsed once.
+        """
+        values = pd.Series(values)
+        if pd.api.types.is_datetime64_any_dtype(values):
+            return values
+
+        values, codes, uniques, parsed, missing, failed = self._parse_unique_dates(values, formats, infer)
+        if errors == "raise" and any(failed):
+            raise ValueError(f"Unable to parse date value: {uniques[failed.index(True)]!r}")
+
+        lookup = []
+        for value, is_missing, is_failed in zip(parsed, missing, failed):
+            if is_missing or is_failed:
+                lookup.append(pd.NaT)
+                continue
+            try:
+                value = pd.Timestamp(value)
+                lookup.append(value.tz_localize(None) if value.tzinfo else value)
+            except (ValueError, OverflowError):
+                lookup.append(pd.NaT)
+        lookup.append(pd.NaT)
+
+        return pd.Series(pd.DatetimeIndex(lookup)[codes], index=values.index)
+
+    def format_dates(self, values, date_format="%m/%d/%Y", formats=DATE_FORMATS,
+                     errors="ignore", infer=True, na_value=""):
+        """
+        Columnar format_date: parse like parse_dates and write every distinct value with
+        `date_format` once. Missing values become `na_value`. Values that cannot be parsed
+        (or parse to NaT, like "nan") are kept as str(value) with errors="ignore", become
+        `na_value` with errors="coerce"; unparseable values raise with errors="raise".
+        """
+        values, codes, uniques, parsed, missing, failed = self._parse_unique_dates(values, formats, infer)
+        if errors == "raise" and any(failed):
+            raise ValueError(f"Unable to parse date value: {uniques[failed.index(True)]!r}")
+
+        lookup = []
+        for raw, value, is_missing, is_failed in zip(uniques, parsed, missing, failed):
+            if is_missing or is_failed:
+                lookup.append(str(raw) if errors == "ignore" else na_value)
+            else:
+                lookup.append(value.strftime(date_format))
+        lookup.append(na_value)
+
+        return pd.Series(np.array(lookup, dtype=object)[codes], index=values.index)
+
+    def format_date_columns(self, df, columns, date_format="%m/%d/%Y"):
+        """
+        Format the given date columns as text ahead of writing. Returns the new frame and,
+        per column, a mask of the cells that were converted; cells that do not parse keep
+        their original value.
+        """
+        df = df.copy()
+        converted = {}
+        for col in columns:
+            if col not in df.columns:
+                continue
+            formatted = self.format_dates(df[col], date_format, errors="coerce", na_value=None)
+            converted[col] = formatted.notna().to_numpy()
+            df[col] = formatted.where(formatted.notna(), df[col])
+        return df, converted
+
+    @staticmethod
+    def _apply_read_dtypes(df, dtype):
+        # Mirror what pd.read_excel(dtype=str) gives for cells that went through Excel:
+        # whole floats come back without the ".0", missing cells stay missing.
+        def as_cell_text(value):
+            if pd.isna(value):
+                return value
+            if isinstance(value, float) and value.is_integer():
+                return str(int(value))
+            return str(value)
+
+        for col, col_type in (dtype or {}).items():
+            if col in df.columns and col_type is str:
+                df[col] = df[col].map(as_cell_text)
+        return df
+
+    def read_excel_sheet(self, file_content, sheet_name=0, **read_kwargs):
+        """
+        Load the sheet to process. Workbook bytes or file objects are read with pd.read_excel
+        through the session workbook cache; an already-loaded DataFrame is used as is, with
+        only the `dtype` option applied, so it never makes a round trip through Excel.
+        """
+        if isinstance(file_content, pd.DataFrame):
+            return self._apply_read_dtypes(file_content.copy(), read_kwargs.get("dtype"))
+        return get_workbook_cache().read_sheet(file_content, sheet_name, **read_kwargs)
+
+    def workbook_bytes(self, file_content, sheet_name=None):
+        """The source workbook as bytes, for steps that need the file itself. A DataFrame is written as one sheet."""
+        if isinstance(file_content, pd.DataFrame):
+            buffer = io.BytesIO()
+            sheet = sheet_name if isinstance(sheet_name, str) else "Sheet1"
+            file_content.to_excel(buffer, index=False, sheet_name=sheet, engine='openpyxl')
+            return buffer.getvalue()
+        if isinstance(file_content, (bytes, bytearray)):
+            return bytes(file_content)
+        file_content.seek(0)
+        return file_content.read()
+
     def clean_data(self, df, remove_duplicates=False, remove_blanks=False, trim_spaces=False):
         if not isinstance(df, pd.DataFrame):
             raise ValueError(f"Expected a pandas DataFrame, but got {type(df)}: {df}")
@@ -89,12 +267,11 @@ class BaseProcessor:
     def clean_only(self, file_content, sheet_name, preview_only=False, 
                    remove_duplicates=False, remove_blanks=False, trim_spaces=False, file_name=None):
         try:
-            if isinstance(file_content, bytes):
-                file_content = io.BytesIO(file_content)
-                
-            xls = pd.ExcelFile(file_content)
-            sheet_names = xls.sheet_names
-            df = pd.read_excel(xls, sheet_name=sheet_names[0])
+            if isinstance(file_content, pd.DataFrame):
+                df = self.read_excel_sheet(file_content)
+            else:
+                sheet_names = get_workbook_cache().sheet_names(file_content)
+                df = self.read_excel_sheet(file_content, sheet_names[0])
 
             cleaned_df = self.clean_data(df, remove_duplicates, remove_blanks, trim_spaces)
 
@@ -107,22 +284,12 @@ class BaseProcessor:
             else:
                 output_filename = "CLEANED_DATA.xlsx"
 
-            output_path = os.path.join(self.temp_dir, output_filename)
-
-            with pd.ExcelWriter(output_path, engine='openpyxl') as writer:
-                cleaned_df.to_excel(writer, index=False, sheet_name='Sheet1')
-                worksheet = writer.sheets['Sheet1']
-                for i, col in enumerate(cleaned_df.columns):
-                    try:
-                        max_len_in_column = cleaned_df[col].astype(str).map(len).max()
-                        max_length = max(max_len_in_column, len(str(col))) + 2
-                    except:
-                        max_length = 15
-                    col_letter = get_column_letter(i + 1)
-                    worksheet.column_dimensions[col_letter].width = max_length
-
-            with open(output_path, 'rb') as f:
-                output_binary = f.read()
+            columns = {
+                col: ColumnSpec(width=width)
+                for col, width in zip(cleaned_df.columns, column_widths(cleaned_df))
+            }
+
+            output_binary = write_xlsx(cleaned_df, columns)
 
             return cleaned_df, output_binary, output_filename
 
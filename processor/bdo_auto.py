@@ -12,6 +12,11 @@ import re
 import zipfile
 from typing import List, Dict, Any, Optional
 from processor.base import BaseProcessor as base
+from utils.reference_data import get_reference_store
+from utils.template_pool import get_template_pool
+from utils.chunked_lookup import ChunkedLookup
+from utils.lookup_cache import get_lookup_cache
+from utils.xlsx_writer import ColumnSpec, apply_column_widths, column_widths, write_xlsx
 from supabase import create_client
 from dotenv import load_dotenv
 load_dotenv()
@@ -19,7 +24,7 @@ load_dotenv()
 
 class BDOAutoProcessor(base):
     def get_previous_history(self, limit: int = 10) -> List[Dict[str, Any]]:
-        try:
+        def load():
             response = (
                 self.supabase
                 .table("bdo_autoloan_inputset")
@@ -36,6 +41,9 @@ class BDOAutoProcessor(base):
                 return response.data
             else:
                 return []
+
+        try:
+            return get_lookup_cache().get("bdo_autoloan_inputset", ("history", limit), load)
                 
         except Exception as e:
             st.write(f"Error retrieving BDO Auto history: {str(e)}")
@@ -54,6 +62,8 @@ class BDOAutoProcessor(base):
                 except:
                     pass
             
+            # One row per report date. There is no unique constraint on report_date to upsert
+            # against, so the existing row is looked up and updated, keeping its created_at.
             existing_response = (
                 self.supabase
                 .table("bdo_autoloan_inputset")
@@ -90,6 +100,7 @@ class BDOAutoProcessor(base):
                     .insert(data_payload)
                     .execute()
                 )
+            get_lookup_cache().invalidate("bdo_autoloan_inputset")
             return True
                 
         except Exception as e:
@@ -110,6 +121,116 @@ class BDOAutoProcessor(base):
             print(f"Error deleting BDO Auto data: {str(e)}")
             return False
 
+    @staticmethod
+    def _build_reference_data(bank_status_path, rfd_list, bucket_paths):
+        reference = {
+            "bank_status": None,
+            "bank_status_error": None,
+            "rfd_codes": None,
+            "rfd_error": None,
+            "buckets": {},
+            "user_index": {},
+        }
+
+        if os.path.exists(bank_status_path):
+            df_bank_status = pd.read_excel(bank_status_path)
+            if "CMS STATUS" not in df_bank_status.columns or "BANK STATUS" not in df_bank_status.columns:
+                reference["bank_status_error"] = "Missing 'CMS STATUS' or 'BANK STATUS' column in BANK_STATUS.xlsx."
+            else:
+                reference["bank_status"] = dict(zip(df_bank_status["CMS STATUS"].astype(str).str.strip(),
+                                                     df_bank_status["BANK STATUS"].astype(str).str.strip()))
+        else:
+            reference["bank_status_error"] = f"Missing file: {bank_status_path}"
+
+        if os.path.exists(rfd_list):
+            df_rfd_list = pd.read_excel(rfd_list)
+            if "RFD CODE" not in df_rfd_list.columns:
+                reference["rfd_error"] = "Missing 'RFD CODE' column in RFD_LISTS.xlsx."
+            else:
+                reference["rfd_codes"] = frozenset(df_rfd_list["RFD CODE"].astype(str).str.upper())
+        else:
+            reference["rfd_error"] = f"Missing file: {rfd_list}"
+
+        # Per bucket: the VOLARE USER -> FULL NAME map, or the message to show when the file is unusable.
+        for bucket_name, bucket_path in bucket_paths.items():
+            if not os.path.exists(bucket_path):
+                reference["buckets"][bucket_name] = {"error": f"Missing file: {bucket_path}"}
+                continue
+
+            df_bucket = pd.read_excel(bucket_path)
+            if "VOLARE USER" not in df_bucket.columns or "FULL NAME" not in df_bucket.columns:
+                reference["buckets"][bucket_name] = {"warning": f"{bucket_name} missing required columns. Skipping."}
+                continue
+
+            users = df_bucket["VOLARE USER"].astype(str).str.strip()
+            full_names = df_bucket["FULL NAME"].astype(str).str.strip()
+            agents = dict(zip(users, full_names))
+            reference["buckets"][bucket_name] = {"agents": agents}
+
+            for user, full_name in agents.items():
+                reference["user_index"].setdefault(user, []).append((bucket_name, full_name))
+
+        return reference
+
+    def load_reference_data(self, base_dir):
+        """
+        Bank status map, valid RFD codes and agent buckets from the database/bdo_auto files,
+        compiled once per process and rebuilt only when one of the files changes.
+        """
+        bucket_paths = {
+            "Bucket 1": os.path.join(base_dir, "BUCKET1_AGENT.xlsx"),
+            "Bucket 2": os.path.join(base_dir, "BUCKET2_AGENT.xlsx"),
+            "Bucket 5&6": os.path.join(base_dir, "BUCKET5&6_AGENT.xlsx")
+        }
+        bank_status_path = os.path.join(base_dir, "BANK_STATUS.xlsx")
+        rfd_list = os.path.join(base_dir, "RFD_LISTS.xlsx")
+
+        return get_reference_store().load(
+            ("bdo_auto", base_dir),
+            [bank_status_path, rfd_list, *bucket_paths.values()],
+            lambda: self._build_reference_data(bank_status_path, rfd_list, bucket_paths)
+        )
+
+    def extract_rfd_codes(self, remarks, rfd_valid_codes):
+        """
+        RFD code of each remark, or NaN when it is not in rfd_valid_codes. Tried in order:
+        the token after a trailing "RFD:", the token after the last backslash, the last word.
+        """
+        remarks = pd.Series(remarks)
+        # Remarks repeat a lot (templated agent notes), so resolve each distinct one once.
+        codes, uniques = pd.factorize(remarks, use_na_sentinel=False)
+        text = pd.Series(uniques, dtype=object).astype(str).str.strip().str.rstrip("\\")
+
+        rfd = text.str.extract(r"RFD:\s*(\S+)$", expand=False).astype(object)
+
+        # Last of the tokens re.findall(r"\\\s*(\S+)") walks through: the repeated group
+        # steps over the same matches from the start and keeps the final capture.
+        pending = rfd.isna() & text.str.contains("\\", regex=False)
+        rfd[pending] = text[pending].str.extract(r"^(?:[^\\]*\\\s*(\S+))*", expand=False)
+
+        pending = rfd.isna()
+        rfd[pending] = text[pending].str.rsplit(n=1).str[-1]
+
+        rfd = rfd.str.upper()
+        rfd = rfd.where(rfd.isin(rfd_valid_codes), np.nan)
+        return pd.Series(rfd.to_numpy()[codes], index=remarks.index)
+
+    @staticmethod
+    def fill_system_officers(officers):
+        """SYSTEM rows take the officer of the nearest earlier non-SYSTEM row (the first row is kept as is)."""
+        values = officers.to_numpy()
+        is_system = officers.eq("SYSTEM").to_numpy()
+        if len(is_system):
+            is_system[0] = False
+        source_rows = np.maximum.accumulate(np.where(is_system, 0, np.arange(len(values))))
+        return pd.Series(values[source_rows], index=officers.index)
+
+    @staticmethod
+    def repeated_complete_ptps(df, ptp_complete_mask):
+        """Index of every complete PTP row except the last one per PN."""
+        ptp_complete_df = df[ptp_complete_mask]
+        return ptp_complete_df.index[ptp_complete_df['PN'].duplicated(keep='last')]
+
     def process_agency_daily_report(self, file_content, sheet_name=None, preview_only=False,
         remove_duplicates=False, remove_blanks=False, trim_spaces=False, report_date=None,
         kept_count_b5=None, kept_bal_b5=None, alloc_bal_b5=None,
@@ -131,12 +252,11 @@ class BDOAutoProcessor(base):
                 st.error(f"Template file not found: {daily_productivity_template}")
                 return None, None, None
                 
+            template_pool = get_template_pool()
+            
             try:
-                with open(daily_report_template, 'rb') as template_file:
-                    template_copy = io.BytesIO(template_file.read())
                 try:
-                    test_wb = load_workbook(template_copy)
-                    test_wb.close()
+                    template_pool.validate(daily_report_template)
                 except zipfile.BadZipFile:
                     st.error(f"Template file is not a valid Excel file: {daily_report_template}")
                     return None, None, None
@@ -145,11 +265,8 @@ class BDOAutoProcessor(base):
                 return None, None, None
                 
             try:
-                with open(daily_productivity_template, 'rb') as template_file:
-                    template_copy = io.BytesIO(template_file.read())
                 try:
-                    test_wb = load_workbook(template_copy)
-                    test_wb.close()
+                    template_pool.validate(daily_productivity_template)
                 except zipfile.BadZipFile:
                     st.error(f"Template file is not a valid Excel file: {daily_productivity_template}")
                     return None, None, None
@@ -158,15 +275,7 @@ class BDOAutoProcessor(base):
                 return None, None, None
             
             BASE_DIR = os.path.join(DIR, "database", "bdo_auto")
-            
-            bucket_paths = {
-                "Bucket 1": os.path.join(BASE_DIR, "BUCKET1_AGENT.xlsx"),
-                "Bucket 2": os.path.join(BASE_DIR, "BUCKET2_AGENT.xlsx"),
-                "Bucket 5&6": os.path.join(BASE_DIR, "BUCKET5&6_AGENT.xlsx")
-            }
-        
-            bank_status_path = os.path.join(BASE_DIR, "BANK_STATUS.xlsx")
-            rfd_list = os.path.join(BASE_DIR, "RFD_LISTS.xlsx")
+            reference = self.load_reference_data(BASE_DIR)
             
             required_columns = [
                 "Date", "Debtor", "Account No.", "Card No.", "Remark", "Remark By",
@@ -174,32 +283,17 @@ class BDOAutoProcessor(base):
                 "Balance", "Status"
             ]
             
-            bank_status_lookup = {}
-            if os.path.exists(bank_status_path):
-                df_bank_status = pd.read_excel(bank_status_path)
-                if "CMS STATUS" not in df_bank_status.columns or "BANK STATUS" not in df_bank_status.columns:
-                    st.error("Missing 'CMS STATUS' or 'BANK STATUS' column in BANK_STATUS.xlsx.")
-                    return None, None, None
-                bank_status_lookup = dict(zip(df_bank_status["CMS STATUS"].astype(str).str.strip(), 
-                                            df_bank_status["BANK STATUS"].astype(str).str.strip()))
-            else:
-                st.error(f"Missing file: {bank_status_path}")
+            bank_status_lookup = reference["bank_status"]
+            if bank_status_lookup is None:
+                st.error(reference["bank_status_error"])
                 return None, None, None
                 
-            rfd_valid_codes = set()
-            if os.path.exists(rfd_list):
-                df_rfd_list = pd.read_excel(rfd_list)
-                if "RFD CODE" not in df_rfd_list.columns:
-                    st.error("Missing 'RFD CODE' column in RFD_LISTS.xlsx.")
-                    return None, None, None
-                rfd_valid_codes = set(df_rfd_list["RFD CODE"].astype(str).str.upper())
-            else:
-                st.error(f"Missing file: {rfd_list}")
+            rfd_valid_codes = reference["rfd_codes"]
+            if rfd_valid_codes is None:
+                st.error(reference["rfd_error"])
                 return None, None, None
                 
-            byte_stream = io.BytesIO(file_content)
-            xls = pd.ExcelFile(byte_stream)
-            df_main = pd.read_excel(xls, sheet_name=sheet_name, dtype={"Account No.": str})
+            df_main = self.read_excel_sheet(file_content, sheet_name, dtype={"Account No.": str})
             
             df_main = self.clean_data(df_main, remove_duplicates, remove_blanks, trim_spaces)
             
@@ -222,63 +316,48 @@ class BDOAutoProcessor(base):
             
             df_main = df_main[~df_main["Card No."].isin([f"ch{i}" for i in range(1, 20)])]
             
+            # Shared users only count towards a bucket when the card is one of the bucket's products.
+            shared_users = ["SYSTEM", "LCMANZANO", "ACALVAREZ", "DSDEGUZMAN", "SRELIOT", "TANAZAIRE", "SPMADRID"]
+            bucket_card_prefixes = {
+                "Bucket 1": ["01"],
+                "Bucket 2": ["02"],
+                "Bucket 5&6": ["05", "06"]
+            }
+            
+            # Everything the buckets have in common is worked out once over df_main:
+            # dates, bank status, card prefix, and which buckets each Remark By user is in.
+            classified_df = df_main.copy()
+            for col in ["PTP Date", "Claim Paid Date", "Date"]:
+                classified_df[col] = self.parse_dates(classified_df[col], errors='coerce')
+            bank_status = classified_df["Status"].astype(str).str.strip().map(bank_status_lookup)
+            card_prefix = classified_df["Card No."].astype(str).str[:2]
+            is_shared_user = classified_df["Remark By"].isin(shared_users).to_numpy()
+            
+            user_codes, users = pd.factorize(classified_df["Remark By"])
+            user_buckets = [dict(reference["user_index"].get(user, [])) for user in users]
+            
             bucket_dfs = {}
-            for bucket_name, bucket_path in bucket_paths.items():
-                if os.path.exists(bucket_path):
-                    df_bucket = pd.read_excel(bucket_path)
-                    if "VOLARE USER" not in df_bucket.columns or "FULL NAME" not in df_bucket.columns:
-                        st.warning(f"{bucket_name} missing required columns. Skipping.")
-                        continue
-                        
-                    df_bucket["VOLARE USER"] = df_bucket["VOLARE USER"].astype(str).str.strip()
-                    df_bucket["FULL NAME"] = df_bucket["FULL NAME"].astype(str).str.strip()
-                    lookup_dict = dict(zip(df_bucket["VOLARE USER"], df_bucket["FULL NAME"]))
-                    
-                    matched_df = df_main[df_main["Remark By"].isin(df_bucket["VOLARE USER"])].copy()
-                    matched_df["HANDLING OFFICER2"] = matched_df["Remark By"].map(lookup_dict)
-                    
-                    if bucket_name == "Bucket 1":
-                        matched_df = matched_df[
-                            (matched_df["Remark By"].isin(["SYSTEM", "LCMANZANO", "ACALVAREZ", "DSDEGUZMAN", "SRELIOT", "TANAZAIRE", "SPMADRID"]) &
-                            matched_df["Card No."].astype(str).str.startswith("01")) |
-                            (~matched_df["Remark By"].isin(["SYSTEM", "LCMANZANO", "ACALVAREZ", "DSDEGUZMAN", "SRELIOT", "TANAZAIRE", "SPMADRID"]))
-                        ]
-                    elif bucket_name == "Bucket 2":
-                        matched_df = matched_df[
-                            (matched_df["Remark By"].isin(["SYSTEM", "LCMANZANO", "ACALVAREZ", "DSDEGUZMAN", "SRELIOT", "TANAZAIRE", "SPMADRID"]) &
-                            matched_df["Card No."].astype(str).str.startswith("02")) |
-                            (~matched_df["Remark By"].isin(["SYSTEM", "LCMANZANO", "ACALVAREZ", "DSDEGUZMAN", "SRELIOT", "TANAZAIRE", "SPMADRID"]))
-                        ]
-                    elif bucket_name == "Bucket 5&6":
-                        matched_df = matched_df[
-                            (matched_df["Remark By"].isin(["SYSTEM", "LCMANZANO", "ACALVAREZ", "DSDEGUZMAN", "SRELIOT", "TANAZAIRE", "SPMADRID"]) &
-                            matched_df["Card No."].astype(str).str.startswith(("05", "06"))) |
-                            (~matched_df["Remark By"].isin(["SYSTEM", "LCMANZANO", "ACALVAREZ", "DSDEGUZMAN", "SRELIOT", "TANAZAIRE", "SPMADRID"]))
-                        ]
+            for bucket_name, bucket in reference["buckets"].items():
+                if "warning" in bucket:
+                    st.warning(bucket["warning"])
+                    continue
+                if "agents" in bucket:
+                    full_names = np.array([buckets.get(bucket_name) for buckets in user_buckets] + [None], dtype=object)
+                    handling_officers = full_names[user_codes]
                     
-                    for col in ["PTP Date", "Claim Paid Date", "Date"]:
-                        matched_df[col] = pd.to_datetime(matched_df[col], errors='coerce')
+                    in_bucket = pd.notna(handling_officers)
+                    if bucket_name in bucket_card_prefixes:
+                        in_bucket &= ~is_shared_user | card_prefix.isin(bucket_card_prefixes[bucket_name]).to_numpy()
                     
-                    matched_df["BANK STATUS"] = matched_df["Status"].astype(str).str.strip().map(bank_status_lookup)
+                    matched_df = classified_df[in_bucket].assign(**{
+                        "HANDLING OFFICER2": handling_officers[in_bucket],
+                        "BANK STATUS": bank_status[in_bucket]
+                    })
                     
                     if not matched_df.empty:
                         bucket_dfs[bucket_name] = matched_df
                 else:
-                    st.error(f"Missing file: {bucket_path}")
-            
-            def extract_and_validate_rfd(remark):
-                remark = str(remark).strip().rstrip("\\")
-                rfd_match = re.search(r"RFD:\s*(\S+)$", remark)
-                if rfd_match:
-                    rfd = rfd_match.group(1).upper()
-                else:
-                    last_word = re.findall(r"\\\s*(\S+)", remark)
-                    if last_word:
-                        rfd = last_word[-1].upper()
-                    else:
-                        last_word = remark.split()[-1] if remark else np.nan
-                        rfd = last_word.upper() if last_word else np.nan
-                return rfd if rfd in rfd_valid_codes else np.nan
+                    st.error(bucket["error"])
             
             def autofit_worksheet_columns(ws):
                 for col in ws.columns:
@@ -293,13 +372,6 @@ class BDOAutoProcessor(base):
                     adjusted_width = max_length + 2
                     ws.column_dimensions[col_letter].width = adjusted_width
             
-            def get_merged_cell_top_left(ws, cell_ref):
-                """Find the top-left cell of a merged range containing the given cell_ref."""
-                for merged_range in ws.merged_cells.ranges:
-                    if cell_ref in merged_range:
-                        return merged_range.min_row, merged_range.min_col
-                return None, None  
-            
             processed_dfs = {}
             for bucket_name, bucket_df in bucket_dfs.items():
                 filtered_df = pd.DataFrame({
@@ -310,25 +382,23 @@ class BDOAutoProcessor(base):
                     "HANDLING OFFICER2": bucket_df["HANDLING OFFICER2"].str.upper(),
                     "AGENCY3": "SP MADRID",
                     "STATUS4": bucket_df["BANK STATUS"],
-                    "DATE OF CALL": bucket_df["Date"].dt.strftime("%m/%d/%Y"),
+                    "DATE OF CALL": self.format_dates(bucket_df["Date"], na_value=np.nan),
                     "PTP DATE": np.where(
                         bucket_df["PTP Date"].isna(),
-                        np.where(bucket_df["Claim Paid Date"].isna(), np.nan, bucket_df["Claim Paid Date"].dt.strftime("%m/%d/%Y")),
-                        bucket_df["PTP Date"].dt.strftime("%m/%d/%Y")
+                        np.where(bucket_df["Claim Paid Date"].isna(), np.nan, self.format_dates(bucket_df["Claim Paid Date"], na_value=np.nan)),
+                        self.format_dates(bucket_df["PTP Date"], na_value=np.nan)
                     ),
                     "PTP AMOUNT": np.where(
                         bucket_df["PTP Amount"].isna() | (bucket_df["PTP Amount"] == 0),
                         np.where(bucket_df["Claim Paid Amount"].isna() | (bucket_df["Claim Paid Amount"] == 0), np.nan, bucket_df["Claim Paid Amount"]),
                         bucket_df["PTP Amount"]
                     ),
-                    "RFD5": bucket_df["Remark"].apply(extract_and_validate_rfd)
+                    "RFD5": self.extract_rfd_codes(bucket_df["Remark"], rfd_valid_codes)
                 })
                 
                 filtered_df.reset_index(drop=True, inplace=True)
                 
-                for i in range(1, len(filtered_df)):
-                    if filtered_df.loc[i, "HANDLING OFFICER2"] == "SYSTEM":
-                        filtered_df.loc[i, "HANDLING OFFICER2"] = filtered_df.loc[i-1, "HANDLING OFFICER2"]
+                filtered_df["HANDLING OFFICER2"] = self.fill_system_officers(filtered_df["HANDLING OFFICER2"])
                 
                 filtered_df.loc[filtered_df["RFD5"].isna() & (filtered_df["STATUS4"] == "PTP"), "RFD5"] = "BUSY"
                 filtered_df.loc[filtered_df["RFD5"].isna() & (filtered_df["STATUS4"] == "CALL NO PTP"), "RFD5"] = "NISV"
@@ -351,13 +421,7 @@ class BDOAutoProcessor(base):
                     (filtered_df["PTP DATE"].notna())
 
                 if ptp_complete_mask.any():
-                    ptp_complete_df = filtered_df[ptp_complete_mask].copy()
-
-                    indices_to_drop = []
-                    for pn in ptp_complete_df['PN'].unique():
-                        pn_indices = ptp_complete_df[ptp_complete_df['PN'] == pn].index.tolist()
-                        if len(pn_indices) > 1:
-                            indices_to_drop.extend(pn_indices[:-1])
+                    indices_to_drop = self.repeated_complete_ptps(filtered_df, ptp_complete_mask)
 
                     filtered_df = filtered_df.drop(indices_to_drop).reset_index(drop=True)
                 
@@ -395,10 +459,8 @@ class BDOAutoProcessor(base):
                 b5_prod_df = None
                 b6_prod_df = None
                 
-                template_wb = load_workbook(daily_report_template)
-                
                 if not bucket5_df.empty:
-                    wb5 = load_workbook(daily_report_template)
+                    wb5 = template_pool.clone(daily_report_template)
                     ws5 = wb5.active
                     
                     headers = bucket5_df.columns.tolist()
@@ -409,7 +471,7 @@ class BDOAutoProcessor(base):
                         for c_idx, value in enumerate(row, 1):
                             ws5.cell(row=r_idx, column=c_idx, value=value)
                     
-                    autofit_worksheet_columns(ws5)
+                    apply_column_widths(ws5, column_widths(bucket5_df, skip_falsy=True))
                     
                     output_b5 = io.BytesIO()
                     wb5.save(output_b5)
@@ -417,10 +479,10 @@ class BDOAutoProcessor(base):
                     b5_binary = output_b5
                     output_files["B5"] = b5_binary.getvalue()
                     
-                    wb5_prod = load_workbook(daily_productivity_template)
+                    wb5_prod = template_pool.clone(daily_productivity_template)
                     ws5_prod = wb5_prod.active
                     
-                    row, col = get_merged_cell_top_left(ws5_prod, 'C2')
+                    row, col = template_pool.merged_top_left(daily_productivity_template, ws5_prod.title, 'C2')
                     if row and col:
                         ws5_prod.cell(row=row, column=col, value=current_date_formatted)
                     else:
@@ -455,7 +517,7 @@ class BDOAutoProcessor(base):
                     productivity_files["B5"] = output_b5_prod.getvalue()
                     
                 if not bucket6_df.empty:
-                    wb6 = load_workbook(daily_report_template)
+                    wb6 = template_pool.clone(daily_report_template)
                     ws6 = wb6.active
                     
                     headers = bucket6_df.columns.tolist()
@@ -466,7 +528,7 @@ class BDOAutoProcessor(base):
                         for c_idx, value in enumerate(row, 1):
                             ws6.cell(row=r_idx, column=c_idx, value=value)
                     
-                    autofit_worksheet_columns(ws6)
+                    apply_column_widths(ws6, column_widths(bucket6_df, skip_falsy=True))
                     
                     output_b6 = io.BytesIO()
                     wb6.save(output_b6)
@@ -474,10 +536,10 @@ class BDOAutoProcessor(base):
                     b6_binary = output_b6
                     output_files["B6"] = b6_binary.getvalue()
                     
-                    wb6_prod = load_workbook(daily_productivity_template)
+                    wb6_prod = template_pool.clone(daily_productivity_template)
                     ws6_prod = wb6_prod.active
                     
-                    row, col = get_merged_cell_top_left(ws6_prod, 'C2')
+                    row, col = template_pool.merged_top_left(daily_productivity_template, ws6_prod.title, 'C2')
                     if row and col:
                         ws6_prod.cell(row=row, column=col, value=current_date_formatted)
                     else:
@@ -511,7 +573,7 @@ class BDOAutoProcessor(base):
                     output_b6_prod.seek(0)
                     productivity_files["B6"] = output_b6_prod.getvalue()
                                         
-                    vs_report_wb = load_workbook(vs_report_template)
+                    vs_report_wb = template_pool.clone(vs_report_template)
                     vs_report_ws = vs_report_wb.active
 
                     data = list(vs_report_ws.values)
@@ -592,14 +654,9 @@ class BDOAutoProcessor(base):
         TABLE_NAME = 'bdo_autoloan_dataset'
         all_account_numbers = []
         try:
-            if isinstance(file_content, bytes):
-                file_content = io.BytesIO(file_content)
-
-            xls = pd.ExcelFile(file_content)
-
-            df = pd.read_excel(
-                xls,
-                sheet_name=sheet_name,
+            df = self.read_excel_sheet(
+                file_content,
+                sheet_name,
                 dtype={'PN': str, 'MOBILE NUMBER' : str}
             )
             df = df.replace('', pd.NA)
@@ -649,7 +706,7 @@ class BDOAutoProcessor(base):
                     bcrm_endo_df['Customer Name'] = df['COMPLETE_NAME']
                 
                 if 'MOBILE NUMBER' in df.columns:
-                    bcrm_endo_df['Mobile'] = df['MOBILE NUMBER'].apply(self.process_mobile_number)
+                    bcrm_endo_df['Mobile'] = self.process_mobile_numbers(df['MOBILE NUMBER'])
 
                 if 'ADDRESS' in df.columns:
                     bcrm_endo_df['Home address'] = df['ADDRESS']
@@ -697,11 +754,11 @@ class BDOAutoProcessor(base):
                 if 'MO_Amort' in df.columns:
                     cms_endo_df['Monthly Amortization'] = df['MO_Amort']
                 if 'LAST_DATE' in df.columns:
-                    cms_endo_df['Last Payment'] = pd.to_datetime(df['LAST_DATE']).dt.strftime('%m/%d/%Y')
+                    cms_endo_df['Last Payment'] = self.format_dates(df['LAST_DATE'], errors='raise', na_value=np.nan)
                 if 'Due Date' in df.columns:
-                    cms_endo_df['Due Date'] = pd.to_datetime(df['Due Date']).dt.strftime('%m/%d/%Y')
+                    cms_endo_df['Due Date'] = self.format_dates(df['Due Date'], errors='raise', na_value=np.nan)
                 if 'MOBILE NUMBER' in df.columns:
-                    cms_endo_df['Contact Number'] = df['MOBILE NUMBER'].apply(self.process_mobile_number)
+                    cms_endo_df['Contact Number'] = self.process_mobile_numbers(df['MOBILE NUMBER'])
                 if 'Email Address' in df.columns:
                     cms_endo_df['EMAIL'] = df['Email Address']
                 if 'Model' in df.columns:
@@ -711,21 +768,14 @@ class BDOAutoProcessor(base):
 
                 unique_account_numbers = list(dict.fromkeys(all_account_numbers))  
                 if unique_account_numbers:
-                    batch_size_for_query = 20
                     chcode_map = {}
+                    account_ids = [id for id in unique_account_numbers if id is not None and id != '']
                     
-                    for i in range(0, len(unique_account_numbers), batch_size_for_query):
-                        batch_ids = unique_account_numbers[i:i+batch_size_for_query]
-                        batch_ids = [id for id in batch_ids if id is not None and id != '']
-                        
-                        if batch_ids:
-                            try:
-                                batch_response = self.supabase.table(TABLE_NAME).select("account_number, chcode").in_("account_number", batch_ids).execute()
-                                if hasattr(batch_response, 'data') and batch_response.data:
-                                    for record in batch_response.data:
-                                        chcode_map[str(record['account_number']).strip()] = str(record['chcode']).strip()
-                            except Exception as e:
-                                st.warning(f"Error fetching Ch Code batch {i}: {str(e)}. Continuing...")
+                    lookup = ChunkedLookup(self.supabase, TABLE_NAME, columns="account_number, chcode", chunk_size=20)
+                    for record in lookup.fetch("account_number", account_ids):
+                        chcode_map[str(record['account_number']).strip()] = str(record['chcode']).strip()
+                    for start, error in lookup.errors:
+                        st.warning(f"Error fetching Ch Code batch {start}: {str(error)}. Continuing...")
                     
                     cms_endo_df['Ch Code'] = cms_endo_df['Account Number'].apply(lambda x: chcode_map.get(str(x).strip(), ""))
 
@@ -746,36 +796,12 @@ class BDOAutoProcessor(base):
             return None, None, None
 
     def create_excel_in_memory(self, df):
-        output = io.BytesIO()
-        
-        with pd.ExcelWriter(output, engine='openpyxl') as writer:
-            df.to_excel(writer, index=False, sheet_name='Sheet1')
-
-            workbook = writer.book
-            worksheet = writer.sheets['Sheet1']
-            final_columns = df.columns
-
-            thin_border = Border(
-                left=Side(style='thin'),
-                right=Side(style='thin'),
-                top=Side(style='thin'),
-                bottom=Side(style='thin')
-            )
-
-            for i, col in enumerate(final_columns):
-                if col in ['Due Date', 'Last Payment', 'ENDO DATE']:
-                    col_letter = get_column_letter(i + 1)
-
-                    for row in range(2, len(df) + 2):
-                        cell = worksheet[f"{col_letter}{row}"]
-                        if cell.value is not None:
-                            try:
-                                date_value = pd.to_datetime(cell.value).strftime("%m/%d/%Y")
-                                cell.value = date_value
-                                cell.number_format = '@'
-                            except:
-                                pass
-
-        output.seek(0)
-        return output.getvalue()
+        date_columns = ['Due Date', 'Last Payment', 'ENDO DATE']
+        df, converted_dates = self.format_date_columns(df, date_columns)
+
+        columns = {
+            col: ColumnSpec(number_format='@', format_rows=converted)
+            for col, converted in converted_dates.items()
+        }
+        return write_xlsx(df, columns)
 
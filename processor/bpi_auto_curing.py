@@ -1,18 +1,21 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 import os
 import openpyxl
 from openpyxl.utils import get_column_letter
 from datetime import datetime, date, time
 import io
-import tempfile
-import shutil
 from processor.base import BaseProcessor
+from utils.xlsx_writer import ColumnSpec, apply_column_widths, column_widths, write_xlsx
+
+# Where process_cured_list keeps a copy of each cured list and its outputs; unset keeps nothing on disk.
+CURED_LIST_ARCHIVE_DIR = os.getenv("CURED_LIST_ARCHIVE_DIR")
 
 class BPIAutoCuringProcessor(BaseProcessor):
     
-    def setup_directories(self, automation_type):
-        """Create necessary directories based on automation type"""
+    def setup_directories(self, automation_type, base_dir=None):
+        """Create necessary directories based on automation type, under the temp dir unless `base_dir` is given"""
         directories = {
             'updates': ["FOR_UPDATES", "BPI_FOR_UPDATES"],
             'uploads': ["FOR_UPLOADS", "BPI_FOR_UPLOADS"],
@@ -23,7 +26,7 @@ class BPIAutoCuringProcessor(BaseProcessor):
         created_dirs = {}
         
         for dir_name in dirs_to_create:
-            dir_path = os.path.join(self.temp_dir, dir_name)
+            dir_path = os.path.join(base_dir or self.temp_dir, dir_name)
             os.makedirs(dir_path, exist_ok=True)
             created_dirs[dir_name] = dir_path
             
@@ -33,12 +36,7 @@ class BPIAutoCuringProcessor(BaseProcessor):
     def process_updates_or_uploads(self, file_content, sheet_name, automation_type, preview_only=False,
                                    remove_duplicates=False, remove_blanks=False, trim_spaces=False):
         try:
-            original_file_content = file_content
-            
-            if isinstance(file_content, bytes):
-                file_content = io.BytesIO(file_content)
-            xls = pd.ExcelFile(file_content)
-            df = pd.read_excel(xls, sheet_name=sheet_name)
+            df = self.read_excel_sheet(file_content, sheet_name)
             
             required_columns = [
                 'LAN', 'NAME', 'CTL4', 'PAST DUE', 'PAYOFF AMOUNT', 
@@ -73,11 +71,7 @@ class BPIAutoCuringProcessor(BaseProcessor):
             
             input_path = os.path.join(dirs[input_folder_key], input_filename)
             with open(input_path, 'wb') as f:
-                if isinstance(original_file_content, bytes):
-                    f.write(original_file_content)
-                else:
-                    original_file_content.seek(0)
-                    f.write(original_file_content.read())
+                f.write(self.workbook_bytes(file_content, sheet_name))
                 
             column_map = {
                 'EMAIL': 'EMAIL_ALS',
@@ -98,9 +92,9 @@ class BPIAutoCuringProcessor(BaseProcessor):
             for orig_col, new_col in column_map.items():
                 if orig_col in df.columns:
                     if orig_col == 'CONTACT NUMBER 1' or orig_col == 'CONTACT NUMBER 2':
-                        result_df[new_col] = df[orig_col].apply(lambda x: "" if pd.isna(x) else self.process_mobile_number(x))
+                        result_df[new_col] = self.process_mobile_numbers(df[orig_col])
                     elif orig_col == 'ENDO DATE':
-                        result_df[new_col] = df[orig_col].apply(lambda x: self.format_date(x) if pd.notnull(x) else "")
+                        result_df[new_col] = self.format_dates(df[orig_col])
                     else:
                         result_df[new_col] = df[orig_col].fillna("")
                 else:
@@ -137,40 +131,19 @@ class BPIAutoCuringProcessor(BaseProcessor):
         """
         Create an Excel file in memory with proper formatting
         """
-        output = io.BytesIO()
-        
-        with pd.ExcelWriter(output, engine='openpyxl') as writer:
-            df.to_excel(writer, index=False, sheet_name='Sheet1')
-            
-            worksheet = writer.sheets['Sheet1']
-            final_columns = columns if columns is not None else df.columns
-            
-            for i, col in enumerate(final_columns):
-                max_length = max(
-                    df[col].astype(str).map(len).max() if len(df) > 0 else 0,
-                    len(col)
-                ) + 2
-                col_letter = chr(65 + i) 
-                worksheet.column_dimensions[col_letter].width = max_length
-                
-                if numeric_cols and col in numeric_cols:
-                    for row in range(2, len(df) + 2):
-                        cell = worksheet[f"{col_letter}{row}"]
-                        cell.number_format = '0.00'
-                
-                if col == 'DATE REFERRED':
-                    for row in range(2, len(df) + 2):
-                        cell = worksheet[f"{col_letter}{row}"]
-                        value = cell.value
-                        if value:
-                            try: 
-                                cell.value = pd.to_datetime(value).strftime("%m/%d/%Y")
-                                cell.number_format = '@'
-                            except:
-                                pass
-        
-        output.seek(0)
-        return output.getvalue()
+        df, converted_dates = self.format_date_columns(df, ['DATE REFERRED'])
+        final_columns = columns if columns is not None else df.columns
+
+        specs = {}
+        for col, max_length in zip(final_columns, column_widths(df[list(final_columns)])):
+            if numeric_cols and col in numeric_cols:
+                specs[col] = ColumnSpec(number_format='0.00', width=max_length)
+            elif col in converted_dates:
+                specs[col] = ColumnSpec(number_format='@', format_rows=converted_dates[col], width=max_length)
+            else:
+                specs[col] = ColumnSpec(width=max_length)
+
+        return write_xlsx(df, specs)
 
     def process_updates(self, file_content, sheet_name=None, preview_only=False,
                         remove_duplicates=False, remove_blanks=False, trim_spaces=False):
@@ -182,410 +155,230 @@ class BPIAutoCuringProcessor(BaseProcessor):
         return self.process_updates_or_uploads(file_content, sheet_name, 'uploads', preview_only,
                                                remove_duplicates, remove_blanks, trim_spaces)
     
-    def process_cured_list(self, file_content, sheet_name=None, preview_only=False,
-                           remove_duplicates=False, remove_blanks=False, trim_spaces=False):
-        def is_file_locked(file_path):
-            try:
-                with open(file_path, 'rb+'):
-                    return False
-            except (PermissionError, OSError):
-                return True
+    def build_cured_remarks(self, source):
+        """
+        Rows of the cured list Remarks sheet. `source` holds the cured list's cell values
+        from row 2 on, with columns numbered like the sheet (1-4, 8, 42 and 43 are used).
+        Non-SPMADRID accounts without a PTP get three rows (PTP NEW, PTP FF, PAYMENT), the
+        ones with a PTP get two (PTP FF, PAYMENT) and SPMADRID accounts get two
+        (CURED_GHOST, PAYMENT), block by block.
+        Unused columns are None; cells that stay empty in the sheet are "".
+        """
+        ptp_new, ptp_ff, cured = "PTP NEW - CALL OUTS_PASTDUE", "PTP FF UP - CLIENT ANSWERED AND WILL SETTLE", "PAYMENT - CURED"
 
-        def try_process(temp_path):
-            xls = pd.ExcelFile(temp_path)
-            df = pd.read_excel(xls, sheet_name=sheet_name)
-            return self.clean_data(df, remove_duplicates, remove_blanks, trim_spaces)
+        is_spmadrid = (source[2] == "SPMADRID").to_numpy(dtype=bool)
+        has_ptp = (source[8].notna() & source[8].map(str).str.contains("PTP", regex=False)).to_numpy(dtype=bool)
+        nego = ~is_spmadrid & ~has_ptp
+        ptp = ~is_spmadrid & has_ptp
+        blocks = [
+            (nego, ptp_new), (nego, ptp_ff), (nego, cured),
+            (ptp, ptp_ff), (ptp, cured),
+            (is_spmadrid, "PTP NEW - CURED_GHOST"), (is_spmadrid, cured),
+        ]
+        barcodes = source[1].to_numpy(dtype=object)
+        lan = np.concatenate([barcodes[mask] for mask, _ in blocks])
+        counts = [int(mask.sum()) for mask, _ in blocks]
+        labels = [label for _, label in blocks]
 
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.xlsx') as temp_input:
-            temp_input.write(file_content)
-            temp_input_path = temp_input.name
+        def per_block(values, dtype=object):
+            return np.repeat(np.array(values, dtype=dtype), counts)
 
-        try:
-            if is_file_locked(temp_input_path):
-                print("File is currently in use. Attempting to retry...")
-                time.sleep(0.5)
-                try:
-                    os.remove(temp_input_path)
-                    print("Removed locked temp file. Retrying...")
-                except Exception as e:
-                    print(f"Could not remove locked file: {e}")
-                    raise
+        status = per_block(labels)
+        is_new = per_block(["PTP NEW" in label for label in labels], bool)
+        is_ff = per_block(["PTP FF" in label for label in labels], bool)
+        is_payment = per_block(["PAYMENT" in label for label in labels], bool)
+        time_of_day = per_block([
+            pd.Timedelta(hours=14, minutes=40) if "PTP NEW" in label
+            else pd.Timedelta(hours=14, minutes=50) if "PTP FF" in label
+            else pd.Timedelta(hours=15) if "CURED" in label
+            else pd.Timedelta(0)
+            for label in labels
+        ], "timedelta64[ns]")
 
-                with tempfile.NamedTemporaryFile(delete=False, suffix='.xlsx') as temp_input_retry:
-                    temp_input_retry.write(file_content)
-                    temp_input_path = temp_input_retry.name
+        # One entry per LAN, the last row winning, plus a trailing entry for LANs not found.
+        keyed = source.loc[source[1].map(bool).to_numpy(dtype=bool)].drop_duplicates(subset=1, keep="last")
+        position = pd.Index(keyed[1]).get_indexer(lan)
+        cured_date_formats = ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d")
+        dates = keyed[3].tolist()
 
-            df = try_process(temp_input_path)
+        def lookup(values, missing):
+            return np.array(list(values) + [missing], dtype=object)[position]
 
-            if preview_only:
-                return df
-                
-            current_date = datetime.now().strftime('%m%d%Y')
-            dirs = self.setup_directories('cured_list')
-            
-            input_file = os.path.join(dirs["CURED_LIST"], f"CURED LIST {current_date}.xlsx")
-            shutil.copy(temp_input_path, input_file)
-            
-            remarks_filename = f"BPI AUTOCURING REMARKS {current_date}.xlsx"
-            others_filename = f"BPI AUTOCURING RESHUFFLE {current_date}.xlsx"
-            payments_filename = f"BPI AUTOCURING PAYMENT {current_date}.xlsx"
-            
-            remarks_path = os.path.join(dirs["BPI_FOR_REMARKS"], remarks_filename)
-            others_path = os.path.join(dirs["BPI_FOR_OTHERS"], others_filename)
-            payments_path = os.path.join(dirs["BPI_FOR_PAYMENTS"], payments_filename)
-            
-            try:
-                source_wb = openpyxl.load_workbook(input_file)
-            except FileNotFoundError:
-                print(f"Error: The file '{input_file}' was not found.")
-                return
-            
-            dest_wb = openpyxl.Workbook()
-            dest_ws = dest_wb.active
-            
-            headers = ["LAN", "Action Status", "Remark Date", "PTP Date", "Reason For Default", 
-                    "Field Visit Date", "Remark", "Next Call Date", "PTP Amount", "Claim Paid Amount", 
-                    "Remark By", "Phone No.", "Relation", "Claim Paid Date"]
-            
-            for col, header in enumerate(headers, 1):
-                dest_ws.cell(row=1, column=col).value = header
-            
-            ws = source_wb.active
-            if ws.max_column < 43:
-                raise ValueError("File doesn't have the expected number of columns")
-            
-            current_row = 2
-            total_rows = 0
-            last_row = ws.max_row
-            
-            barcode_lookup = {}
-            for row in range(2, last_row + 1):
-                barcode = ws.cell(row=row, column=1).value
-                phone1 = ws.cell(row=row, column=42).value
-                phone2 = ws.cell(row=row, column=43).value
-                phone1 = str(phone1).strip() if phone1 else ""
-                phone2 = str(phone2).strip() if phone2 else ""
-                if phone1:
-                    phone1 = self.process_mobile_number(phone1)
-                if phone2:
-                    phone2 = self.process_mobile_number(phone2)
-                if barcode:
-                    barcode_lookup[barcode] = {
-                        'date': ws.cell(row=row, column=3).value,
-                        'amount': ws.cell(row=row, column=4).value,
-                        'collector': ws.cell(row=row, column=2).value,
-                        'phone1': phone1,
-                        'phone2': phone2,
-                    }
-            
-            nego_rows = []
-            for row in range(2, last_row + 1):
-                if (ws.cell(row=row, column=2).value != "SPMADRID" and 
-                    (ws.cell(row=row, column=8).value is None or "PTP" not in str(ws.cell(row=row, column=8).value))):
-                    nego_rows.append(row)
-            
-            if nego_rows:
-                visible_count = len(nego_rows)
-                
-                for i, row_idx in enumerate(nego_rows):
-                    barcode = ws.cell(row=row_idx, column=1).value
-                    dest_ws.cell(row=current_row + i, column=1).value = barcode
-                    dest_ws.cell(row=current_row + i, column=2).value = "PTP NEW - CALL OUTS_PASTDUE"
-                
-                current_row += visible_count
-                for i, row_idx in enumerate(nego_rows):
-                    barcode = ws.cell(row=row_idx, column=1).value
-                    dest_ws.cell(row=current_row + i, column=1).value = barcode
-                    dest_ws.cell(row=current_row + i, column=2).value = "PTP FF UP - CLIENT ANSWERED AND WILL SETTLE"
-                
-                current_row += visible_count
-                
-                for i, row_idx in enumerate(nego_rows):
-                    barcode = ws.cell(row=row_idx, column=1).value
-                    dest_ws.cell(row=current_row + i, column=1).value = barcode
-                    dest_ws.cell(row=current_row + i, column=2).value = "PAYMENT - CURED"
-                
-                current_row += visible_count
-                
-                total_rows += (visible_count * 3)
-            
-            ptp_rows = []
-            for row in range(2, last_row + 1):
-                if (ws.cell(row=row, column=2).value != "SPMADRID" and 
-                    ws.cell(row=row, column=8).value is not None and 
-                    "PTP" in str(ws.cell(row=row, column=8).value)):
-                    ptp_rows.append(row)
-            
-            if ptp_rows:
-                visible_count = len(ptp_rows)
-                
-                for i, row_idx in enumerate(ptp_rows):
-                    barcode = ws.cell(row=row_idx, column=1).value
-                    dest_ws.cell(row=current_row + i, column=1).value = barcode
-                    dest_ws.cell(row=current_row + i, column=2).value = "PTP FF UP - CLIENT ANSWERED AND WILL SETTLE"
-                
-                current_row += visible_count
-                
-                for i, row_idx in enumerate(ptp_rows):
-                    barcode = ws.cell(row=row_idx, column=1).value
-                    dest_ws.cell(row=current_row + i, column=1).value = barcode
-                    dest_ws.cell(row=current_row + i, column=2).value = "PAYMENT - CURED"
-                
-                current_row += visible_count
-                
-                total_rows += (visible_count * 2)
-            
-            spmadrid_rows = []
-            for row in range(2, last_row + 1):
-                if ws.cell(row=row, column=2).value == "SPMADRID":
-                    spmadrid_rows.append(row)
-            
-            if spmadrid_rows:
-                visible_count = len(spmadrid_rows)
-                
-                for i, row_idx in enumerate(spmadrid_rows):
-                    barcode = ws.cell(row=row_idx, column=1).value
-                    dest_ws.cell(row=current_row + i, column=1).value = barcode
-                    dest_ws.cell(row=current_row + i, column=2).value = "PTP NEW - CURED_GHOST"
-                
-                current_row += visible_count
-                
-                for i, row_idx in enumerate(spmadrid_rows):
-                    barcode = ws.cell(row=row_idx, column=1).value
-                    dest_ws.cell(row=current_row + i, column=1).value = barcode
-                    dest_ws.cell(row=current_row + i, column=2).value = "PAYMENT - CURED"
-                
-                current_row += visible_count
-                
-                total_rows += (visible_count * 2)
-            
-            final_row_count = total_rows + 1
-            
-            for row in range(2, final_row_count + 1):
-                barcode = dest_ws.cell(row=row, column=1).value
-                action_status = dest_ws.cell(row=row, column=2).value
-                
-                source_data = barcode_lookup.get(barcode, {})
-                source_date = source_data.get('date')
-                source_amount = source_data.get('amount')
-                source_collector = source_data.get('collector')
-                source_phone1 = source_data.get('phone1')
-                source_phone2 = source_data.get('phone2')
-                
-                if source_date:
-                    try:
-                        if hasattr(source_date, 'strftime'): 
-                            base_date = source_date
-                        else:
-                            try:
-                                base_date = datetime.strptime(str(source_date), "%Y-%m-%d %H:%M:%S")
-                            except:
-                                try:
-                                    base_date = datetime.strptime(str(source_date), "%Y-%m-%d")
-                                except:
-                                    base_date = datetime.now()
-                    except:
-                        base_date = datetime.now()
-                    
-                    if "PTP NEW" in action_status:
-                        time_to_add = time(14, 40, 0)
-                    elif "PTP FF" in action_status:
-                        time_to_add = time(14, 50, 0)
-                    elif "CURED" in action_status:
-                        time_to_add = time(15, 0, 0)
-                    else:
-                        time_to_add = time(0, 0, 0)
-                    
-                    if not hasattr(base_date, 'time'):
-                        base_date = datetime.combine(base_date, time(0, 0, 0))
-                    
-                    result_date = datetime.combine(base_date.date(), time_to_add)
-                    
-                    formatted_date = result_date.strftime("%m/%d/%Y %I:%M:%S %p")
-                    dest_ws.cell(row=row, column=3).value = formatted_date
-                    
-                    formatted_date = result_date.strftime("%m/%d/%Y")
-                    dest_ws.cell(row=row, column=4).value = formatted_date
-                    
-                    dest_ws.cell(row=row, column=3).number_format = '@'
-                    dest_ws.cell(row=row, column=4).number_format = '@'
-                else:
-                    dest_ws.cell(row=row, column=3).value = ""
-                    dest_ws.cell(row=row, column=4).value = ""
-                
-                phone_no = ""
-                if "PAYMENT" not in action_status:
-                    raw_value = dest_ws.cell(row=row, column=12).value
-                    if raw_value:
-                        phone_no = str(raw_value).strip().split('.')[0]
-                
-                if "PTP NEW" in action_status:
-                    phone_value = source_phone1 if source_phone1 else source_phone2
-                    remark_text = f"1_{phone_value} - PTP NEW"
-                elif "PTP FF" in action_status:
-                    phone_value = source_phone1 if source_phone1 else source_phone2
-                    remark_text = f"{phone_value} - FPTP"
-                elif "PAYMENT" in action_status:
-                    remark_text = "CURED - CONFIRM VIA SELECTIVE LIST"
-                else:
-                    remark_text = ""
-                
-                dest_ws.cell(row=row, column=7).value = remark_text
-                
-                if "PAYMENT" in action_status:
-                    dest_ws.cell(row=row, column=9).value = ""
-                else:
-                    dest_ws.cell(row=row, column=9).value = source_amount
-                
-                if "PAYMENT" in action_status:
-                    dest_ws.cell(row=row, column=10).value = source_amount
-                else:
-                    dest_ws.cell(row=row, column=10).value = ""
-                
-                dest_ws.cell(row=row, column=11).value = source_collector
-                
-                if "PAYMENT" in action_status:
-                    dest_ws.cell(row=row, column=12).value = ""
-                else:
-                    if source_phone1 and source_phone1 != "":
-                        dest_ws.cell(row=row, column=12).value = source_phone1
-                    else:
-                        dest_ws.cell(row=row, column=12).value = source_phone2
-                
-                if "PAYMENT" in action_status and source_date:
-                    if isinstance(source_date, datetime):
-                        formatted_paid_date = source_date.strftime("%m/%d/%Y")
-                    elif isinstance(source_date, date):
-                        formatted_paid_date = source_date.strftime("%m/%d/%Y")
-                    else:
-                        try:
-                            date_obj = datetime.strptime(str(source_date), "%Y-%m-%d %H:%M:%S")
-                            formatted_paid_date = date_obj.strftime("%m/%d/%Y")
-                        except:
-                            try:
-                                date_obj = datetime.strptime(str(source_date), "%Y-%m-%d")
-                                formatted_paid_date = date_obj.strftime("%m/%d/%Y")
-                            except:
-                                formatted_paid_date = ""
-                    dest_ws.cell(row=row, column=14).value = formatted_paid_date
-                else:
-                    dest_ws.cell(row=row, column=14).value = ""
-            
-            for row in range(2, final_row_count + 1):
-                action_status = dest_ws.cell(row=row, column=2).value
-                phone_no = dest_ws.cell(row=row, column=12).value
-                
-                if "PTP NEW" in action_status and phone_no:
-                    dest_ws.cell(row=row, column=7).value = f"1_{phone_no} - PTP NEW"
-                elif "PTP FF" in action_status and phone_no:
-                    dest_ws.cell(row=row, column=7).value = f"{phone_no} - FPTP"
-            
-            for column in dest_ws.columns:
-                max_length = 0
-                column_letter = get_column_letter(column[0].column)
-                for cell in column:
-                    try:
-                        if cell.value and len(str(cell.value)) > max_length:
-                            max_length = len(str(cell.value))
-                    except:
-                        pass
-                adjusted_width = (max_length + 2)
-                dest_ws.column_dimensions[column_letter].width = adjusted_width
+        amount = lookup(keyed[4], None)
+        collector = lookup(keyed[2], None)
+        phone1 = lookup(self.process_mobile_numbers(keyed[42].where(keyed[42].map(bool).astype(bool), "")), None)
+        phone2 = lookup(self.process_mobile_numbers(keyed[43].where(keyed[43].map(bool).astype(bool), "")), None)
+        has_date = lookup(keyed[3].map(bool), False).astype(bool)
+        paid_date = lookup(self.format_dates(dates, formats=cured_date_formats, errors='coerce', infer=False), "")
+        base_date = lookup(self.parse_dates(dates, formats=cured_date_formats, errors='coerce', infer=False), pd.NaT)
 
-            for row_idx in range(2, dest_ws.max_row + 1):  
-                for col_idx in [3, 4, 14]: 
-                    cell = dest_ws.cell(row=row_idx, column=col_idx)
-                    if cell.value:
-                        cell_value_str = str(cell.value)
-                        cell.value = cell_value_str
-                        cell.number_format = '@'
+        # Accounts without a parsed date are stamped with today; each distinct timestamp is formatted once.
+        result_date = pd.DatetimeIndex(base_date).fillna(pd.Timestamp(datetime.now())).normalize() + time_of_day
+        codes, uniques = pd.factorize(result_date)
+        remark_date = np.array(uniques.strftime("%m/%d/%Y %I:%M:%S %p"), dtype=object)[codes]
+        ptp_date = np.array(uniques.strftime("%m/%d/%Y"), dtype=object)[codes]
 
-            dest_wb.save(remarks_path)
-            
-            others_wb = openpyxl.Workbook()
-            others_ws = others_wb.active
-            
-            others_ws.cell(row=1, column=1).value = ws.cell(row=1, column=1).value 
-            others_ws.cell(row=1, column=2).value = "REMARK BY" 
-            
-            for row in range(2, last_row + 1):
-                others_ws.cell(row=row, column=1).value = ws.cell(row=row, column=1).value
+        phone = np.where(pd.Series(phone1, dtype=object).map(bool).to_numpy(dtype=bool), phone1, phone2)
+        phone_text = pd.Series(phone, dtype=object).map(str)
+        remark = np.select(
+            [is_new, is_ff, is_payment],
+            [("1_" + phone_text + " - PTP NEW").to_numpy(), (phone_text + " - FPTP").to_numpy(), "CURED - CONFIRM VIA SELECTIVE LIST"],
+            "",
+        )
 
-                reference_value = ws.cell(row=row, column=1).value 
-                
-                for cured_row in range(2, ws.max_row + 1):  
-                    if ws.cell(row=cured_row, column=1).value == reference_value: 
-                        others_ws.cell(row=row, column=2).value = ws.cell(row=cured_row, column=2).value 
-                        break
+        unused = np.full(len(lan), None, dtype=object)
+        return pd.DataFrame({
+            "LAN": lan,
+            "Action Status": status,
+            "Remark Date": np.where(has_date, remark_date, ""),
+            "PTP Date": np.where(has_date, ptp_date, ""),
+            "Reason For Default": unused,
+            "Field Visit Date": unused,
+            "Remark": remark,
+            "Next Call Date": unused,
+            "PTP Amount": np.where(is_payment, "", amount),
+            "Claim Paid Amount": np.where(is_payment, amount, ""),
+            "Remark By": collector,
+            "Phone No.": np.where(is_payment, "", phone),
+            "Relation": unused,
+            "Claim Paid Date": np.where(is_payment & has_date, paid_date, ""),
+        }, dtype=object)
 
-            others_wb.save(others_path)
-            
-            payments_wb = openpyxl.Workbook()
-            payments_ws = payments_wb.active
-            payments_ws.cell(row=1, column=1).value = "LAN"
-            payments_ws.cell(row=1, column=2).value = "ACCOUNT NUMBER"
-            payments_ws.cell(row=1, column=3).value = "NAME"
-            payments_ws.cell(row=1, column=4).value = "CARD NUMBER"
-            payments_ws.cell(row=1, column=5).value = "PAYMENT AMOUNT"
-            payments_ws.cell(row=1, column=6).value = "PAYMENT DATE"
-            
-            for row in range(2, last_row + 1):
-                payments_ws.cell(row=row, column=1).value = ws.cell(row=row, column=17).value if ws.cell(row=row, column=17).value else ""
-                payments_ws.cell(row=row, column=3).value = ws.cell(row=row, column=18).value if ws.cell(row=row, column=18).value else ""
-                payments_ws.cell(row=row, column=5).value = ws.cell(row=row, column=4).value if ws.cell(row=row, column=4).value else ""
-                date_value = ws.cell(row=row, column=3).value
-                if date_value:
-                    if isinstance(date_value, datetime):
-                        formatted_date = date_value.strftime("%m/%d/%Y")
-                    else:
-                        formatted_date = str(date_value)
-                    payments_ws.cell(row=row, column=6).value = formatted_date
-            
-            for row in range(2, last_row + 1):
-                payments_ws.cell(row=row, column=6).number_format = "@"
-            
-            for column in payments_ws.columns:
-                max_length = 0
-                column_letter = get_column_letter(column[0].column)
-                for cell in column:
-                    try:
-                        if cell.value and len(str(cell.value)) > max_length:
-                            max_length = len(str(cell.value))
-                    except:
-                        pass
-                adjusted_width = (max_length + 2)
-                payments_ws.column_dimensions[column_letter].width = adjusted_width
-            
-            payments_wb.save(payments_path)
-            
-            remarks_df = pd.read_excel(remarks_path)
-            others_df = pd.read_excel(others_path)
-            payments_df = pd.read_excel(payments_path)
-            
-            with open(remarks_path, 'rb') as f:
-                remarks_binary = f.read()
-            with open(others_path, 'rb') as f:
-                others_binary = f.read()
-            with open(payments_path, 'rb') as f:
-                payments_binary = f.read()
-                
-            os.unlink(temp_input_path)
-            
-            return {
-                'remarks_df': remarks_df, 
-                'others_df': others_df, 
-                'payments_df': payments_df,
-                'remarks_binary': remarks_binary,
-                'others_binary': others_binary,
-                'payments_binary': payments_binary,
-                'remarks_filename': remarks_filename,
-                'others_filename': others_filename,
-                'payments_filename': payments_filename
-            }
-        finally:
-            if os.path.exists(temp_input_path):
-                try:
-                    os.remove(temp_input_path)
-                except Exception as e:
-                    print(f"Failed to delete temp file: {e}")
+    def build_reshuffle(self, source, lan_header):
+        """
+        Rows of the cured list Reshuffle sheet: every LAN of `source` (see
+        build_cured_remarks) with the collector of the first row that has the same LAN.
+        """
+        first_rows = source.drop_duplicates(subset=1, keep="first")
+        lan_index = pd.Index(first_rows[1])
+        return pd.DataFrame({
+            lan_header: source[1],
+            "REMARK BY": first_rows[2].to_numpy()[lan_index.get_indexer(source[1])],
+        }, dtype=object)
+
+    def process_cured_list(self, file_content, sheet_name=None, preview_only=False,
+                           remove_duplicates=False, remove_blanks=False, trim_spaces=False,
+                           archive_dir=CURED_LIST_ARCHIVE_DIR):
+        df = self.clean_data(self.read_excel_sheet(file_content, sheet_name), remove_duplicates, remove_blanks, trim_spaces)
+
+        if preview_only:
+            return df
+
+        # The sheets are built from the workbook itself (openpyxl), all in memory.
+        file_content = self.workbook_bytes(file_content, sheet_name)
+        current_date = datetime.now().strftime('%m%d%Y')
+        
+        remarks_filename = f"BPI AUTOCURING REMARKS {current_date}.xlsx"
+        others_filename = f"BPI AUTOCURING RESHUFFLE {current_date}.xlsx"
+        payments_filename = f"BPI AUTOCURING PAYMENT {current_date}.xlsx"
+        
+        source_wb = openpyxl.load_workbook(io.BytesIO(file_content))
+        ws = source_wb.active
+        if ws.max_column < 43:
+            raise ValueError("File doesn't have the expected number of columns")
+        
+        last_row = ws.max_row
+        # Only the columns the sheets use; iter_rows creates a cell for every coordinate
+        # it visits, so reading all 43 columns costs more than the rest.
+        source = pd.DataFrame(
+            [left + middle + right for left, middle, right in zip(
+                ws.iter_rows(min_row=2, max_row=last_row, max_col=8, values_only=True),
+                ws.iter_rows(min_row=2, max_row=last_row, min_col=17, max_col=18, values_only=True),
+                ws.iter_rows(min_row=2, max_row=last_row, min_col=42, max_col=43, values_only=True),
+            )],
+            columns=[*range(1, 9), 17, 18, 42, 43],
+            dtype=object,
+        )
+        
+        remarks_df = self.build_cured_remarks(source)
+        dest_wb = openpyxl.Workbook()
+        dest_ws = dest_wb.active
+        dest_ws.append(list(remarks_df.columns))
+        for values in remarks_df.itertuples(index=False, name=None):
+            dest_ws.append({
+                col: value for col, value in enumerate(values, 1)
+                if col not in (5, 6, 8, 13)
+            })
+        for col in (3, 4, 14):
+            for row in np.flatnonzero(remarks_df.iloc[:, col - 1].map(bool).to_numpy(dtype=bool)) + 2:
+                dest_ws.cell(row=row, column=col).number_format = '@'
+        self.autofit_columns(dest_ws, remarks_df)
+        
+        others_df = self.build_reshuffle(source, ws.cell(row=1, column=1).value)
+        others_wb = openpyxl.Workbook()
+        others_ws = others_wb.active
+        others_ws.append(list(others_df.columns))
+        for values in others_df.itertuples(index=False, name=None):
+            others_ws.append(values)
+        
+        def value_or_blank(col):
+            return source[col].where(source[col].map(bool).astype(bool), "")
+
+        payments_df = pd.DataFrame({
+            "LAN": value_or_blank(17),
+            "ACCOUNT NUMBER": None,
+            "NAME": value_or_blank(18),
+            "CARD NUMBER": None,
+            "PAYMENT AMOUNT": value_or_blank(4),
+            "PAYMENT DATE": source[3].map(
+                lambda value: (value.strftime("%m/%d/%Y") if isinstance(value, datetime) else str(value)) if value else None
+            ),
+        }, index=source.index, dtype=object)
+        payments_wb = openpyxl.Workbook()
+        payments_ws = payments_wb.active
+        payments_ws.append(list(payments_df.columns))
+        for lan, _, name, _, amount, payment_date in payments_df.itertuples(index=False, name=None):
+            payments_ws.append({1: lan, 3: name, 5: amount, 6: payment_date})
+        for row in range(2, last_row + 1):
+            payments_ws.cell(row=row, column=6).number_format = "@"
+        self.autofit_columns(payments_ws, payments_df)
+        
+        outputs = {}
+        for name, workbook in (("remarks", dest_wb), ("others", others_wb), ("payments", payments_wb)):
+            buffer = io.BytesIO()
+            workbook.save(buffer)
+            outputs[name] = buffer.getvalue()
+        
+        if archive_dir:
+            self.archive_cured_list(archive_dir, current_date, file_content, {
+                "BPI_FOR_REMARKS": (remarks_filename, outputs["remarks"]),
+                "BPI_FOR_OTHERS": (others_filename, outputs["others"]),
+                "BPI_FOR_PAYMENTS": (payments_filename, outputs["payments"]),
+            })
+        
+        # Empty rows at the bottom of the sheet are still written, but left out of the previews.
+        def without_trailing_blanks(frame):
+            filled = np.flatnonzero((frame.notna() & frame.ne("")).any(axis=1).to_numpy())
+            return frame.iloc[:filled[-1] + 1 if len(filled) else 0]
+        
+        return {
+            'remarks_df': remarks_df, 
+            'others_df': without_trailing_blanks(others_df), 
+            'payments_df': without_trailing_blanks(payments_df),
+            'remarks_binary': outputs["remarks"],
+            'others_binary': outputs["others"],
+            'payments_binary': outputs["payments"],
+            'remarks_filename': remarks_filename,
+            'others_filename': others_filename,
+            'payments_filename': payments_filename
+        }
+
+    def archive_cured_list(self, archive_dir, current_date, file_content, outputs):
+        """
+        Keep a copy of the cured list and its outputs under `archive_dir`, in the
+        CURED_LIST / BPI_FOR_* folders. Archiving is best effort and never fails the run.
+        """
+        try:
+            dirs = self.setup_directories('cured_list', base_dir=archive_dir)
+            with open(os.path.join(dirs["CURED_LIST"], f"CURED LIST {current_date}.xlsx"), 'wb') as f:
+                f.write(file_content)
+            for dir_name, (filename, binary) in outputs.items():
+                with open(os.path.join(dirs[dir_name], filename), 'wb') as f:
+                    f.write(binary)
+        except OSError as e:
+            st.warning(f"Could not archive the cured list: {str(e)}")
+
+    def autofit_columns(self, ws, df):
+        """Width of each column: its longest non-empty value (header included) plus 2."""
+        apply_column_widths(ws, column_widths(df, skip_falsy=True))
  
\ No newline at end of file
@@ -8,6 +8,8 @@ import io
 import tempfile
 import shutil
 from processor.base import BaseProcessor
+from utils.chunked_lookup import ChunkedLookup
+from utils.xlsx_writer import ColumnSpec, write_xlsx
 
 class PSBAutoCuringProcessor(BaseProcessor):
     def process_new_endorsement(self, file_content, sheet_name=None, preview_only=False,
@@ -15,14 +17,9 @@ class PSBAutoCuringProcessor(BaseProcessor):
         TABLE_NAME = 'psb_auto_dataset'
         all_account_numbers = []
         try:
-            if isinstance(file_content, bytes):
-                file_content = io.BytesIO(file_content)
-            
-            xls = pd.ExcelFile(file_content)
-            
-            df = pd.read_excel(
-                xls, 
-                sheet_name=sheet_name,
+            df = self.read_excel_sheet(
+                file_content, 
+                sheet_name,
                 dtype={'Account Number': str}
             )
             df = df.replace('', pd.NA)
@@ -53,14 +50,13 @@ class PSBAutoCuringProcessor(BaseProcessor):
                     df['Account Number'] = df['Account Number'].astype(str).str.strip()
                     account_numbers_list = [str(int(acc)) for acc in df['Account Number'].dropna().unique().tolist()]
                     
-                    batch_size = 100 
-                    existing_accounts = []
-                    for i in range(0, len(account_numbers_list), batch_size):
-                        batch = account_numbers_list[i:i + batch_size]
-                        response = self.supabase.table('psb_auto_dataset').select('*').in_('account_number', batch).execute()
-
-                        if hasattr(response, 'data') and response.data:
-                            existing_accounts.extend([str(item['account_number']) for item in response.data])
+                    lookup = ChunkedLookup(self.supabase, 'psb_auto_dataset', columns='account_number', chunk_size=100)
+                    existing_rows = lookup.fetch('account_number', account_numbers_list)
+                    if lookup.errors:
+                        start, error = lookup.errors[0]
+                        st.error(f"Error checking existing accounts batch {start}: {str(error)}")
+                        return None, None, None
+                    existing_accounts = [str(item['account_number']) for item in existing_rows]
 
                     initial_rows = len(df)
                     df = df[~df['Account Number'].astype(str).isin(existing_accounts)]
@@ -110,7 +106,7 @@ class PSBAutoCuringProcessor(BaseProcessor):
                 all_account_numbers.extend(account_numbers.tolist())
 
                 if 'Contact No.' in cms_endo_df.columns:
-                    cms_endo_df['Contact No.'] = cms_endo_df['Contact No.'].apply(self.clean_phone_number)
+                    cms_endo_df['Contact No.'] = self.clean_phone_numbers(cms_endo_df['Contact No.'])
 
                 if 'BRAND' in cms_endo_df.columns and 'MODEL' in cms_endo_df.columns:
                     cms_endo_df['DESCRIP'] = cms_endo_df.apply(
@@ -144,22 +140,14 @@ class PSBAutoCuringProcessor(BaseProcessor):
 
                 unique_account_numbers = list(dict.fromkeys(all_account_numbers))
                 if unique_account_numbers:
-                    batch_size_for_query = 20
                     chcode_map = {}
+                    account_ids = [str(id).lstrip('0').strip() for id in unique_account_numbers if id is not None and str(id).strip() != '']
                     
-                    for i in range(0, len(unique_account_numbers), batch_size_for_query):
-                        batch_ids = unique_account_numbers[i:i+batch_size_for_query]
-                        batch_ids = [str(id).lstrip('0').strip() for id in batch_ids if id is not None and str(id).strip() != '']
-
-                        if batch_ids:
-                            try:
-                                batch_response = self.supabase.table(TABLE_NAME).select("account_number, chcode").in_("account_number", batch_ids).execute()
-                                if hasattr(batch_response, 'data') and batch_response.data:
-                                    for record in batch_response.data:
-                                        key = str(record['account_number']).strip()
-                                        chcode_map[key] = str(record['chcode']).strip()
-                            except Exception as e:
-                                st.warning(f"Error fetching Ch Code batch {i}: {str(e)}. Continuing...")
+                    lookup = ChunkedLookup(self.supabase, TABLE_NAME, columns="account_number, chcode", chunk_size=20)
+                    for record in lookup.fetch("account_number", account_ids):
+                        chcode_map[str(record['account_number']).strip()] = str(record['chcode']).strip()
+                    for start, error in lookup.errors:
+                        st.warning(f"Error fetching Ch Code batch {start}: {str(error)}. Continuing...")
                                 
                     normalized_account_numbers = cms_endo_df['Account Number'].astype(str).str.lstrip('0').str.strip()
                     
@@ -222,81 +210,16 @@ class PSBAutoCuringProcessor(BaseProcessor):
             return digits
         
     def create_excel_file(self, df):
-        output = io.BytesIO()
-        
-        with pd.ExcelWriter(output, engine='openpyxl') as writer:
-            df.to_excel(writer, index=False, sheet_name='Sheet1')
-
-            workbook = writer.book
-            worksheet = writer.sheets['Sheet1']
-            final_columns = df.columns
-            
-            thin_border = Border(
-                left=Side(style='thin'),
-                right=Side(style='thin'),
-                top=Side(style='thin'),
-                bottom=Side(style='thin')
-            )
-
-            account_col_idx = None
-            maturity_col_idx = None
-            endo_date_col_idx = None
-            
-            for i, col in enumerate(final_columns):
-                col_letter = get_column_letter(i + 1)
-                
-                if col == 'Account Number':
-                    account_col_idx = i + 1
-                elif col == 'Maturity date':
-                    maturity_col_idx = i + 1
-                elif col == 'ENDO DATE':
-                    endo_date_col_idx = i + 1
-                
-                if col in ['Account Number', 'ACCT NAME', 'Endrosement DPD', 'ENDO DATE', 'Endrosement OB', 
-                          'MONTHLY AMORT', 'Maturity date', 'Contact No.', 'DESCRIP']:
-                    max_length = max(
-                        [len(str(cell.value)) if cell.value is not None else 0
-                        for cell in worksheet[col_letter]]
-                    )
-                    adjusted_width = max_length + 2
-                    worksheet.column_dimensions[col_letter].width = adjusted_width
-                
-                if col == 'Contact No.':
-                    for row in range(2, len(df) + 2):
-                        cell = worksheet.cell(row=row, column=i+1)
-                        cell.number_format = '@' 
-                        if cell.value is not None:
-                            cell.value = str(cell.value)
-
-            for row in range(2, len(df) + 2):  
-                if account_col_idx:
-                    cell = worksheet.cell(row=row, column=account_col_idx)
-                    cell.number_format = '@' 
-                    if cell.value is not None:
-                        cell.value = str(cell.value)
-                        
-                if maturity_col_idx:
-                    cell = worksheet.cell(row=row, column=maturity_col_idx)
-                    if cell.value is not None:
-                        try:
-                            date_value = pd.to_datetime(cell.value).strftime("%m/%d/%Y")
-                            cell.value = date_value
-                        except:
-                            pass
-
-                if endo_date_col_idx:
-                    cell = worksheet.cell(row=row, column=endo_date_col_idx)
-                    if cell.value is not None:
-                        try:
-                            date_value = pd.to_datetime(cell.value).strftime("%m/%d/%Y")
-                            cell.value = date_value
-                            cell.number_format = '@'
-                        except:
-                            pass
-
-                for col_idx in range(1, len(final_columns) + 1):
-                        cell = worksheet.cell(row=row, column=col_idx)
-                        cell.border = thin_border
-
-        output.seek(0)
-        return output.getvalue()
\ No newline at end of file
+        df, converted_dates = self.format_date_columns(df, ['Maturity date', 'ENDO DATE'])
+        autofit = ['Account Number', 'ACCT NAME', 'Endrosement DPD', 'ENDO DATE', 'Endrosement OB',
+                   'MONTHLY AMORT', 'Maturity date', 'Contact No.', 'DESCRIP']
+
+        columns = {col: ColumnSpec(border=True, autofit=col in autofit) for col in df.columns}
+        for col in ['Account Number', 'Contact No.']:
+            if col in columns:
+                columns[col] = ColumnSpec(text=True, border=True, autofit=True)
+        if 'ENDO DATE' in columns:
+            columns['ENDO DATE'] = ColumnSpec(number_format='@', format_rows=converted_dates['ENDO DATE'],
+                                              border=True, autofit=True)
+
+        return write_xlsx(df, columns)
\ No newline at end of file
@@ -13,14 +13,31 @@ import io
 import re
 import pytz
 from processor.base import BaseProcessor as base
+from utils.template_pool import get_template_pool
+from utils.chunked_lookup import ChunkedLookup
+from utils.lookup_cache import get_lookup_cache
+from utils.account_index import get_account_index
+from utils.data_access import QueryJob
+from utils.xlsx_writer import ColumnSpec, apply_column_widths, column_widths, write_xlsx
 
 class ROBBikeProcessor(base):
+    @staticmethod
+    def latest_field_status(field_results_df):
+        """
+        status and substatus of the most recent field result per chcode, indexed by chcode.
+        Both are blanked when either one is '0' or ''.
+        """
+        latest = field_results_df.dropna(subset=['chcode']).sort_values(
+            'inserted_date', ascending=False, kind='stable'
+        ).drop_duplicates(subset='chcode', keep='first').set_index('chcode')
+
+        blank = latest['status'].isin(['0', '']) | latest['substatus'].isin(['0', ''])
+        return latest[['status', 'substatus']].mask(blank, '', axis=0)
+
     def process_daily_remark(self, file_content, sheet_name=None, preview_only=False,
                     remove_duplicates=False, remove_blanks=False, trim_spaces=False, report_date=None):
         try:
-            byte_stream = io.BytesIO(file_content)
-            xls = pd.ExcelFile(byte_stream)
-            df = pd.read_excel(xls, sheet_name=sheet_name)
+            df = self.read_excel_sheet(file_content, sheet_name)
             df = self.clean_data(df, remove_duplicates, remove_blanks, trim_spaces)
             
             required_columns = ['Time', 'Status', 'Account No.', 'Debtor', 'DPD', 'Remark', 'Remark By', 'PTP Amount', 'Balance', 'Claim Paid Amount']
@@ -30,8 +47,20 @@ class ROBBikeProcessor(base):
                 st.error("Required columns not found in the uploaded file.")
                 return None, None, None
             else: 
+                # The disposition list and the account index do not depend on each other or on
+                # the cleanup below, so both are fetched up front and concurrently. A preview
+                # returns before the accounts are enriched, so it skips the index refresh.
+                job = QueryJob("ROB daily remark")
+                account_index = get_account_index('rob_bike_dataset')
+                prefetch = {
+                    'dispositions': (get_lookup_cache().column_values, self.supabase, 'rob_bike_disposition', 'disposition'),
+                }
+                if not preview_only:
+                    prefetch['account_index'] = (account_index.refresh, self.supabase)
+                prefetched = job.run(job.gather(**prefetch))
+                
                 if 'Date' in df.columns:
-                    df['Date'] = pd.to_datetime(df['Date']).dt.strftime('%m/%d/%Y')
+                    df['Date'] = self.format_dates(df['Date'], errors='raise', na_value=np.nan)
 
                 if report_date:
                     report_date_formatted = pd.to_datetime(report_date).strftime('%m/%d/%Y')
@@ -45,7 +74,7 @@ class ROBBikeProcessor(base):
                 if 'Time' in df.columns:
                     if pd.api.types.is_object_dtype(df['Time']):
                         try:
-                            df['Time'] = pd.to_datetime(df['Time'], format='%I:%M:%S %p')
+                            df['Time'] = self.parse_dates(df['Time'], formats=("%I:%M:%S %p",), infer=False)
                         except ValueError:
                             pass
                     df = df.sort_values(by='Time', ascending=False)
@@ -61,12 +90,7 @@ class ROBBikeProcessor(base):
                 
                     df = df[~(dnc_mask | blank_mask)]
                     
-                    disposition = self.supabase.table('rob_bike_disposition').select("disposition").execute()
-                
-                    if disposition.data is None:
-                        valid_dispo = []
-                    else:
-                        valid_dispo = [record['disposition'] for record in disposition.data]
+                    valid_dispo = prefetched['dispositions']
                 
                     not_in_valid_dispo = ~df['Status'].isin(valid_dispo)
                     removed_invalid_dispo_count = not_in_valid_dispo.sum()
@@ -178,13 +202,13 @@ class ROBBikeProcessor(base):
                     monitoring_df['Notes'] = df['Remark']
                 
                 if 'Date' in df.columns:
-                    monitoring_df['BarcodeDate'] = pd.to_datetime(df['Date']).dt.strftime('%m/%d/%Y')
+                    monitoring_df['BarcodeDate'] = self.format_dates(df['Date'], errors='raise', na_value=np.nan)
                 
                 if 'PTP Amount' in df.columns and 'Claim Paid Amount' in df.columns:
                     ptp_amount = df['PTP Amount']
-                    ptp_date = pd.to_datetime(df['PTP Date'], errors='coerce')
+                    ptp_date = self.parse_dates(df['PTP Date'], errors='coerce')
                     claim_paid_amount = df['Claim Paid Amount']
-                    claim_paid_date = pd.to_datetime(df['Claim Paid Date'], errors='coerce')
+                    claim_paid_date = self.parse_dates(df['Claim Paid Date'], errors='coerce')
                     
                     monitoring_df['PTP Amount'] = np.where(
                         ptp_amount.notna() & (ptp_amount != 0),
@@ -198,115 +222,67 @@ class ROBBikeProcessor(base):
                     
                     monitoring_df['PTP Date'] = np.where(
                         ptp_date.notna(),
-                        ptp_date.dt.strftime('%m/%d/%Y'),
+                        self.format_dates(ptp_date, na_value=np.nan),
                         np.where(
                             claim_paid_date.notna(),
-                            claim_paid_date.dt.strftime('%m/%d/%Y'),
+                            self.format_dates(claim_paid_date, na_value=np.nan),
                             ''
                         )
                     )
                                     
+                account_info = None
                 if 'Account No.' in df.columns:
-                    account_numbers = [str(int(acc)) for acc in df['Account No.'].dropna().unique().tolist()]
-                    dataset_response = self.supabase.table('rob_bike_dataset').select('*').in_('account_number', account_numbers).execute()
+                    account_numbers = list(dict.fromkeys(str(int(acc)) for acc in df['Account No.'].dropna().unique().tolist()))
+                    account_info = account_index.lookup(self.supabase, account_numbers)
+                    account_info.index = account_numbers
                     
-                    if hasattr(dataset_response, 'data') and dataset_response.data:
-                        dataset_df = pd.DataFrame(dataset_response.data)
+                    if account_info['found'].any():
                         monitoring_df['Account Number'] = monitoring_df['Account Number'].apply(lambda x: str(int(float(x))) if pd.notnull(x) else '')
                         
-                        existing_accounts = set(str(row['account_number']).strip() for _, row in dataset_df.iterrows())
-                        missing_accounts = set(account_numbers) - existing_accounts
-
-                        if missing_accounts:
-                            missing_list = sorted(list(missing_accounts))
+                        missing_list = sorted(account_info.index[~account_info['found']])
+                        if missing_list:
                             st.write(f"The following account numbers were not found in the database")
                             for acc in missing_list:
                                 st.write(f" - {acc}")
                             st.write(f"Total missing accounts: {len(missing_list)}")
                         
-                        account_data_map = {}
-                        chcode_list = []
-                        
-                        for _, row in dataset_df.iterrows():
-                            account_no = str(row['account_number']).strip()
-                            chcode = row.get('chcode', '')
-                            
-                            if chcode:
-                                chcode_list.append(chcode)
-                                
-                            account_data_map[account_no] = {
-                                'ChCode': chcode,
-                                'AccountNumber': "00" + account_no,
-                                'EndoDate': row.get('endo_date', ''),
-                                'Stores': row.get('stores', ''),
-                                'Cluster': row.get('cluster', '')
-                            }
+                        account_info['AccountNumber'] = np.where(account_info['found'], "00" + account_info.index, '')
+                        account_info['Field_Status'] = ''
+                        account_info['Field_Substatus'] = ''
+                        chcode_list = [chcode for chcode in account_info.loc[account_info['found'], 'chcode'].unique() if chcode]
                         
                         if chcode_list:
                             try:
-                                field_results_response = self.supabase.table('rob_bike_field_result').select('*').in_('chcode', chcode_list).execute()
+                                lookup = ChunkedLookup(self.supabase, 'rob_bike_field_result', columns='chcode,status,substatus,inserted_date')
+                                field_results_df = pd.DataFrame(job.run_sync('field_results', lookup.fetch, 'chcode', chcode_list, after='account_index'))
+                                for _, error in lookup.errors:
+                                    st.warning(f"Error fetching field results batch: {str(error)}")
                                 
-                                if hasattr(field_results_response, 'data') and field_results_response.data:
-                                    field_results_df = pd.DataFrame(field_results_response.data)
+                                if 'inserted_date' in field_results_df.columns:
+                                    field_results_df['inserted_date'] = pd.to_datetime(field_results_df['inserted_date'])
                                     
-                                    if 'inserted_date' in field_results_df.columns:
-                                        field_results_df['inserted_date'] = pd.to_datetime(field_results_df['inserted_date'])
+                                    latest = self.latest_field_status(field_results_df)
                                     
-                                    latest_status_map = {}
+                                    account_info['Field_Status'] = account_info['chcode'].map(latest['status']).fillna('')
+                                    account_info['Field_Substatus'] = account_info['chcode'].map(latest['substatus']).fillna('')
                                     
-                                    if 'inserted_date' in field_results_df.columns:
-                                        for chcode, group in field_results_df.groupby('chcode'):
-                                            latest_row = group.sort_values('inserted_date', ascending=False).iloc[0]
-                                            
-                                            status = latest_row.get('status', '')
-                                            substatus = latest_row.get('substatus', '')
-                                            
-                                            if status in ('0', '') or substatus in ('0', ''):
-                                                status, substatus = '', ''
-                                            
-                                            latest_status_map[chcode] = {
-                                                'Field_Status': status if status not in ('0', '') else '',
-                                                'Field_Substatus': substatus if substatus not in ('0', '') else '',
-                                            }
-                                        
-                                        for account_no, data in account_data_map.items():
-                                            chcode = data['ChCode']
-                                            if chcode in latest_status_map:
-                                                account_data_map[account_no].update({
-                                                    'Field_Status': latest_status_map[chcode]['Field_Status'],
-                                                    'Field_Substatus': latest_status_map[chcode]['Field_Substatus'],
-                                                })
-                                            else:
-                                                account_data_map[account_no].update({
-                                                    'Field_Status': '',
-                                                    'Field_Substatus': '',
-                                                })
-                                            
                             except Exception as e:
                                 st.error(f"Error fetching field results: {str(e)}")
                         
-                        monitoring_df['EndoDate'] = monitoring_df['Account Number'].map(
-                            lambda acc_no: account_data_map.get(acc_no, {}).get('EndoDate', ''))
-                        monitoring_df['EndoDate'] = pd.to_datetime(monitoring_df['EndoDate']).dt.strftime('%m/%d/%Y')
+                        enrichment = account_info.reindex(monitoring_df['Account Number'].to_numpy()).fillna('')
                         
-                        monitoring_df['Stores'] = monitoring_df['Account Number'].map(
-                            lambda acc_no: '' if account_data_map.get(acc_no, {}).get('Stores') in ['0', 0] 
-                            else account_data_map.get(acc_no, {}).get('Stores', '')
+                        monitoring_df['EndoDate'] = self.format_dates(
+                            pd.Series(enrichment['endo_date'].to_numpy(), index=monitoring_df.index), errors='raise', na_value=np.nan
                         )
-                        
-                        monitoring_df['Cluster'] = monitoring_df['Account Number'].map(
-                            lambda acc_no: '' if account_data_map.get(acc_no, {}).get('Cluster') in ['0', 0] 
-                            else account_data_map.get(acc_no, {}).get('Cluster', '')
-                        )
-                        
-                        monitoring_df['Field Status'] = monitoring_df['Account Number'].map(
-                            lambda acc_no: account_data_map.get(acc_no, {}).get('Field_Status', ''))
-                        
-                        monitoring_df['Field Substatus'] = monitoring_df['Account Number'].map(
-                            lambda acc_no: account_data_map.get(acc_no, {}).get('Field_Substatus', ''))
-                        
-                        monitoring_df['Account Number'] = monitoring_df['Account Number'].map(
-                            lambda acc_no: account_data_map.get(acc_no, {}).get('AccountNumber', ''))
+                        monitoring_df['Stores'] = enrichment['stores'].replace(['0', 0], '').to_numpy()
+                        monitoring_df['Cluster'] = enrichment['cluster'].replace(['0', 0], '').to_numpy()
+                        monitoring_df['Field Status'] = enrichment['Field_Status'].to_numpy()
+                        monitoring_df['Field Substatus'] = enrichment['Field_Substatus'].to_numpy()
+                        monitoring_df['Account Number'] = enrichment['AccountNumber'].to_numpy()
+                    else:
+                        account_info = None
+                
+                st.caption(job.summary())
                         
                 ptp_data = df[df['Status'].str.contains('PTP', case=False, na=False)].copy() if 'Status' in df.columns else pd.DataFrame()
                 
@@ -326,13 +302,13 @@ class ROBBikeProcessor(base):
                         ptp_df['Amount'] = ptp_data['PTP Amount']
                     
                     if 'PTP Date' in ptp_data.columns:
-                        ptp_df['StartDate'] = pd.to_datetime(ptp_data['PTP Date']).dt.strftime('%Y-%m-%d')
+                        ptp_df['StartDate'] = self.format_dates(ptp_data['PTP Date'], '%Y-%m-%d', errors='raise', na_value=np.nan)
                     
                     if 'Remark' in ptp_data.columns:
                         ptp_df['Notes'] = ptp_data['Remark']
                     
                     if 'Time' in ptp_data.columns:
-                        time_only = pd.to_datetime(ptp_data['Time'], errors='coerce').dt.time
+                        time_only = self.parse_dates(ptp_data['Time'], errors='coerce').dt.time
 
                         result_datetime = [
                             datetime.combine(report_date, t) if pd.notnull(t) else None for t in time_only
@@ -342,15 +318,18 @@ class ROBBikeProcessor(base):
                             dt.strftime('%m/%d/%Y %I:%M:%S %p').replace(' 0', ' ') if dt else '' for dt in result_datetime
                         ]
                         
-                    if 'Account No.' in ptp_data.columns and 'account_data_map' in locals():
+                    if 'Account No.' in ptp_data.columns and account_info is not None:
                         ptp_df['AccountNumber'] = ptp_df['AccountNumber'].apply(lambda x: str(int(float(x))) if pd.notnull(x) else '')
-                        ptp_df['EndoDate'] = ptp_df['AccountNumber'].map(
-                            lambda acc_no: account_data_map.get(acc_no, {}).get('EndoDate', ''))
-                        ptp_df['EndoDate'] = pd.to_datetime(ptp_df['EndoDate']).dt.strftime('%m/%d/%Y')
+                        ptp_enrichment = account_info.reindex(ptp_df['AccountNumber'].to_numpy()).fillna('')
+                        ptp_df['EndoDate'] = self.format_dates(
+                            pd.Series(ptp_enrichment['endo_date'].to_numpy(), index=ptp_df.index), errors='raise', na_value=np.nan
+                        )
                 
                     if 'Account No.' in df.columns:
-                        ptp_df['AccountNumber'] = ptp_df['AccountNumber'].map(
-                            lambda acc_no: account_data_map.get(acc_no, {}).get('AccountNumber', ''))
+                        if account_info is not None:
+                            ptp_df['AccountNumber'] = ptp_enrichment['AccountNumber'].to_numpy()
+                        else:
+                            ptp_df['AccountNumber'] = ''
             
                 payment_statuses = [
                     "PAYMENT", "PAYMENT VIA CALL", "PAYMENT VIA SMS", "PAYMENT VIA EMAIL",
@@ -448,11 +427,11 @@ class ROBBikeProcessor(base):
                 
                 if os.path.exists(template_path):
                     try:
-                        with open(template_path, 'rb') as template_file:
-                            template_copy = io.BytesIO(template_file.read())
+                        template_pool = get_template_pool()
+                        template_pool.validate(template_path)
                             
                         try:
-                            template_wb = load_workbook(template_copy)
+                            template_wb = template_pool.clone(template_path)
                             
                             def append_df_to_sheet(sheet_name, df):
                                 if sheet_name in template_wb.sheetnames:
@@ -476,13 +455,7 @@ class ROBBikeProcessor(base):
                                 )
 
                                 if df is not None:
-                                    for col_idx, col in enumerate(df.columns, 1):
-                                        max_length = max(
-                                            df[col].astype(str).map(len).max(),
-                                            len(str(col))
-                                        )
-                                        adjusted_width = max_length + 2
-                                        sheet.column_dimensions[get_column_letter(col_idx)].width = adjusted_width
+                                    apply_column_widths(sheet, column_widths(df))
 
                                     start_row = sheet.max_row - len(df) + 1
                                     for row in sheet.iter_rows(min_row=start_row, max_row=sheet.max_row, min_col=1, max_col=len(df.columns)):
@@ -534,13 +507,7 @@ class ROBBikeProcessor(base):
                             )
                             
                             if df is not None: 
-                                for col_idx, col in enumerate(df.columns, 1):
-                                    max_length = max(
-                                        df[col].astype(str).map(len).max(),
-                                        len(str(col))
-                                    )
-                                    adjusted_width = max_length + 2
-                                    sheet.column_dimensions[get_column_letter(col_idx)].width = adjusted_width
+                                apply_column_widths(sheet, column_widths(df))
                                 
                                 for row in sheet.iter_rows(min_row=1, max_row=len(df)+1, min_col=1, max_col=len(df.columns)):
                                     for cell in row:
@@ -581,14 +548,9 @@ class ROBBikeProcessor(base):
         TABLE_NAME = 'rob_bike_dataset'
         all_account_numbers = []
         try:
-            if isinstance(file_content, bytes):
-                file_content = io.BytesIO(file_content)
-            
-            xls = pd.ExcelFile(file_content)
-            
-            df = pd.read_excel(
-                xls, 
-                sheet_name=sheet_name,
+            df = self.read_excel_sheet(
+                file_content, 
+                sheet_name,
                 dtype={'Account Number': str}
             )
             df = df.replace('', pd.NA)
@@ -619,14 +581,13 @@ class ROBBikeProcessor(base):
                     df['Account Number'] = df['Account Number'].astype(str).str.strip()
                     account_numbers_list = [str(int(acc)) for acc in df['Account Number'].dropna().unique().tolist()]
                     
-                    batch_size = 100 
-                    existing_accounts = []
-                    for i in range(0, len(account_numbers_list), batch_size):
-                        batch = account_numbers_list[i:i + batch_size]
-                        response = self.supabase.table('rob_bike_dataset').select('*').in_('account_number', batch).execute()
-
-                        if hasattr(response, 'data') and response.data:
-                            existing_accounts.extend([str(item['account_number']) for item in response.data])
+                    lookup = ChunkedLookup(self.supabase, 'rob_bike_dataset', columns='account_number', chunk_size=100)
+                    existing_rows = lookup.fetch('account_number', account_numbers_list)
+                    if lookup.errors:
+                        start, error = lookup.errors[0]
+                        st.error(f"Error checking existing accounts batch {start}: {str(error)}")
+                        return None, None, None
+                    existing_accounts = [str(item['account_number']) for item in existing_rows]
 
                     initial_rows = len(df)
                     df = df[~df['Account Number'].astype(str).isin(existing_accounts)]
@@ -676,7 +637,7 @@ class ROBBikeProcessor(base):
                 all_account_numbers.extend(account_numbers.tolist())
 
                 if 'Contact No.' in cms_endo_df.columns:
-                    cms_endo_df['Contact No.'] = cms_endo_df['Contact No.'].apply(self.clean_phone_number)
+                    cms_endo_df['Contact No.'] = self.clean_phone_numbers(cms_endo_df['Contact No.'])
 
                 if 'BRAND' in cms_endo_df.columns and 'MODEL' in cms_endo_df.columns:
                     cms_endo_df['DESCRIP'] = cms_endo_df.apply(
@@ -710,22 +671,14 @@ class ROBBikeProcessor(base):
 
                 unique_account_numbers = list(dict.fromkeys(all_account_numbers))
                 if unique_account_numbers:
-                    batch_size_for_query = 20
                     chcode_map = {}
+                    account_ids = [str(id).lstrip('0').strip() for id in unique_account_numbers if id is not None and str(id).strip() != '']
                     
-                    for i in range(0, len(unique_account_numbers), batch_size_for_query):
-                        batch_ids = unique_account_numbers[i:i+batch_size_for_query]
-                        batch_ids = [str(id).lstrip('0').strip() for id in batch_ids if id is not None and str(id).strip() != '']
-
-                        if batch_ids:
-                            try:
-                                batch_response = self.supabase.table(TABLE_NAME).select("account_number, chcode").in_("account_number", batch_ids).execute()
-                                if hasattr(batch_response, 'data') and batch_response.data:
-                                    for record in batch_response.data:
-                                        key = str(record['account_number']).strip()
-                                        chcode_map[key] = str(record['chcode']).strip()
-                            except Exception as e:
-                                st.warning(f"Error fetching Ch Code batch {i}: {str(e)}. Continuing...")
+                    lookup = ChunkedLookup(self.supabase, TABLE_NAME, columns="account_number, chcode", chunk_size=20)
+                    for record in lookup.fetch("account_number", account_ids):
+                        chcode_map[str(record['account_number']).strip()] = str(record['chcode']).strip()
+                    for start, error in lookup.errors:
+                        st.warning(f"Error fetching Ch Code batch {start}: {str(error)}. Continuing...")
                                 
                     normalized_account_numbers = cms_endo_df['Account Number'].astype(str).str.lstrip('0').str.strip()
                     
@@ -788,82 +741,17 @@ class ROBBikeProcessor(base):
             return digits
         
     def create_excel_file(self, df):
-        output = io.BytesIO()
-        
-        with pd.ExcelWriter(output, engine='openpyxl') as writer:
-            df.to_excel(writer, index=False, sheet_name='Sheet1')
-
-            workbook = writer.book
-            worksheet = writer.sheets['Sheet1']
-            final_columns = df.columns
-            
-            thin_border = Border(
-                left=Side(style='thin'),
-                right=Side(style='thin'),
-                top=Side(style='thin'),
-                bottom=Side(style='thin')
-            )
-
-            account_col_idx = None
-            maturity_col_idx = None
-            endo_date_col_idx = None
-            
-            for i, col in enumerate(final_columns):
-                col_letter = get_column_letter(i + 1)
-                
-                if col == 'Account Number':
-                    account_col_idx = i + 1
-                elif col == 'Maturity date':
-                    maturity_col_idx = i + 1
-                elif col == 'ENDO DATE':
-                    endo_date_col_idx = i + 1
-                
-                if col in ['Account Number', 'ACCT NAME', 'Endrosement DPD', 'ENDO DATE', 'Endrosement OB', 
-                          'MONTHLY AMORT', 'Maturity date', 'Contact No.', 'DESCRIP']:
-                    max_length = max(
-                        [len(str(cell.value)) if cell.value is not None else 0
-                        for cell in worksheet[col_letter]]
-                    )
-                    adjusted_width = max_length + 2
-                    worksheet.column_dimensions[col_letter].width = adjusted_width
-                
-                if col == 'Contact No.':
-                    for row in range(2, len(df) + 2):
-                        cell = worksheet.cell(row=row, column=i+1)
-                        cell.number_format = '@' 
-                        if cell.value is not None:
-                            cell.value = str(cell.value)
-
-            for row in range(2, len(df) + 2):  
-                if account_col_idx:
-                    cell = worksheet.cell(row=row, column=account_col_idx)
-                    cell.number_format = '@' 
-                    if cell.value is not None:
-                        cell.value = str(cell.value)
-                        
-                if maturity_col_idx:
-                    cell = worksheet.cell(row=row, column=maturity_col_idx)
-                    if cell.value is not None:
-                        try:
-                            date_value = pd.to_datetime(cell.value).strftime("%m/%d/%Y")
-                            cell.value = date_value
-                        except:
-                            pass
-
-                if endo_date_col_idx:
-                    cell = worksheet.cell(row=row, column=endo_date_col_idx)
-                    if cell.value is not None:
-                        try:
-                            date_value = pd.to_datetime(cell.value).strftime("%m/%d/%Y")
-                            cell.value = date_value
-                            cell.number_format = '@'
-                        except:
-                            pass
-
-                for col_idx in range(1, len(final_columns) + 1):
-                        cell = worksheet.cell(row=row, column=col_idx)
-                        cell.border = thin_border
-
-        output.seek(0)
-        return output.getvalue()
+        df, converted_dates = self.format_date_columns(df, ['Maturity date', 'ENDO DATE'])
+        autofit = ['Account Number', 'ACCT NAME', 'Endrosement DPD', 'ENDO DATE', 'Endrosement OB',
+                   'MONTHLY AMORT', 'Maturity date', 'Contact No.', 'DESCRIP']
+
+        columns = {col: ColumnSpec(border=True, autofit=col in autofit) for col in df.columns}
+        for col in ['Account Number', 'Contact No.']:
+            if col in columns:
+                columns[col] = ColumnSpec(text=True, border=True, autofit=True)
+        if 'ENDO DATE' in columns:
+            columns['ENDO DATE'] = ColumnSpec(number_format='@', format_rows=converted_dates['ENDO DATE'],
+                                              border=True, autofit=True)
+
+        return write_xlsx(df, columns)
         
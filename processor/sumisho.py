@@ -1,5 +1,6 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 import os
 import io
 from openpyxl import load_workbook
@@ -11,11 +12,7 @@ class SumishoProcessor(BaseProcessor):
     template_content=None, template_sheet=None, target_column=None):
 
         try:
-            if isinstance(file_content, bytes):
-                file_content = io.BytesIO(file_content)
-                
-            xls = pd.ExcelFile(file_content)
-            df = pd.read_excel(xls, sheet_name=sheet_name)
+            df = self.read_excel_sheet(file_content, sheet_name)
             df = self.clean_data(df, remove_duplicates, remove_blanks, trim_spaces)
 
             if 'Date' not in df.columns or 'Remark' not in df.columns or 'Account No.' not in df.columns:
@@ -27,16 +24,16 @@ class SumishoProcessor(BaseProcessor):
             if 'Time' in df.columns:
                 if pd.api.types.is_object_dtype(df['Time']):
                     try:
-                        df['Time'] = pd.to_datetime(df['Time'], format='%I:%M:%S %p')
+                        df['Time'] = self.parse_dates(df['Time'], formats=("%I:%M:%S %p",), infer=False)
                     except ValueError:
                         pass
                 df = df.sort_values(by='Time', ascending=False)
                 df = df.drop_duplicates(subset='Account No.', keep='first')
                 
-            df['FormattedDate'] = pd.to_datetime(df['Date']).dt.strftime('%m/%d/%Y')
+            df['FormattedDate'] = self.format_dates(df['Date'], errors='raise', na_value=np.nan)
             df['Date_Remark'] = df['FormattedDate'] + ' ' + df['Remark'].astype(str)
             
-            date_report = pd.to_datetime(df['Date']).dt.strftime('%m%d%Y').iloc[0]
+            date_report = self.format_dates(df['Date'].iloc[:1], '%m%d%Y', errors='raise', na_value=np.nan).iloc[0]
             
             account_remark_map = {}
             for idx, row in df.iterrows():
@@ -52,9 +49,7 @@ class SumishoProcessor(BaseProcessor):
                 account_remark_map[account_number.strip()] = value
             
             if preview_only:
-                template_stream = io.BytesIO(template_content)
-                template_xls = pd.ExcelFile(template_stream)
-                template_df = pd.read_excel(template_xls, sheet_name=template_sheet, header=1)
+                template_df = self.read_excel_sheet(template_content, template_sheet, header=1)
                 
                 account_number_col = None
                 for col in template_df.columns:
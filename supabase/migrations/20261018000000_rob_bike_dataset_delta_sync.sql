@@ -0,0 +1,32 @@
+-- Columns the dataset snapshot (utils/dataset_snapshot.py) needs to read rob_bike_dataset
+-- incrementally. Without them every refresh reads the whole table.
+alter table public.rob_bike_dataset
+    add column if not exists updated_at timestamptz not null default now(),
+    add column if not exists content_hash text;
+
+create index if not exists rob_bike_dataset_updated_at_idx
+    on public.rob_bike_dataset (updated_at);
+
+-- Stamp every write on the server, so rows changed by other writers (or by a client whose
+-- clock is off) are still picked up. A write that changes the row without supplying a new
+-- content_hash clears the old one, so the next upload compares that row column by column.
+create or replace function public.rob_bike_dataset_touch()
+returns trigger
+language plpgsql
+as $$
+begin
+    new.updated_at := now();
+    if tg_op = 'UPDATE'
+        and new.content_hash is not distinct from old.content_hash
+        and (to_jsonb(new) - 'updated_at' - 'content_hash') is distinct from (to_jsonb(old) - 'updated_at' - 'content_hash')
+    then
+        new.content_hash := null;
+    end if;
+    return new;
+end;
+$$;
+
+drop trigger if exists rob_bike_dataset_touch on public.rob_bike_dataset;
+create trigger rob_bike_dataset_touch
+    before insert or update on public.rob_bike_dataset
+    for each row execute function public.rob_bike_dataset_touch();
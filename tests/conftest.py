@@ -0,0 +1,14 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.local_backend import LocalSupabaseClient
+
+
+@pytest.fixture
+def local_client(tmp_path):
+    """The SQLite stand-in for Supabase, on a fresh database file."""
+    return LocalSupabaseClient(str(tmp_path / "supabase.db"))
@@ -0,0 +1,80 @@
+import pandas as pd
+import pytest
+
+import utils.account_index
+from utils.account_index import AccountIndex
+from utils.dataset_snapshot import TableSnapshot, utc_now
+
+
+@pytest.fixture
+def make_index(tmp_path, monkeypatch):
+    def make(table_name):
+        snapshot = TableSnapshot(table_name, "test", snapshot_dir=str(tmp_path / "snapshots"))
+        monkeypatch.setattr(utils.account_index, "get_table_snapshot", lambda name: snapshot)
+        return AccountIndex(table_name)
+    return make
+
+
+def dataset_rows(delta):
+    rows = []
+    for i in range(3000):
+        row = {"account_number": str(1000 + i), "chcode": f"CH{i}", "endo_date": "2026-10-01",
+               "stores": None if i % 2 else i, "cluster": 1.5 if i == 1 else None}
+        if delta:
+            row.update(updated_at=utc_now(), content_hash="hash")
+        rows.append(row)
+    return rows
+
+
+def insert(client, rows):
+    for start in range(0, len(rows), 500):
+        client.table("dataset").insert(rows[start:start + 500]).execute()
+
+
+def expected(result):
+    return result.astype(object).where(result.notna(), None).to_dict("records")
+
+
+def test_without_delta_columns_only_the_requested_accounts_are_queried(local_client, make_index):
+    insert(local_client, dataset_rows(delta=False))
+    index = make_index("dataset")
+
+    requests = local_client.requests
+    index.refresh(local_client)
+    result = index.lookup(local_client, ["1000", "1001", "9999"])
+
+    assert local_client.requests - requests <= 3
+    assert index.rebuilds == 0
+    assert expected(result) == [
+        {"found": True, "chcode": "CH0", "endo_date": "2026-10-01", "stores": 0, "cluster": None},
+        {"found": True, "chcode": "CH1", "endo_date": "2026-10-01", "stores": None, "cluster": 1.5},
+        {"found": False, "chcode": None, "endo_date": None, "stores": None, "cluster": None},
+    ]
+
+
+def test_index_keeps_value_types(local_client, make_index):
+    insert(local_client, dataset_rows(delta=True))
+    index = make_index("dataset")
+
+    index.refresh(local_client)
+    requests = local_client.requests
+    result = index.lookup(local_client, ["1002", "1001", "9999"])
+
+    assert index.rebuilds == 1
+    assert local_client.requests == requests
+    records = expected(result)
+    assert records[0] == {"found": True, "chcode": "CH2", "endo_date": "2026-10-01", "stores": 2, "cluster": None}
+    assert type(records[0]["stores"]) is int
+    assert records[1] == {"found": True, "chcode": "CH1", "endo_date": "2026-10-01", "stores": None, "cluster": 1.5}
+    assert records[2]["found"] is False
+
+
+def test_both_paths_agree(local_client, make_index):
+    insert(local_client, dataset_rows(delta=True))
+    accounts = [str(1000 + i) for i in range(0, 3000, 7)] + ["missing"]
+    index = make_index("dataset")
+
+    indexed = index.lookup(local_client, accounts)
+    queried = index._query(local_client, pd.Series(accounts))
+
+    assert expected(indexed) == expected(queried)
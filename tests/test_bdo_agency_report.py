@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from processor.bdo_auto import BDOAutoProcessor
+
+
+def old_fill_system_officers(df):
+    df = df.copy()
+    for i in range(1, len(df)):
+        if df.loc[i, "HANDLING OFFICER2"] == "SYSTEM":
+            df.loc[i, "HANDLING OFFICER2"] = df.loc[i - 1, "HANDLING OFFICER2"]
+    return df["HANDLING OFFICER2"]
+
+
+def old_repeated_complete_ptps(df, mask):
+    ptp_complete_df = df[mask].copy()
+    indices_to_drop = []
+    for pn in ptp_complete_df['PN'].unique():
+        pn_indices = ptp_complete_df[ptp_complete_df['PN'] == pn].index.tolist()
+        if len(pn_indices) > 1:
+            indices_to_drop.extend(pn_indices[:-1])
+    return indices_to_drop
+
+
+def agency_rows(n, seed):
+    rng = np.random.default_rng(seed)
+    officers = rng.choice(np.array(["SYSTEM", "ANA", "BEN", "", None, np.nan], dtype=object), n, p=[.4, .2, .2, .05, .1, .05])
+    return pd.DataFrame({
+        "HANDLING OFFICER2": officers,
+        "PN": rng.choice([f"PN{i}" for i in range(max(1, n // 4))], n),
+        "STATUS4": rng.choice(["PTP", "UNCON"], n),
+        "PTP AMOUNT": np.where(rng.random(n) < .3, np.nan, 100.0),
+        "PTP DATE": np.where(rng.random(n) < .3, None, "10/01/2026").astype(object),
+    })
+
+
+def test_fill_fixture():
+    df = pd.DataFrame({"HANDLING OFFICER2": ["SYSTEM", "ANA", "SYSTEM", "SYSTEM", np.nan, "SYSTEM", "", "SYSTEM", "BEN"]})
+    filled = BDOAutoProcessor.fill_system_officers(df["HANDLING OFFICER2"])
+    assert filled.tolist()[:4] == ["SYSTEM", "ANA", "ANA", "ANA"]
+    assert pd.isna(filled[4]) and pd.isna(filled[5])
+    assert filled.tolist()[6:] == ["", "", "BEN"]
+
+
+@pytest.mark.parametrize("n, seed", [(0, 0), (1, 1), (2, 2), (50, 3), (500, 4), (2000, 5)])
+def test_fill_matches_the_row_loop(n, seed):
+    df = agency_rows(n, seed)
+    expected = old_fill_system_officers(df)
+    pd.testing.assert_series_equal(BDOAutoProcessor.fill_system_officers(df["HANDLING OFFICER2"]), expected, check_names=False)
+
+
+@pytest.mark.parametrize("n, seed", [(1, 1), (2, 2), (50, 3), (500, 4), (2000, 5)])
+def test_dedup_matches_the_per_pn_loop(n, seed):
+    df = agency_rows(n, seed)
+    mask = (df["STATUS4"] == "PTP") & df["PTP AMOUNT"].notna() & df["PTP DATE"].notna()
+    expected = old_repeated_complete_ptps(df, mask)
+    assert sorted(BDOAutoProcessor.repeated_complete_ptps(df, mask).tolist()) == sorted(expected)
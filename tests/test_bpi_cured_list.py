@@ -0,0 +1,59 @@
+import io
+
+import openpyxl
+import pytest
+
+import processor.base
+from processor.bpi_auto_curing import BPIAutoCuringProcessor
+
+HEADER = ["LAN", "COLLECTOR", *[f"COLUMN {col}" for col in range(3, 44)]]
+
+
+@pytest.fixture
+def bpi(monkeypatch, local_client):
+    monkeypatch.setattr(processor.base, "get_supabase_client", lambda: local_client)
+    return BPIAutoCuringProcessor()
+
+
+def cured_list(rows):
+    wb = openpyxl.Workbook()
+    wb.active.title = "CURED"
+    wb.active.append(HEADER)
+    for row in rows:
+        wb.active.append(row)
+    buffer = io.BytesIO()
+    wb.save(buffer)
+    return buffer.getvalue()
+
+
+def sheet_rows(data):
+    return list(openpyxl.load_workbook(io.BytesIO(data)).active.iter_rows(values_only=True))
+
+
+def test_header_only_list_gives_header_only_sheets(bpi):
+    result = bpi.process_cured_list(cured_list([]), "CURED", archive_dir=None)
+
+    assert sheet_rows(result["remarks_binary"]) == [(
+        "LAN", "Action Status", "Remark Date", "PTP Date", "Reason For Default", "Field Visit Date", "Remark",
+        "Next Call Date", "PTP Amount", "Claim Paid Amount", "Remark By", "Phone No.", "Relation", "Claim Paid Date",
+    )]
+    assert sheet_rows(result["others_binary"]) == [("LAN", "REMARK BY")]
+    assert sheet_rows(result["payments_binary"]) == [
+        ("LAN", "ACCOUNT NUMBER", "NAME", "CARD NUMBER", "PAYMENT AMOUNT", "PAYMENT DATE")
+    ]
+    assert result["remarks_df"].empty and result["others_df"].empty and result["payments_df"].empty
+
+
+def test_one_row_list(bpi):
+    row = [None] * 43
+    row[:4] = ["LAN1", "AGENT", "2026-10-01", 1500]
+    row[7] = "PTP"
+    row[41] = "09171234567"
+    result = bpi.process_cured_list(cured_list([row]), "CURED", archive_dir=None)
+
+    remarks = sheet_rows(result["remarks_binary"])[1:]
+    assert [(lan, status) for lan, status, *_ in remarks] == [
+        ("LAN1", "PTP FF UP - CLIENT ANSWERED AND WILL SETTLE"),
+        ("LAN1", "PAYMENT - CURED"),
+    ]
+    assert sheet_rows(result["others_binary"])[1:] == [("LAN1", "AGENT")]
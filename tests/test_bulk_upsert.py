@@ -0,0 +1,63 @@
+import processor.base
+from processor.bdo_auto import BDOAutoProcessor
+from utils.bulk_upsert import bulk_upsert
+
+
+def test_upsert_updates_by_id_and_inserts_new_rows(local_client):
+    local_client.table("dataset").insert([{"account_number": str(i), "chcode": "OLD"} for i in range(3)]).execute()
+    ids = [row["id"] for row in local_client.table("dataset").select("id").order("id").execute().data]
+
+    records = [{"id": ids[0], "account_number": "0", "chcode": "NEW"}, {"id": 100, "account_number": "9", "chcode": "ADDED"}]
+    requests = local_client.requests
+    written, failed = bulk_upsert(local_client, "dataset", records, batch_size=1)
+    assert local_client.requests - requests == 2
+
+    rows = {row["id"]: row for row in local_client.table("dataset").select("*").execute().data}
+    assert (written, failed) == (2, [])
+    assert rows[ids[0]]["chcode"] == "NEW"
+    assert rows[ids[1]]["chcode"] == "OLD"
+    assert rows[100]["chcode"] == "ADDED"
+
+
+def test_upsert_sends_the_last_record_per_key(local_client):
+    records = [{"id": 1, "chcode": "first"}, {"id": 2, "chcode": "other"}, {"id": 1, "chcode": "last"}]
+    written, _ = bulk_upsert(local_client, "dataset", records)
+
+    rows = {row["id"]: row["chcode"] for row in local_client.table("dataset").select("*").execute().data}
+    assert written == 2
+    assert rows == {1: "last", 2: "other"}
+
+
+def test_failed_batch_does_not_stop_the_others(local_client):
+    class FailingSecondBatch:
+        def __init__(self, client):
+            self.client = client
+            self.calls = 0
+
+        def table(self, name):
+            self.calls += 1
+            if self.calls == 2:
+                raise RuntimeError("batch failed")
+            return self.client.table(name)
+
+    records = [{"id": i, "chcode": str(i)} for i in range(1, 6)]
+    written, failed = bulk_upsert(FailingSecondBatch(local_client), "dataset", records, batch_size=2)
+
+    ids = sorted(row["id"] for row in local_client.table("dataset").select("id").execute().data)
+    assert written == 3
+    assert [start for start, _ in failed] == [2]
+    assert ids == [1, 2, 5]
+
+
+def test_saving_a_report_date_again_keeps_one_row_and_its_created_at(local_client, monkeypatch):
+    monkeypatch.setattr(processor.base, "get_supabase_client", lambda: local_client)
+    bdo = BDOAutoProcessor()
+
+    assert bdo.save_bdo_auto_data(1, 10.0, 100.0, 2, 20.0, 200.0, report_date="2026-10-01")
+    first = local_client.table("bdo_autoloan_inputset").select("*").execute().data
+    assert bdo.save_bdo_auto_data(3, 30.0, 300.0, 4, 40.0, 400.0, report_date="2026-10-01")
+    rows = local_client.table("bdo_autoloan_inputset").select("*").execute().data
+
+    assert len(rows) == 1
+    assert rows[0]["kept_count_b5"] == 3
+    assert rows[0]["created_at"] == first[0]["created_at"]
@@ -0,0 +1,48 @@
+from utils.chunked_lookup import ChunkedLookup
+
+
+class RecordingClient:
+    """Passes queries through to the stand-in and records the order() of each one."""
+
+    def __init__(self, client):
+        self.client = client
+        self.orders = []
+
+    def table(self, name):
+        return RecordingQuery(self.client.table(name), self.orders)
+
+
+class RecordingQuery:
+    def __init__(self, query, orders):
+        self.query = query
+        self.orders = orders
+        self.ordered_by = None
+
+    def order(self, column, **kwargs):
+        self.ordered_by = column
+        self.query = self.query.order(column, **kwargs)
+        return self
+
+    def execute(self):
+        self.orders.append(self.ordered_by)
+        return self.query.execute()
+
+    def __getattr__(self, name):
+        def call(*args, **kwargs):
+            self.query = getattr(self.query, name)(*args, **kwargs)
+            return self
+        return call
+
+
+def test_pages_return_every_row_once_in_a_stable_order(local_client):
+    rows = [{"chcode": f"CH{i % 5}", "status": str(i)} for i in range(60)]
+    local_client.table("field_result").insert(rows).execute()
+    client = RecordingClient(local_client)
+
+    lookup = ChunkedLookup(client, "field_result", columns="id,chcode,status", chunk_size=2, page_size=7)
+    fetched = lookup.fetch("chcode", [f"CH{i}" for i in range(5)])
+
+    assert sorted(row["id"] for row in fetched) == list(range(1, 61))
+    assert lookup.errors == []
+    assert lookup.requests == len(client.orders)
+    assert set(client.orders) == {"id"}
@@ -0,0 +1,53 @@
+import os
+import stat
+
+import pytest
+
+import utils.dataset_snapshot
+from utils.dataset_snapshot import TableSnapshot, utc_now
+
+
+@pytest.fixture
+def warnings(monkeypatch):
+    shown = []
+    monkeypatch.setattr(utils.dataset_snapshot.st, "warning", shown.append)
+    monkeypatch.setattr(utils.dataset_snapshot, "get_script_run_ctx", lambda suppress_warning=False: object())
+    return shown
+
+
+def insert_rows(client, chcodes):
+    rows = [{"account_number": str(i), "chcode": chcode, "updated_at": utc_now(), "content_hash": "hash"}
+            for i, chcode in enumerate(chcodes)]
+    client.table("dataset").insert(rows).execute()
+
+
+def test_snapshot_is_saved_privately_and_reloaded(local_client, tmp_path, warnings):
+    insert_rows(local_client, ["A", "B"])
+    snapshot_dir = tmp_path / "snapshots"
+    TableSnapshot("dataset", "test", snapshot_dir=str(snapshot_dir)).refresh(local_client)
+
+    assert stat.S_IMODE(os.stat(snapshot_dir).st_mode) == 0o700
+    reloaded = TableSnapshot("dataset", "test", snapshot_dir=str(snapshot_dir))
+    assert sorted(reloaded.df["chcode"]) == ["A", "B"]
+    assert reloaded.watermark is not None
+    assert warnings == []
+
+
+def test_save_failures_are_reported_once(local_client, tmp_path, warnings):
+    insert_rows(local_client, ["A", 1])
+    snapshot = TableSnapshot("dataset", "test", snapshot_dir=str(tmp_path / "snapshots"))
+
+    assert len(snapshot.refresh(local_client)) == 2
+    assert len(snapshot.refresh(local_client)) == 2
+    assert len(warnings) == 1
+    assert warnings[0].startswith("Could not save the dataset snapshot")
+    assert not os.path.exists(snapshot.path)
+
+
+def test_unwritable_snapshot_dir_is_reported(local_client, tmp_path, warnings):
+    insert_rows(local_client, ["A"])
+    (tmp_path / "file").write_text("")
+    snapshot = TableSnapshot("dataset", "test", snapshot_dir=str(tmp_path / "file" / "snapshots"))
+
+    assert len(snapshot.refresh(local_client)) == 1
+    assert len(warnings) == 1 and warnings[0].startswith("Could not save the dataset snapshot")
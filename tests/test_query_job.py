@@ -0,0 +1,28 @@
+from streamlit.testing.v1 import AppTest
+
+
+def snapshot_check_in_a_job(db_path, snapshot_dir):
+    from utils.data_access import QueryJob
+    from utils.dataset_snapshot import TableSnapshot
+    from utils.local_backend import LocalSupabaseClient
+
+    client = LocalSupabaseClient(db_path)
+    client.table("dataset").insert([{"account_number": "1", "chcode": "A"}]).execute()
+    snapshot = TableSnapshot("dataset", "test", snapshot_dir=snapshot_dir)
+
+    job = QueryJob("test")
+    job.run(job.gather(delta=(snapshot.check_delta, client)))
+
+
+def test_warnings_from_worker_threads_reach_the_page(tmp_path):
+    app = AppTest.from_function(
+        snapshot_check_in_a_job,
+        kwargs={"db_path": str(tmp_path / "supabase.db"), "snapshot_dir": str(tmp_path / "snapshots")},
+    )
+    app.run()
+
+    assert not app.exception
+    assert [warning.value for warning in app.warning] == [
+        "dataset has no updated_at/content_hash columns, so it is read in full on every refresh. "
+        "Apply the migration in supabase/migrations to enable delta sync."
+    ]
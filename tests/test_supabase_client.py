@@ -0,0 +1,25 @@
+import utils.supabase_client
+from utils.local_backend import LocalSupabaseClient
+from utils.supabase_client import SupabaseClientFactory
+
+
+def test_local_backend_requests_are_counted_apart(monkeypatch, tmp_path):
+    class TestDatabase(LocalSupabaseClient):
+        def __init__(self):
+            super().__init__(str(tmp_path / "supabase.db"))
+
+    monkeypatch.setattr(utils.supabase_client, "SUPABASE_BACKEND", "local")
+    monkeypatch.setattr(utils.supabase_client, "LocalSupabaseClient", TestDatabase)
+    factory = SupabaseClientFactory(None, None)
+
+    client = factory.client()
+    client.table("dataset").insert([{"account_number": "1"}]).execute()
+    client.table("dataset").select("*").execute()
+
+    assert factory.metrics() == {
+        "requests": 0,
+        "connections_opened": 0,
+        "connections_reused": 0,
+        "local_requests": client.requests,
+    }
+    assert client.requests >= 2
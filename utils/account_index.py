@@ -0,0 +1,198 @@
+import os
+import shutil
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from utils.chunked_lookup import ChunkedLookup
+from utils.dataset_snapshot import get_table_snapshot, private_dir
+
+ACCOUNT_INDEX_COLUMNS = ("chcode", "endo_date", "stores", "cluster")
+# How long the index is used without checking the database for changes. The app's own
+# dataset uploads invalidate it, so this only bounds staleness from other writers.
+ACCOUNT_INDEX_MAX_AGE = 300
+
+
+class AccountIndex:
+    """
+    account_number -> chcode, endo_date, stores, cluster for a dataset table, kept on disk
+    as sorted .npy arrays and opened memory-mapped, so enrichment is a binary search
+    instead of a query. It is rebuilt from the table's TableSnapshot, which only fetches
+    changed rows. Each field keeps its type: whole-number columns come back as int, other
+    numbers as float and everything else as str, with None where the value is missing.
+    When an account number appears more than once, the row with the highest id wins.
+
+    A table without delta sync would have to be read in full for every rebuild, so for
+    those lookups go to the database with chunked `in_` queries for just the accounts
+    asked for, as before the index existed.
+    """
+
+    def __init__(self, table_name, max_age=ACCOUNT_INDEX_MAX_AGE):
+        self.table_name = table_name
+        self.snapshot = get_table_snapshot(table_name)
+        self.path = os.path.splitext(self.snapshot.path)[0] + "-accounts"
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._arrays = None
+        self._checked_at = None
+        self._built_rows = None
+        self._use_index = False
+        self.rebuilds = 0
+        self._open()
+
+    def lookup(self, client, account_numbers):
+        """
+        DataFrame aligned with `account_numbers` with a `found` flag and one column per
+        indexed field (None where the account is unknown or the value is missing).
+        """
+        keys = pd.Series(account_numbers).astype(str).str.strip()
+        arrays = self._fresh_arrays(client)
+        if arrays is None:
+            return self._query(client, keys)
+
+        index = keys.index
+        sorted_accounts = arrays["account_number"]
+        encoded = keys.str.encode("utf-8")
+        # Casting to the index's fixed width would truncate longer keys into false matches.
+        fits = (encoded.str.len() <= sorted_accounts.dtype.itemsize).to_numpy()
+        keys = np.array(encoded.where(fits, b"").tolist(), dtype=sorted_accounts.dtype)
+
+        found = np.zeros(len(keys), dtype=bool)
+        positions = np.zeros(len(keys), dtype=np.intp)
+        if len(sorted_accounts):
+            positions = np.minimum(np.searchsorted(sorted_accounts, keys), len(sorted_accounts) - 1)
+            found = (sorted_accounts[positions] == keys) & fits
+
+        result = pd.DataFrame({"found": found}, index=index)
+        for column in ACCOUNT_INDEX_COLUMNS:
+            values = np.full(len(keys), None, dtype=object)
+            hits = positions[found]
+            if len(hits):
+                stored = arrays[column][hits]
+                decoded = np.char.decode(stored, "utf-8").tolist() if stored.dtype.kind == "S" else stored.tolist()
+                decoded = [None if missing else value for value, missing in zip(decoded, arrays[f"{column}.missing"][hits])]
+                values[found] = decoded
+            result[column] = values
+        return result
+
+    def refresh(self, client):
+        """Bring the index up to date now, so a later lookup does not wait on the database."""
+        self._fresh_arrays(client)
+
+    def invalidate(self):
+        with self._lock:
+            self._checked_at = None
+
+    def _query(self, client, keys):
+        lookup = ChunkedLookup(client, self.table_name, columns=",".join(("id", "account_number", *ACCOUNT_INDEX_COLUMNS)))
+        rows = lookup.fetch("account_number", keys.tolist())
+        if lookup.errors:
+            raise lookup.errors[0][1]
+
+        # dtype=object keeps the values as the API returned them (no int -> float for NULLs).
+        df = pd.DataFrame(rows, columns=["id", "account_number", *ACCOUNT_INDEX_COLUMNS], dtype=object)
+        df["account_number"] = df["account_number"].astype(str).str.strip()
+        df = df.sort_values("id", kind="stable").drop_duplicates(subset="account_number", keep="last")
+        df = df.set_index("account_number")
+
+        found = keys.isin(df.index).to_numpy()
+        result = pd.DataFrame({"found": found}, index=keys.index)
+        for column in ACCOUNT_INDEX_COLUMNS:
+            values = df[column].reindex(keys.to_numpy()).to_numpy(dtype=object)
+            values[~found | pd.isna(values)] = None
+            result[column] = values
+        return result
+
+    def _fresh_arrays(self, client):
+        with self._lock:
+            now = time.monotonic()
+            if self._checked_at is not None and now - self._checked_at < self.max_age:
+                return self._arrays if self._use_index else None
+
+            self._use_index = self.snapshot.check_delta(client)
+            if self._use_index:
+                df = self.snapshot.refresh(client)
+                if self._arrays is None or self.snapshot.rows_fetched or len(df) != self._built_rows:
+                    self._build(df)
+                    self._built_rows = len(df)
+            self._checked_at = now
+            return self._arrays if self._use_index else None
+
+    @staticmethod
+    def _encode(values):
+        """
+        (array, missing mask) for one field. Numbers are stored as int64 when they are all
+        whole (a nullable int column arrives as float) and as float64 otherwise.
+        """
+        missing = values.isna().to_numpy()
+        present = values[~missing].tolist()
+        is_number = lambda v: isinstance(v, (int, float, np.integer, np.floating)) and not isinstance(v, (bool, np.bool_))
+        if present and all(is_number(v) for v in present):
+            filled = values.astype(object).where(~missing, 0).tolist()
+            if all(float(v).is_integer() for v in present):
+                return np.array([int(v) for v in filled], dtype=np.int64), missing
+            return np.array(filled, dtype=float), missing
+
+        text = values.astype(object).where(~missing, "").astype(str).str.encode("utf-8").tolist()
+        return (np.array(text, dtype=bytes) if text else np.array([], dtype="S1")), missing
+
+    def _build(self, df):
+        if df.empty or "account_number" not in df.columns:
+            df = pd.DataFrame(columns=["id", "account_number", *ACCOUNT_INDEX_COLUMNS])
+        if "id" in df.columns:
+            df = df.sort_values("id", kind="stable")
+
+        keys = df["account_number"].astype(str).str.strip()
+        df = df.assign(account_number=keys).drop_duplicates(subset="account_number", keep="last")
+        df = df.sort_values("account_number", kind="stable")
+
+        encoded = df["account_number"].str.encode("utf-8").tolist()
+        arrays = {"account_number": np.array(encoded, dtype=bytes) if encoded else np.array([], dtype="S1")}
+        for column in ACCOUNT_INDEX_COLUMNS:
+            values = df[column] if column in df.columns else pd.Series(None, index=df.index, dtype=object)
+            arrays[column], arrays[f"{column}.missing"] = self._encode(values)
+
+        # Every build goes to a new directory and CURRENT is switched to it afterwards, so
+        # files that are still memory-mapped are never overwritten (Windows refuses that).
+        version = str(time.time_ns())
+        try:
+            private_dir(os.path.dirname(self.path))
+            private_dir(self.path)
+            os.makedirs(os.path.join(self.path, version), exist_ok=True)
+            for column, array in arrays.items():
+                np.save(os.path.join(self.path, version, f"{column}.npy"), array)
+            with open(os.path.join(self.path, "CURRENT.tmp"), "w") as f:
+                f.write(version)
+            os.replace(os.path.join(self.path, "CURRENT.tmp"), os.path.join(self.path, "CURRENT"))
+        except OSError:
+            self._arrays = arrays
+            self.rebuilds += 1
+            return
+
+        self.rebuilds += 1
+        self._open()
+        for name in os.listdir(self.path):
+            if name not in (version, "CURRENT"):
+                shutil.rmtree(os.path.join(self.path, name), ignore_errors=True)
+
+    def _open(self):
+        names = ["account_number"]
+        for column in ACCOUNT_INDEX_COLUMNS:
+            names += [column, f"{column}.missing"]
+        try:
+            with open(os.path.join(self.path, "CURRENT")) as f:
+                version = f.read().strip()
+            self._arrays = {
+                name: np.load(os.path.join(self.path, version, f"{name}.npy"), mmap_mode="r")
+                for name in names
+            }
+        except (OSError, ValueError):
+            self._arrays = None
+
+
+@st.cache_resource
+def get_account_index(table_name="rob_bike_dataset"):
+    return AccountIndex(table_name)
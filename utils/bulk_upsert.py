@@ -0,0 +1,36 @@
+UPSERT_BATCH_SIZE = 500
+
+
+def bulk_upsert(client, table_name, records, on_conflict="id", batch_size=UPSERT_BATCH_SIZE, on_batch=None):
+    """
+    Write `records` to `table_name` as INSERT ... ON CONFLICT (on_conflict) DO UPDATE, in
+    batches of `batch_size` requests instead of one request per row.
+
+    Postgres rejects a statement that touches the same row twice, so only the last record
+    per conflict key is sent, which is what applying them one by one used to leave behind.
+    A failing batch does not stop the others. Returns (rows written, [(batch start, error)]).
+    `on_batch(done, total)` is called after each batch, e.g. to move a progress bar.
+    """
+    key_columns = [col.strip() for col in on_conflict.split(",")]
+    latest = {}
+    for record in records:
+        key = tuple(record.get(col) for col in key_columns)
+        latest.pop(key, None)
+        latest[key] = record
+    records = list(latest.values())
+
+    written = 0
+    failed_batches = []
+    for start in range(0, len(records), batch_size):
+        batch = records[start:start + batch_size]
+        try:
+            response = client.table(table_name).upsert(batch, on_conflict=on_conflict).execute()
+            if hasattr(response, 'data') and response.data:
+                written += len(batch)
+        except Exception as e:
+            failed_batches.append((start, e))
+
+        if on_batch:
+            on_batch(min(start + batch_size, len(records)), len(records))
+
+    return written, failed_batches
@@ -0,0 +1,99 @@
+import asyncio
+import threading
+import time
+
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+
+
+class QueryJob:
+    """
+    Database calls of one processing job, run with asyncio so independent queries
+    overlap instead of running one after another in the script thread. The Supabase
+    client is synchronous, so each call runs on a worker thread (the pooled httpx
+    client is safe to share). Worker threads get the script's run context, so st calls
+    made inside them (warnings, progress) still reach the page. Every call is timed as
+    a span; `after` names the spans whose results it needed, which is what the
+    critical path follows.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.spans = {}
+        self._lock = threading.Lock()
+        self._started = time.perf_counter()
+
+    async def call(self, name, fn, *args, after=(), **kwargs):
+        """`fn(*args, **kwargs)` on a worker thread, timed as span `name`."""
+        ctx = get_script_run_ctx(suppress_warning=True)
+
+        def in_script_context():
+            if ctx is not None:
+                add_script_run_ctx(threading.current_thread(), ctx)
+            return fn(*args, **kwargs)
+
+        start = time.perf_counter()
+        try:
+            return await asyncio.to_thread(in_script_context)
+        finally:
+            self._record(name, start, after)
+
+    async def execute(self, name, query, after=()):
+        """A PostgREST query builder's execute(), timed as span `name`."""
+        return await self.call(name, query.execute, after=after)
+
+    async def gather(self, **calls):
+        """
+        Run independent calls concurrently. Each keyword is a span name mapped to a
+        (fn, *args) tuple; results come back as a dict under the same names.
+        """
+        results = await asyncio.gather(*(self.call(name, *call) for name, call in calls.items()))
+        return dict(zip(calls, results))
+
+    def run(self, coro):
+        """Drive `coro` to completion from synchronous processor code."""
+        return asyncio.run(coro)
+
+    def run_sync(self, name, fn, *args, after=(), **kwargs):
+        """A single call from synchronous code, timed like the concurrent ones."""
+        return self.run(self.call(name, fn, *args, after=after, **kwargs))
+
+    def critical_path(self):
+        """
+        Spans on the chain that decided how long the job waited on the database:
+        from the span that finished last, back through whichever dependency
+        finished last, in start order.
+        """
+        with self._lock:
+            spans = dict(self.spans)
+        if not spans:
+            return []
+
+        path = []
+        name = max(spans, key=lambda n: spans[n]["end"])
+        while name is not None:
+            path.append(name)
+            dependencies = [d for d in spans[name]["after"] if d in spans and d not in path]
+            name = max(dependencies, key=lambda n: spans[n]["end"]) if dependencies else None
+        return path[::-1]
+
+    def summary(self):
+        with self._lock:
+            spans = dict(self.spans)
+        path = self.critical_path()
+        query_time = sum(span["end"] - span["start"] for span in spans.values())
+        path_time = sum(spans[name]["end"] - spans[name]["start"] for name in path)
+        steps = " → ".join(f"{name} {spans[name]['end'] - spans[name]['start']:.2f}s" for name in path)
+        return (
+            f"{self.name}: {len(spans)} database calls, {query_time:.2f}s of query time, "
+            f"{path_time:.2f}s on the critical path ({steps or 'none'}), "
+            f"{time.perf_counter() - self._started:.2f}s elapsed."
+        )
+
+    def _record(self, name, start, after):
+        end = time.perf_counter()
+        with self._lock:
+            self.spans[name] = {
+                "start": start - self._started,
+                "end": end - self._started,
+                "after": tuple([after] if isinstance(after, str) else after),
+            }
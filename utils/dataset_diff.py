@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+
+
+class DatasetDiff:
+    """
+    Insert/update/delete sets for syncing an uploaded dataset into a table keyed on `key`.
+
+    A new record whose key is not in the table is an insert. One whose key is there is
+    an update (carrying the id of the first existing row with that key) when any shared
+    column differs after str().strip() on both sides; otherwise it is left alone. With
+    `find_deletes`, ids of existing rows whose key is not in the upload are the deletes.
+    With `hash_col`, rows whose existing copy carries a content hash are compared by
+    hash alone; rows without one fall back to the column comparison.
+    """
+
+    def __init__(self, new_df, existing_df, key="account_number", id_col="id", find_deletes=False, hash_col=None):
+        self.key = key
+        self.id_col = id_col
+        self.records_to_insert = []
+        self.records_to_update = []
+        self.ids_to_delete = []
+
+        new_df = new_df.astype(object).where(pd.notnull(new_df), None)
+        new_df[key] = new_df[key].astype(str).str.strip()
+
+        if existing_df is None or existing_df.empty:
+            self.records_to_insert = new_df.to_dict(orient="records")
+            return
+
+        existing_df = existing_df.copy()
+        existing_df[key] = existing_df[key].astype(str).str.strip()
+        first_existing = existing_df.drop_duplicates(subset=key, keep="first").reset_index(drop=True)
+
+        positions = pd.Index(first_existing[key]).get_indexer(new_df[key])
+        matched = positions >= 0
+        matched_positions = positions[matched]
+
+        column_changed = np.zeros(len(matched_positions), dtype=bool)
+        for col in new_df.columns:
+            if col not in first_existing.columns or col == hash_col:
+                continue
+            new_values = self._normalize(new_df[col])[matched]
+            existing_values = self._normalize(first_existing[col])[matched_positions]
+            column_changed |= new_values != existing_values
+
+        changed = np.zeros(len(new_df), dtype=bool)
+        if hash_col is not None and hash_col in new_df.columns and hash_col in first_existing.columns:
+            existing_hashes = first_existing[hash_col].to_numpy()[matched_positions]
+            new_hashes = new_df[hash_col].to_numpy()[matched]
+            changed[matched] = np.where(pd.notnull(existing_hashes), new_hashes != existing_hashes, column_changed)
+        else:
+            changed[matched] = column_changed
+
+        self.records_to_insert = new_df[~matched].to_dict(orient="records")
+
+        updated = matched & changed
+        update_df = new_df[updated].copy()
+        update_df[id_col] = first_existing[id_col].to_numpy()[positions[updated]]
+        self.records_to_update = update_df.to_dict(orient="records")
+
+        if find_deletes:
+            stale = ~existing_df[key].isin(set(new_df[key]))
+            self.ids_to_delete = existing_df.loc[stale, id_col].tolist()
+
+    @staticmethod
+    def _normalize(values):
+        return values.astype(object).astype(str).str.strip().to_numpy()
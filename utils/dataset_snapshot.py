@@ -0,0 +1,220 @@
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime, timedelta, timezone
+
+import pandas as pd
+import pyarrow as pa
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+from utils.chunked_lookup import ChunkedLookup
+from utils.local_backend import LOCAL_DB_PATH
+from utils.supabase_client import SUPABASE_BACKEND, SUPABASE_URL
+
+# Snapshots hold the full customer dataset, so they live in a directory only this user can open.
+SNAPSHOT_DIR = os.getenv("SNAPSHOT_DIR", os.path.join(os.path.expanduser("~"), ".pip_automation", "snapshots"))
+SNAPSHOT_PAGE_SIZE = 1000
+# Rows are re-read from a little before the watermark so writes stamped by a client
+# whose clock runs behind, or committed after the last refresh, are not skipped.
+WATERMARK_SLACK = timedelta(minutes=5)
+
+
+def row_hashes(df, columns):
+    """Content hash per row of `columns`, over the same str().strip() form DatasetDiff compares."""
+    if df.empty:
+        return pd.Series([], index=df.index, dtype=object)
+    joined = df[columns[0]].astype(object).astype(str).str.strip()
+    for col in columns[1:]:
+        joined = joined + "\x1f" + df[col].astype(object).astype(str).str.strip()
+    return pd.Series(
+        [hashlib.blake2b(value.encode("utf-8"), digest_size=16).hexdigest() for value in joined],
+        index=df.index,
+        dtype=object,
+    )
+
+
+def private_dir(path):
+    """Create `path` if needed and make it readable and writable by the owner only."""
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    os.chmod(path, 0o700)
+    return path
+
+
+def utc_now():
+    return datetime.now(timezone.utc).isoformat()
+
+
+class TableSnapshot:
+    """
+    Local copy of a table kept current with delta reads. The first refresh pages the
+    whole table; later ones only fetch rows whose `updated_at` is at or after the
+    watermark (when the previous refresh started) and merge them in by id. Deletes and
+    writes that did not stamp `updated_at` show up as a row count mismatch, which
+    triggers an id-only sweep. Tables without `updated_at` and `content_hash` columns
+    (see supabase/migrations) are read in full every time, as before. The snapshot is
+    kept under SNAPSHOT_DIR as parquet with a JSON watermark, so it survives restarts.
+    """
+
+    def __init__(self, table_name, source="", id_col="id", watermark_col="updated_at", hash_col="content_hash",
+                 snapshot_dir=SNAPSHOT_DIR):
+        self.table_name = table_name
+        self.id_col = id_col
+        self.watermark_col = watermark_col
+        self.hash_col = hash_col
+        # Keyed by the database too, so a snapshot of one project is never diffed against another.
+        source_digest = hashlib.blake2b(source.encode("utf-8"), digest_size=6).hexdigest()
+        self.path = os.path.join(snapshot_dir, f"{table_name}-{source_digest}.parquet")
+        self.watermark_path = os.path.splitext(self.path)[0] + ".json"
+        self._lock = threading.Lock()
+        self.df = None
+        self.watermark = None
+        self.supports_delta = False
+        self._warned = set()
+        self.requests = 0
+        self.rows_fetched = 0
+        self._load()
+
+    def refresh(self, client, on_progress=None):
+        """
+        Bring the snapshot up to date and return a copy of it. `on_progress(fraction)`
+        is called while pages come in.
+        """
+        with self._lock:
+            self.requests = 0
+            self.rows_fetched = 0
+            started = datetime.now(timezone.utc)
+
+            self._check_delta(client)
+            if not self.supports_delta or self.df is None:
+                total = self._count(client)
+                self.df = self._frame(self._fetch_pages(client, None, total, on_progress))
+            else:
+                since = (self.watermark - WATERMARK_SLACK).isoformat() if self.watermark is not None else None
+                delta = self._frame(self._fetch_pages(client, since, None, on_progress))
+                if not delta.empty:
+                    self.df = pd.concat([self.df, delta], ignore_index=True)
+                    self.df = self.df.drop_duplicates(subset=self.id_col, keep="last").reset_index(drop=True)
+
+                total = self._count(client)
+                if total is not None and total != len(self.df):
+                    self._sweep(client)
+
+            if self.supports_delta:
+                self.watermark = started
+                self._save()
+            return self.df.copy()
+
+    def check_delta(self, client):
+        """Whether the table has the columns for delta reads (one single-row request)."""
+        with self._lock:
+            return self._check_delta(client)
+
+    def _check_delta(self, client):
+        sample = self._execute(client.table(self.table_name).select("*").limit(1))
+        columns = set(sample.data[0]) if sample.data else set()
+        self.supports_delta = {self.watermark_col, self.hash_col} <= columns
+        if columns and not self.supports_delta:
+            self._warn_once(
+                "delta",
+                f"{self.table_name} has no {self.watermark_col}/{self.hash_col} columns, so it is read in full "
+                "on every refresh. Apply the migration in supabase/migrations to enable delta sync."
+            )
+        return self.supports_delta
+
+    def _warn_once(self, kind, message):
+        if kind in self._warned:
+            return
+        st.warning(message)
+        # Only a call with a script run context reaches the page; keep trying until one does.
+        if get_script_run_ctx(suppress_warning=True) is not None:
+            self._warned.add(kind)
+
+    def _count(self, client):
+        try:
+            response = self._execute(client.table(self.table_name).select(self.id_col, count="exact").limit(1))
+            return response.count
+        except Exception:
+            return None
+
+    def _fetch_pages(self, client, since, total, on_progress):
+        rows = []
+        offset = 0
+        while True:
+            query = client.table(self.table_name).select("*")
+            if since is not None:
+                query = query.gte(self.watermark_col, since)
+            query = query.order(self.id_col).range(offset, offset + SNAPSHOT_PAGE_SIZE - 1)
+
+            page = self._execute(query).data or []
+            rows.extend(page)
+            self.rows_fetched += len(page)
+            if on_progress and total:
+                on_progress(min(1.0, len(rows) / total))
+            if len(page) < SNAPSHOT_PAGE_SIZE:
+                return rows
+            offset += SNAPSHOT_PAGE_SIZE
+
+    def _sweep(self, client):
+        ids = set()
+        offset = 0
+        while True:
+            query = client.table(self.table_name).select(self.id_col).order(self.id_col)
+            page = self._execute(query.range(offset, offset + SNAPSHOT_PAGE_SIZE - 1)).data or []
+            ids.update(row[self.id_col] for row in page)
+            if len(page) < SNAPSHOT_PAGE_SIZE:
+                break
+            offset += SNAPSHOT_PAGE_SIZE
+
+        self.df = self.df[self.df[self.id_col].isin(ids)].reset_index(drop=True)
+        missing = list(ids - set(self.df[self.id_col]))
+        if missing:
+            lookup = ChunkedLookup(client, self.table_name)
+            fetched = lookup.fetch(self.id_col, missing)
+            self.requests += lookup.requests
+            self.rows_fetched += len(fetched)
+            self.df = pd.concat([self.df, self._frame(fetched)], ignore_index=True)
+
+    def _execute(self, query):
+        self.requests += 1
+        return query.execute()
+
+    def _frame(self, rows):
+        df = pd.DataFrame(rows)
+        if df.empty and self.df is not None:
+            return self.df.iloc[0:0].copy()
+        return df
+
+    def _load(self):
+        try:
+            with open(self.watermark_path) as f:
+                saved = json.load(f)
+            self.df = pd.read_parquet(self.path)
+            self.watermark = datetime.fromisoformat(saved["watermark"])
+        except Exception:
+            self.df = None
+            self.watermark = None
+
+    def _save(self):
+        # The parquet file is replaced before the watermark, so a crash in between leaves an
+        # older watermark with newer rows, which only means re-reading a few rows.
+        try:
+            private_dir(os.path.dirname(self.path))
+            self.df.to_parquet(self.path + ".tmp", index=False)
+            os.replace(self.path + ".tmp", self.path)
+            with open(self.watermark_path + ".tmp", "w") as f:
+                json.dump({"watermark": self.watermark.isoformat()}, f)
+            os.replace(self.watermark_path + ".tmp", self.watermark_path)
+        except (OSError, pa.ArrowException) as e:
+            self._warn_once(
+                "save",
+                f"Could not save the {self.table_name} snapshot to {self.path} ({str(e)}), so the next "
+                "start reads the whole table again."
+            )
+
+
+@st.cache_resource
+def get_table_snapshot(table_name):
+    source = LOCAL_DB_PATH if SUPABASE_BACKEND == "local" else (SUPABASE_URL or "")
+    return TableSnapshot(table_name, source=f"{SUPABASE_BACKEND}:{source}")
@@ -0,0 +1,283 @@
+import os
+import sqlite3
+import threading
+import time
+
+from postgrest.exceptions import APIError
+
+LOCAL_DB_PATH = os.getenv("LOCAL_SUPABASE_PATH", "local_supabase.db")
+LOCAL_LATENCY_MS = float(os.getenv("LOCAL_SUPABASE_LATENCY_MS", "0"))
+LOCAL_MAX_ROWS = int(os.getenv("LOCAL_SUPABASE_MAX_ROWS", "1000"))
+
+
+class LocalResponse:
+    def __init__(self, data, count=None):
+        self.data = data
+        self.count = count
+
+
+class LocalSupabaseClient:
+    """
+    Offline stand-in for the Supabase client, backed by SQLite. It implements the
+    PostgREST subset this app uses (select/eq/neq/gt/gte/lt/lte/in_/order/limit/range,
+    insert/update/upsert/delete, count="exact") with the same response shape and
+    APIError type. Tables and columns are created on first write (a table never written
+    reads as empty), filtered and conflict columns get an index on first use, every
+    table has an auto-increment `id`, and responses are capped at `max_rows` like the
+    real server.
+    `latency_ms` is slept on every request so throughput can be measured reproducibly.
+    """
+
+    def __init__(self, path=LOCAL_DB_PATH, latency_ms=LOCAL_LATENCY_MS, max_rows=LOCAL_MAX_ROWS):
+        self.latency = latency_ms / 1000.0
+        self.max_rows = max_rows
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+
+    def table(self, table_name):
+        return LocalQuery(self, table_name)
+
+    def rpc(self, fn, params=None):
+        return LocalQuery(self, None, rpc=fn)
+
+    def _columns(self, table_name):
+        rows = self._conn.execute(f"PRAGMA table_info({_quote(table_name)})").fetchall()
+        return [row["name"] for row in rows]
+
+    def _ensure_columns(self, table_name, columns):
+        existing = self._columns(table_name)
+        if not existing:
+            self._conn.execute(f"CREATE TABLE {_quote(table_name)} (id INTEGER PRIMARY KEY AUTOINCREMENT)")
+            existing = ["id"]
+        for column in columns:
+            if column not in existing:
+                self._conn.execute(f"ALTER TABLE {_quote(table_name)} ADD COLUMN {_quote(column)}")
+                existing.append(column)
+
+    def _ensure_index(self, table_name, columns):
+        name = "idx_" + "_".join([table_name] + list(columns)).replace('"', "")
+        self._conn.execute(
+            f"CREATE INDEX IF NOT EXISTS {_quote(name)} ON {_quote(table_name)} ({', '.join(_quote(c) for c in columns)})"
+        )
+
+    def _run(self, query):
+        if self.latency:
+            time.sleep(self.latency)
+
+        with self._lock:
+            self.requests += 1
+            if query.rpc is not None:
+                return LocalResponse(None)
+            try:
+                with self._conn:
+                    return query._run_locked()
+            except sqlite3.Error as e:
+                raise APIError({"message": str(e), "code": "LOCAL", "hint": None, "details": None})
+
+
+class LocalQuery:
+    def __init__(self, client, table_name, rpc=None):
+        self.client = client
+        self.table_name = table_name
+        self.rpc = rpc
+        self.operation = "select"
+        self.columns = "*"
+        self.count = None
+        self.payload = None
+        self.on_conflict = None
+        self.filters = []
+        self.ordering = []
+        self.row_limit = None
+        self.row_offset = 0
+
+    def select(self, *columns, count=None):
+        self.operation = "select"
+        self.columns = ",".join(columns) if columns else "*"
+        self.count = count
+        return self
+
+    def insert(self, payload):
+        self.operation = "insert"
+        self.payload = payload
+        return self
+
+    def upsert(self, payload, on_conflict="id"):
+        self.operation = "upsert"
+        self.payload = payload
+        self.on_conflict = [column.strip() for column in on_conflict.split(",")]
+        return self
+
+    def update(self, payload):
+        self.operation = "update"
+        self.payload = payload
+        return self
+
+    def delete(self):
+        self.operation = "delete"
+        return self
+
+    def eq(self, column, value):
+        return self._filter(column, "=", value)
+
+    def neq(self, column, value):
+        return self._filter(column, "!=", value)
+
+    def gt(self, column, value):
+        return self._filter(column, ">", value)
+
+    def gte(self, column, value):
+        return self._filter(column, ">=", value)
+
+    def lt(self, column, value):
+        return self._filter(column, "<", value)
+
+    def lte(self, column, value):
+        return self._filter(column, "<=", value)
+
+    def in_(self, column, values):
+        self.filters.append((column, "IN", list(values)))
+        return self
+
+    def order(self, column, desc=False):
+        self.ordering.append((column, desc))
+        return self
+
+    def limit(self, size):
+        self.row_limit = size
+        return self
+
+    def range(self, start, end):
+        self.row_offset = start
+        self.row_limit = end - start + 1
+        return self
+
+    def execute(self):
+        return self.client._run(self)
+
+    def _filter(self, column, op, value):
+        self.filters.append((column, op, value))
+        return self
+
+    def _where(self, columns):
+        clauses, params = [], []
+        for column, op, value in self.filters:
+            if column not in columns:
+                raise sqlite3.OperationalError(f"column {self.table_name}.{column} does not exist")
+            if op == "IN":
+                if not value:
+                    clauses.append("0")
+                    continue
+                clauses.append(f"{_quote(column)} IN ({','.join('?' * len(value))})")
+                params.extend(value)
+            else:
+                clauses.append(f"{_quote(column)} {op} ?")
+                params.append(value)
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+    def _fetch(self, columns, sql_columns="*"):
+        where, params = self._where(columns)
+        order = ", ".join(f"{_quote(c)} {'DESC' if desc else 'ASC'}" for c, desc in self.ordering) or "id"
+        limit = self.client.max_rows if self.row_limit is None else min(self.row_limit, self.client.max_rows)
+        sql = f"SELECT {sql_columns} FROM {_quote(self.table_name)}{where} ORDER BY {order} LIMIT ? OFFSET ?"
+        return [dict(row) for row in self.client._conn.execute(sql, params + [limit, self.row_offset])]
+
+    def _matching_ids(self, columns):
+        where, params = self._where(columns)
+        sql = f"SELECT id FROM {_quote(self.table_name)}{where}"
+        return [row["id"] for row in self.client._conn.execute(sql, params)]
+
+    def _rows_by_id(self, ids):
+        rows = []
+        for start in range(0, len(ids), 500):
+            chunk = ids[start:start + 500]
+            sql = f"SELECT * FROM {_quote(self.table_name)} WHERE id IN ({','.join('?' * len(chunk))}) ORDER BY id"
+            rows.extend(dict(row) for row in self.client._conn.execute(sql, chunk))
+        return rows
+
+    def _run_locked(self):
+        conn = self.client._conn
+        columns = self.client._columns(self.table_name)
+
+        if self.operation in ("select", "update", "delete"):
+            if not columns:
+                return LocalResponse([], 0 if self.count == "exact" else None)
+            for column, _, _ in self.filters:
+                if column in columns and column != "id":
+                    self.client._ensure_index(self.table_name, [column])
+
+        if self.operation == "select":
+            # Resource embedding such as "users(*)" is not supported and is dropped.
+            wanted = [c.strip() for c in self.columns.split(",") if c.strip() and "(" not in c]
+            sql_columns = "*" if "*" in wanted else ", ".join(_quote(c) for c in wanted)
+            data = self._fetch(columns, sql_columns)
+            count = None
+            if self.count == "exact":
+                where, params = self._where(columns)
+                count = conn.execute(f"SELECT COUNT(*) FROM {_quote(self.table_name)}{where}", params).fetchone()[0]
+            return LocalResponse(data, count)
+
+        if self.operation in ("insert", "upsert"):
+            rows = self.payload if isinstance(self.payload, list) else [self.payload]
+            self.client._ensure_columns(self.table_name, {key for row in rows for key in row})
+            if self.operation == "upsert":
+                keys = [tuple(row.get(c) for c in self.on_conflict) for row in rows]
+                if len(set(keys)) != len(keys):
+                    raise sqlite3.IntegrityError("ON CONFLICT DO UPDATE command cannot affect row a second time")
+                if self.on_conflict != ["id"]:
+                    self.client._ensure_index(self.table_name, self.on_conflict)
+
+            ids = []
+            for row in rows:
+                existing_id = None
+                if self.operation == "upsert":
+                    match = " AND ".join(f"{_quote(c)} IS ?" for c in self.on_conflict)
+                    found = conn.execute(
+                        f"SELECT id FROM {_quote(self.table_name)} WHERE {match} LIMIT 1",
+                        [row.get(c) for c in self.on_conflict],
+                    ).fetchone()
+                    existing_id = found["id"] if found else None
+
+                if existing_id is not None:
+                    assignments = ", ".join(f"{_quote(c)} = ?" for c in row)
+                    conn.execute(
+                        f"UPDATE {_quote(self.table_name)} SET {assignments} WHERE id = ?",
+                        list(row.values()) + [existing_id],
+                    )
+                    ids.append(row.get("id", existing_id))
+                elif row:
+                    cursor = conn.execute(
+                        f"INSERT INTO {_quote(self.table_name)} ({', '.join(_quote(c) for c in row)}) "
+                        f"VALUES ({', '.join('?' * len(row))})",
+                        list(row.values()),
+                    )
+                    ids.append(cursor.lastrowid)
+                else:
+                    ids.append(conn.execute(f"INSERT INTO {_quote(self.table_name)} DEFAULT VALUES").lastrowid)
+            return LocalResponse(self._rows_by_id(ids))
+
+        if self.operation == "update":
+            self.client._ensure_columns(self.table_name, self.payload.keys())
+            ids = self._matching_ids(columns)
+            assignments = ", ".join(f"{_quote(c)} = ?" for c in self.payload)
+            for record_id in ids:
+                conn.execute(
+                    f"UPDATE {_quote(self.table_name)} SET {assignments} WHERE id = ?",
+                    list(self.payload.values()) + [record_id],
+                )
+            return LocalResponse(self._rows_by_id(ids))
+
+        if self.operation == "delete":
+            ids = self._matching_ids(columns)
+            deleted = self._rows_by_id(ids)
+            for start in range(0, len(ids), 500):
+                chunk = ids[start:start + 500]
+                conn.execute(f"DELETE FROM {_quote(self.table_name)} WHERE id IN ({','.join('?' * len(chunk))})", chunk)
+            return LocalResponse(deleted)
+
+        raise sqlite3.OperationalError(f"unsupported operation {self.operation}")
+
+
+def _quote(name):
+    return '"' + str(name).replace('"', '""') + '"'
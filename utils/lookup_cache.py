@@ -0,0 +1,68 @@
+import copy
+import threading
+import time
+
+import streamlit as st
+
+# Seconds a cached read of each table stays fresh. Writes made through the app
+# invalidate the table right away, so these only bound staleness from other writers.
+LOOKUP_TTLS = {
+    "rob_bike_disposition": 600,
+    "bdo_autoloan_inputset": 60,
+}
+DEFAULT_LOOKUP_TTL = 60
+
+
+class LookupCache:
+    """
+    Short-lived results of small lookup queries, shared by every session of the process.
+    Entries are grouped by table so a write to a table can drop everything read from it.
+    Callers get their own copy of the cached value. A load that raises is not cached.
+    """
+
+    def __init__(self, ttls=None, default_ttl=DEFAULT_LOOKUP_TTL):
+        self.ttls = dict(LOOKUP_TTLS if ttls is None else ttls)
+        self.default_ttl = default_ttl
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, table_name, key, load):
+        """load(), reused until the table's TTL runs out or the table is invalidated."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get((table_name, key))
+            if entry and entry[0] > now:
+                self.hits += 1
+                return copy.deepcopy(entry[1])
+            self.misses += 1
+            generation = self._generation
+
+        value = load()
+        ttl = self.ttls.get(table_name, self.default_ttl)
+        with self._lock:
+            # Something was invalidated while this load ran, so its result may predate a write.
+            if self._generation == generation:
+                self._entries[(table_name, key)] = (time.monotonic() + ttl, value)
+        return copy.deepcopy(value)
+
+    def column_values(self, client, table_name, column):
+        """All values of `column` in `table_name`."""
+        def load():
+            response = client.table(table_name).select(column).execute()
+            return [record[column] for record in response.data] if response.data else []
+
+        return self.get(table_name, ("column", column), load)
+
+    def invalidate(self, table_name=None):
+        with self._lock:
+            self._generation += 1
+            for entry_key in [k for k in self._entries if table_name is None or k[0] == table_name]:
+                del self._entries[entry_key]
+
+
+@st.cache_resource
+def get_lookup_cache():
+    return LookupCache()
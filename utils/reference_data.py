@@ -0,0 +1,69 @@
+import hashlib
+import os
+import threading
+
+import streamlit as st
+
+
+class ReferenceDataStore:
+    """
+    Lookup structures compiled from reference files on disk, shared by every session of the
+    process. An entry is rebuilt only when one of its files changes: the (mtime, size) stamp
+    is checked on every load, and when it moved the content hash decides whether the files
+    really changed. Loaded values are shared, so callers must not mutate them.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}
+        self.builds = 0
+
+    @staticmethod
+    def _stamp(path):
+        try:
+            stat = os.stat(path)
+            return stat.st_mtime_ns, stat.st_size
+        except OSError:
+            return None
+
+    @staticmethod
+    def _digest(paths):
+        digest = hashlib.blake2b(digest_size=16)
+        for path in paths:
+            if os.path.exists(path):
+                with open(path, "rb") as f:
+                    digest.update(f.read())
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def load(self, key, paths, build):
+        """Return build(), compiled once for the current contents of `paths`."""
+        paths = tuple(paths)
+        stamps = tuple(self._stamp(path) for path in paths)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry["paths"] == paths and entry["stamps"] == stamps:
+                return entry["value"]
+
+            digest = self._digest(paths)
+            if entry and entry["paths"] == paths and entry["digest"] == digest:
+                entry["stamps"] = stamps
+                return entry["value"]
+
+            value = build()
+            self.builds += 1
+            self._entries[key] = {"paths": paths, "stamps": stamps, "digest": digest, "value": value}
+            return value
+
+    def invalidate(self, key=None):
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+
+@st.cache_resource
+def get_reference_store():
+    return ReferenceDataStore()
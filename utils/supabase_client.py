@@ -0,0 +1,98 @@
+import os
+import threading
+
+import httpx
+import streamlit as st
+from supabase import create_client, ClientOptions
+from dotenv import load_dotenv
+load_dotenv()
+
+from utils.local_backend import LocalSupabaseClient
+
+SUPABASE_URL = os.getenv("SUPABASE_URL")
+SUPABASE_ANON_KEY = os.getenv("SUPABASE_ANON_KEY")
+# "local" swaps Supabase for the SQLite stand-in in utils/local_backend.py.
+SUPABASE_BACKEND = os.getenv("SUPABASE_BACKEND", "supabase")
+
+MAX_CONNECTIONS = int(os.getenv("SUPABASE_MAX_CONNECTIONS", "20"))
+KEEPALIVE_EXPIRY = 60.0
+REQUEST_TIMEOUT = 120.0
+
+
+class SupabaseClientFactory:
+    """
+    One Supabase client per process, backed by a single pooled httpx.Client so every
+    processor, the app and the login flow reuse the same keep-alive connections instead
+    of each opening its own and repeating TLS handshakes. httpx.Client is safe to share
+    between threads. Requests and newly opened connections are counted; every other
+    request went over a reused connection.
+    """
+
+    def __init__(self, url, key, max_connections=MAX_CONNECTIONS, keepalive_expiry=KEEPALIVE_EXPIRY):
+        self.url = url
+        self.key = key
+        self.max_connections = max_connections
+        self.keepalive_expiry = keepalive_expiry
+        self._lock = threading.Lock()
+        self._client = None
+        self._http_client = None
+        self.requests = 0
+        self.connections_opened = 0
+
+    def client(self):
+        with self._lock:
+            if self._client is None and SUPABASE_BACKEND == "local":
+                self._client = LocalSupabaseClient()
+            if self._client is None:
+                self._http_client = httpx.Client(
+                    limits=httpx.Limits(
+                        max_connections=self.max_connections,
+                        max_keepalive_connections=self.max_connections,
+                        keepalive_expiry=self.keepalive_expiry,
+                    ),
+                    timeout=httpx.Timeout(REQUEST_TIMEOUT),
+                    follow_redirects=True,
+                    http2=True,
+                    event_hooks={"request": [self._track_request]},
+                )
+                self._client = create_client(self.url, self.key, options=ClientOptions(httpx_client=self._http_client))
+            return self._client
+
+    def metrics(self):
+        """
+        HTTP requests made and connections opened since the process started. Requests
+        to the local SQLite stand-in use no connection and are counted apart.
+        """
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "connections_opened": self.connections_opened,
+                "connections_reused": self.requests - self.connections_opened,
+                "local_requests": self._client.requests if isinstance(self._client, LocalSupabaseClient) else 0,
+            }
+
+    def close(self):
+        with self._lock:
+            if self._http_client is not None:
+                self._http_client.close()
+            self._client = None
+            self._http_client = None
+
+    def _track_request(self, request):
+        with self._lock:
+            self.requests += 1
+        request.extensions["trace"] = self._trace
+
+    def _trace(self, event_name, info):
+        if event_name == "connection.connect_tcp.complete":
+            with self._lock:
+                self.connections_opened += 1
+
+
+@st.cache_resource
+def get_client_factory():
+    return SupabaseClientFactory(SUPABASE_URL, SUPABASE_ANON_KEY)
+
+
+def get_supabase_client():
+    return get_client_factory().client()
@@ -0,0 +1,70 @@
+import io
+import os
+import pickle
+import threading
+
+import streamlit as st
+from openpyxl import load_workbook
+from openpyxl.utils.cell import coordinate_to_tuple
+
+
+class TemplatePool:
+    """
+    Report templates parsed once per process. Each template is loaded with openpyxl a single
+    time (which is also its validity check), kept as a pickled workbook and handed out as an
+    independent in-memory clone. The entry is reloaded when the file's mtime or size changes.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}
+        self.loads = 0
+
+    def _entry(self, path):
+        stat = os.stat(path)
+        stamp = (stat.st_mtime_ns, stat.st_size)
+
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry and entry["stamp"] == stamp:
+                return entry
+
+            with open(path, "rb") as f:
+                workbook = load_workbook(io.BytesIO(f.read()))
+
+            merged_index = {}
+            for ws in workbook.worksheets:
+                cells = {}
+                for merged_range in ws.merged_cells.ranges:
+                    top_left = (merged_range.min_row, merged_range.min_col)
+                    for row, col in merged_range.cells:
+                        cells[(row, col)] = top_left
+                merged_index[ws.title] = cells
+
+            entry = {
+                "stamp": stamp,
+                "blob": pickle.dumps(workbook, protocol=pickle.HIGHEST_PROTOCOL),
+                "merged": merged_index,
+            }
+            workbook.close()
+            self.loads += 1
+            self._entries[path] = entry
+            return entry
+
+    def validate(self, path):
+        """Load the template into the pool; raises what load_workbook raises for a bad file."""
+        self._entry(path)
+
+    def clone(self, path):
+        """A fresh Workbook with the template's contents, safe to modify and save."""
+        return pickle.loads(self._entry(path)["blob"])
+
+    def merged_top_left(self, path, sheet_title, cell_ref):
+        """(row, column) of the top-left cell of the merged range holding cell_ref, or (None, None)."""
+        cells = self._entry(path)["merged"].get(sheet_title, {})
+        return cells.get(coordinate_to_tuple(cell_ref), (None, None))
+
+
+@st.cache_resource
+def get_template_pool():
+    return TemplatePool()
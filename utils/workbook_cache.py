@@ -0,0 +1,105 @@
+import hashlib
+import io
+from collections import OrderedDict
+
+import pandas as pd
+import streamlit as st
+
+MAX_CACHED_ENTRIES = 16
+MAX_CACHED_BYTES = 512 * 1024 * 1024
+
+
+class WorkbookCache:
+    """
+    Parsed sheet names and DataFrames of uploaded workbooks, keyed by the content hash
+    of the upload, the sheet and the read options. Least recently used entries are
+    evicted once the entry count or the estimated memory use goes over the cap.
+    """
+
+    def __init__(self, max_entries=MAX_CACHED_ENTRIES, max_bytes=MAX_CACHED_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._digests = {}
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def digest(self, content):
+        # Hashing 30 MB is not free either; reuse the digest while the same bytes object
+        # is being passed around within a run.
+        cached = self._digests.get(id(content))
+        if cached is not None and cached[0] is content:
+            return cached[1]
+
+        digest = hashlib.blake2b(content, digest_size=16).hexdigest()
+        self._digests = {id(content): (content, digest)}
+        return digest
+
+    def sheet_names(self, content):
+        content = self._as_bytes(content)
+        key = (self.digest(content), "__sheet_names__")
+        return list(self._get_or_load(key, lambda: pd.ExcelFile(io.BytesIO(content)).sheet_names))
+
+    def read_sheet(self, content, sheet_name=0, **read_kwargs):
+        """pd.read_excel(content, sheet_name, **read_kwargs), parsed once per distinct upload."""
+        content = self._as_bytes(content)
+        options = tuple(sorted((name, repr(value)) for name, value in read_kwargs.items()))
+        key = (self.digest(content), sheet_name, options)
+
+        result = self._get_or_load(
+            key, lambda: pd.read_excel(io.BytesIO(content), sheet_name=sheet_name, **read_kwargs)
+        )
+        # Callers add and overwrite columns freely, so never hand out the cached frame itself.
+        if isinstance(result, dict):
+            return {name: df.copy() for name, df in result.items()}
+        return result.copy()
+
+    def clear(self):
+        self._entries.clear()
+        self._digests = {}
+        self.total_bytes = 0
+
+    def _get_or_load(self, key, load):
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._entries[key][0]
+
+        self.misses += 1
+        value = load()
+        size = self._estimate_size(value)
+        self._entries[key] = (value, size)
+        self.total_bytes += size
+        self._evict()
+        return value
+
+    def _evict(self):
+        while self._entries and (len(self._entries) > self.max_entries or self.total_bytes > self.max_bytes):
+            if len(self._entries) == 1:
+                break
+            _, (_, size) = self._entries.popitem(last=False)
+            self.total_bytes -= size
+
+    @staticmethod
+    def _as_bytes(content):
+        if isinstance(content, (bytes, bytearray)):
+            return bytes(content)
+        if hasattr(content, "getvalue"):
+            return content.getvalue()
+        content.seek(0)
+        return content.read()
+
+    @staticmethod
+    def _estimate_size(value):
+        if isinstance(value, pd.DataFrame):
+            return int(value.memory_usage(index=True, deep=True).sum())
+        if isinstance(value, dict):
+            return sum(WorkbookCache._estimate_size(df) for df in value.values())
+        return 0
+
+
+def get_workbook_cache():
+    if "workbook_cache" not in st.session_state:
+        st.session_state["workbook_cache"] = WorkbookCache()
+    return st.session_state["workbook_cache"]
@@ -0,0 +1,201 @@
+import datetime
+import io
+import math
+import os
+
+import numpy as np
+import pandas as pd
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment, Border, Font, Side
+from openpyxl.utils import get_column_letter
+
+THIN_BORDER = Border(
+    left=Side(style='thin'),
+    right=Side(style='thin'),
+    top=Side(style='thin'),
+    bottom=Side(style='thin')
+)
+# What DataFrame.to_excel gives the header row and date cells, so files look the same as before.
+HEADER_FONT = Font(bold=True)
+HEADER_ALIGNMENT = Alignment(horizontal='center', vertical='top')
+DATETIME_FORMAT = "YYYY-MM-DD HH:MM:SS"
+DATE_FORMAT = "YYYY-MM-DD"
+# Autofit on very large sheets: measure only this many evenly spaced rows, and size columns
+# to this percentile of their value lengths instead of the longest one. Unset measures every
+# row and takes the maximum.
+AUTOFIT_SAMPLE_ROWS = int(os.getenv("AUTOFIT_SAMPLE_ROWS", "0")) or None
+AUTOFIT_PERCENTILE = float(os.getenv("AUTOFIT_PERCENTILE", "0")) or None
+
+
+class ColumnSpec:
+    """
+    How write_xlsx writes one column. `text` stores every value as a string with the
+    '@' format. `number_format` is applied to every data cell, or only to the rows
+    where `format_rows` is True. `border` draws a thin border around data cells.
+    `width` fixes the column width; `autofit` sizes it to the longest written value.
+    """
+
+    def __init__(self, text=False, number_format=None, format_rows=None, border=False, width=None, autofit=False):
+        self.text = text
+        self.number_format = '@' if text else number_format
+        self.format_rows = None if text else format_rows
+        self.border = border
+        self.width = width
+        self.autofit = autofit
+
+
+def column_widths(df, padding=2, skip_missing=False, skip_falsy=False,
+                  sample_rows=AUTOFIT_SAMPLE_ROWS, percentile=AUTOFIT_PERCENTILE):
+    """
+    Autofit width of each column of `df`, in column order: the length of its longest value
+    as text (astype(str), header included) plus `padding`, from vectorized string lengths.
+    Missing values count as empty with `skip_missing`; `skip_falsy` also skips "", 0 and
+    False. `sample_rows` measures only that many evenly spaced rows, and `percentile`
+    (0-100) takes that percentile of the lengths instead of the maximum.
+    """
+    if sample_rows and len(df) > sample_rows:
+        df = df.iloc[np.linspace(0, len(df) - 1, sample_rows).round().astype(int)]
+
+    widths = []
+    for i, col in enumerate(df.columns):
+        series = df.iloc[:, i]
+        lengths = series.astype(str).str.len()
+        if skip_missing or skip_falsy:
+            skipped = series.isna()
+            if skip_falsy:
+                skipped |= series.isin(["", 0])
+            lengths = lengths[~skipped.to_numpy()]
+
+        if lengths.empty:
+            longest = 0
+        elif percentile:
+            longest = int(math.ceil(np.percentile(lengths.to_numpy(), percentile)))
+        else:
+            longest = int(lengths.max())
+        widths.append(max(longest, len(str(col))) + padding)
+    return widths
+
+
+def apply_column_widths(ws, widths, first_column=1):
+    """Set the widths from column_widths on `ws`, starting at `first_column`; None leaves a column as is."""
+    for col, width in enumerate(widths, first_column):
+        if width is not None:
+            ws.column_dimensions[get_column_letter(col)].width = width
+
+
+def _excel_value(value):
+    """A cell value the way DataFrame.to_excel writes it, with the number format it adds."""
+    if value is None or (pd.api.types.is_scalar(value) and pd.isna(value)):
+        return "", None
+    if isinstance(value, (bool, np.bool_)):
+        return bool(value), None
+    if isinstance(value, (int, np.integer)):
+        return int(value), None
+    if isinstance(value, (float, np.floating)):
+        value = float(value)
+        return ("inf" if value > 0 else "-inf") if math.isinf(value) else value, None
+    if isinstance(value, datetime.datetime):
+        return value, DATETIME_FORMAT
+    if isinstance(value, datetime.date):
+        return value, DATE_FORMAT
+    if isinstance(value, datetime.timedelta):
+        return value.total_seconds() / 86400, "0"
+    return str(value), None
+
+
+def _column_cells(series):
+    """(values, formats) for one column; formats is None when no cell needs one."""
+    if (pd.api.types.is_bool_dtype(series) or pd.api.types.is_integer_dtype(series)) and not series.hasnans:
+        return series.tolist(), None
+    if pd.api.types.is_float_dtype(series):
+        values = [
+            "" if value != value else ("inf" if value > 0 else "-inf") if math.isinf(value) else value
+            for value in series.tolist()
+        ]
+        return values, None
+    if pd.api.types.is_datetime64_any_dtype(series) and series.dt.tz is None:
+        missing = series.isna().to_numpy()
+        values = np.where(missing, "", series.astype(object).to_numpy()).tolist()
+        formats = np.where(missing, None, DATETIME_FORMAT).tolist()
+        return values, formats
+
+    converted = [_excel_value(value) for value in series.tolist()]
+    values = [value for value, _ in converted]
+    formats = [fmt for _, fmt in converted]
+    return values, formats if any(formats) else None
+
+
+def write_xlsx(df, columns=None, sheet_name='Sheet1'):
+    """
+    `df` as .xlsx bytes, written the way DataFrame.to_excel(index=False) writes it but
+    streamed through a write-only workbook, so no cell is kept or revisited after its
+    row is written. `columns` maps column names to a ColumnSpec; styles are set on each
+    cell as its row is written.
+    """
+    columns = columns or {}
+    specs = [columns.get(col, ColumnSpec()) for col in df.columns]
+
+    workbook = Workbook(write_only=True)
+    ws = workbook.create_sheet(sheet_name)
+
+    cells = [_column_cells(df.iloc[:, i]) for i in range(df.shape[1])]
+    autofit = [i for i, spec in enumerate(specs) if spec.width is None and spec.autofit]
+    widths = dict(zip(autofit, column_widths(df.iloc[:, autofit], skip_missing=True)))
+    for i, spec in enumerate(specs):
+        if spec.width is not None:
+            widths[i] = spec.width
+    apply_column_widths(ws, [widths.get(i) for i in range(len(specs))])
+
+    header = []
+    for col in df.columns:
+        cell = WriteOnlyCell(ws, _excel_value(col)[0])
+        cell.font = HEADER_FONT
+        cell.border = THIN_BORDER
+        cell.alignment = HEADER_ALIGNMENT
+        header.append(cell)
+    ws.append(header)
+
+    # One style per (column, number format) is resolved up front and shared by the cells
+    # that use it; write-only cells are serialised as soon as their row is appended.
+    def style_for(spec, number_format):
+        cell = WriteOnlyCell(ws)
+        if spec.border:
+            cell.border = THIN_BORDER
+        if number_format:
+            cell.number_format = number_format
+        return cell._style
+
+    plans = []
+    for spec, (values, formats) in zip(specs, cells):
+        if spec.text:
+            values = [str(value) for value in values]
+        if not spec.border and not spec.number_format and formats is None:
+            plans.append((values, None))
+        elif spec.format_rows is None and (spec.number_format or formats is None):
+            plans.append((values, [style_for(spec, spec.number_format)] * len(values)))
+        else:
+            rows = [True] * len(values) if spec.format_rows is None else np.asarray(spec.format_rows, dtype=bool).tolist()
+            styles = {}
+            column_styles = []
+            for row, use_spec_format in enumerate(rows):
+                number_format = spec.number_format if use_spec_format and spec.number_format else (formats[row] if formats else None)
+                if number_format not in styles:
+                    styles[number_format] = style_for(spec, number_format)
+                column_styles.append(styles[number_format])
+            plans.append((values, column_styles))
+
+    for row in range(len(df)):
+        out = []
+        for values, column_styles in plans:
+            if column_styles is None:
+                out.append(values[row])
+            else:
+                cell = WriteOnlyCell(ws, values[row])
+                cell._style = column_styles[row]
+                out.append(cell)
+        ws.append(out)
+
+    output = io.BytesIO()
+    workbook.save(output)
+    return output.getvalue()